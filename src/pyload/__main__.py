@@ -98,6 +98,16 @@ def _parse_args(cmd_args):
         default=None,
     )
     parser.add_argument("--daemon", action="store_true", help="run as daemon")
+    parser.add_argument(
+        "--explain-queries",
+        action="store_true",
+        help="print the query plans of the file database and exit",
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="report the time spent in each startup phase, import and addon",
+    )
     parser.add_argument(
         "-r",
         "--restore",
@@ -130,7 +140,21 @@ def main(cmd_args=sys.argv[1:]):
     Entry point for console_scripts.
     """
     args = _parse_args(cmd_args)
-    core_args = (args.userdir, args.tempdir, args.storagedir, args.debug, args.restore)
+
+    if args.explain_queries:
+        from .core.database.explain import print_query_plans
+
+        db_path = os.path.join(args.userdir, "data", "pyload.db")
+        return print_query_plans(db_path)
+
+    core_args = (
+        args.userdir,
+        args.tempdir,
+        args.storagedir,
+        args.debug,
+        args.restore,
+        args.profile_startup,
+    )
 
     run(core_args, args.daemon)
 
@@ -71,12 +71,16 @@ class Core:
         return self._debug
 
     # NOTE: should `restore` reset config as well?
-    def __init__(self, userdir, tempdir, storagedir, debug=None, restore=False):
+    def __init__(
+        self, userdir, tempdir, storagedir, debug=None, restore=False, profile=False
+    ):
         self._running = Event()
         self._do_restart = False
         self._do_exit = False
         self._ = lambda x: x
         self._debug = 0
+        self._profile = profile  #: report where the startup time went
+        self.startup_timings = []  #: (phase, milliseconds)
 
         # if self.tmpdir not in sys.path:
         # sys.path.append(self.tmpdir)
@@ -84,14 +88,14 @@ class Core:
         # if refresh:
         # cleanpy(PACKDIR)
 
-        self._init_config(userdir, tempdir, storagedir, debug)
-        self._init_log()
+        self._timed("config", self._init_config, userdir, tempdir, storagedir, debug)
+        self._timed("log", self._init_log)
 
-        self._init_database(restore)
-        self._init_network()
-        self._init_api()
+        self._timed("database", self._init_database, restore)
+        self._timed("network", self._init_network)
+        self._timed("api", self._init_api)
         self._init_managers()
-        self._init_webserver()
+        self._timed("webserver", self._init_webserver)
 
         atexit.register(self.terminate)
 
@@ -182,15 +186,56 @@ class Core:
 
         from .scheduler import Scheduler
 
-        self.files = self.file_manager = FileManager(self)
-        self.scheduler = Scheduler(self)
+        first = len(self.startup_timings)
 
-        self.pgm = self.plugin_manager = PluginManager(self)
-        self.evm = self.event_manager = EventManager(self)
-        self.acm = self.account_manager = AccountManager(self)
-        self.thm = self.thread_manager = ThreadManager(self)
-        self.cpm = self.captcha_manager = CaptchaManager(self)
-        self.adm = self.addon_manager = AddonManager(self)
+        self.files = self.file_manager = self._timed("files", FileManager, self)
+        self.scheduler = self._timed("scheduler", Scheduler, self)
+
+        self.pgm = self.plugin_manager = self._timed("plugins", PluginManager, self)
+        self.evm = self.event_manager = self._timed("events", EventManager, self)
+        self.acm = self.account_manager = self._timed("accounts", AccountManager, self)
+        self.thm = self.thread_manager = self._timed("threads", ThreadManager, self)
+        self.cpm = self.captcha_manager = self._timed("captchas", CaptchaManager, self)
+        self.adm = self.addon_manager = self._timed("addons", AddonManager, self)
+
+        timings = self.startup_timings[first:]
+        self.log.info(
+            self._("Managers started in {:.0f} ms: {}").format(
+                sum(ms for phase, ms in timings),
+                ", ".join(f"{phase} {ms:.0f} ms" for phase, ms in timings),
+            )
+        )
+
+    def _timed(self, phase, func, *args):
+        """
+        calls func and records how long it took as startup phase.
+        """
+        start = time.perf_counter()
+        result = func(*args)
+        self.startup_timings.append((phase, (time.perf_counter() - start) * 1000))
+        return result
+
+    def _log_startup_profile(self):
+        self.log.info(self._("Startup profile:"))
+        for phase, ms in self.startup_timings:
+            self.log.info(f"  {phase:<24} {ms:9.1f} ms")
+
+        timings = sorted(
+            self.adm.timings.items(),
+            key=lambda x: sum(x[1].values()),
+            reverse=True,
+        )
+        self.log.info(self._("Addons (import / init / activate):"))
+        for name, times in timings:
+            self.log.info(
+                "  {:<24} {:9.1f} ms {:9.1f} ms {:9.1f} ms".format(
+                    name, *(times.get(x, 0) for x in ("import", "init", "activate"))
+                )
+            )
+        if self.adm.deferred:
+            self.log.info(
+                self._("Deferred addons: {}").format(", ".join(sorted(self.adm.deferred)))
+            )
 
     def _setup_permissions(self):
         self.log.debug("Setup permissions...")
@@ -266,11 +311,11 @@ class Core:
 
         # TODO: Move to accountmanager
         self.log.info(self._("Activating accounts..."))
-        self.acm.get_account_infos()
+        self._timed("account infos", self.acm.get_account_infos)
         # self.scheduler.add_job(0, self.acm.get_account_infos)
 
         self.log.info(self._("Activating Plugins..."))
-        self.adm.core_ready()
+        self._timed("addon activation", self.adm.core_ready)
 
     def _start_webserver(self):
         if not self.config.get("webui", "enabled"):
@@ -387,6 +432,9 @@ class Core:
             self._start_webserver()
             # self._parse_linkstxt()
 
+            if self._profile:
+                self._log_startup_profile()
+
             self.log.debug("*** pyLoad is up and running ***")
             # self.evm.fire('pyload:started')
 
@@ -452,6 +500,7 @@ class Core:
             self.addon_manager.core_exiting()
 
         finally:
+            self.thread_manager.save_info_cache()
             self.files.sync_save()
             self._running.clear()
             if self._do_restart:
@@ -263,6 +263,54 @@ class Api:
         self.pyload.config.toggle("reconnect", "enabled")
         return self.pyload.config.get("reconnect", "enabled")
 
+    @permission(Perms.SETTINGS)
+    def set_speed_limit(self, rate, level=None, key=None):
+        """
+        Change a download speed limit, running downloads follow immediately.
+
+        :param rate: speed limit in KiB/s, 0 removes it
+        :param level: 'plugin', 'account', 'package' or 'file', None for the global limit
+        :param key: plugin name, [plugin name, user], package id or file id
+        """
+        rate = max(0, int(rate))
+
+        if level is None:
+            self.pyload.config.set("download", "limit_speed", rate > 0)
+            if rate:
+                self.pyload.config.set("download", "max_speed", rate)
+            self.pyload.request_factory.update_bucket()
+            return
+
+        if level in ("package", "file"):
+            key = int(key)
+        elif level == "account":
+            key = tuple(key)
+
+        self.pyload.request_factory.buckets.set_rate(rate << 10, level, key)
+
+    @permission(Perms.STATUS)
+    def get_speed_limits(self):
+        """
+        All download speed limits.
+
+        :return: list of dicts with level, key and rate in KiB/s, level None is the global limit
+        """
+        return [
+            {"level": level, "key": key, "rate": max(0, rate) >> 10}
+            for (level, key), rate in self.pyload.request_factory.buckets.get_rates().items()
+        ]
+
+    @permission(Perms.STATUS)
+    def get_cache_info(self):
+        """
+        Sizes and approximate memory use of the in-memory caches.
+
+        :return: dict with the file, package and online check caches
+        """
+        info = self.pyload.files.get_cache_info()
+        info["info_cache"] = self.pyload.thread_manager.info_cache.get_stats()
+        return info
+
     @legacy("statusServer")
     @permission(Perms.LIST)
     def status_server(self):
@@ -411,7 +459,7 @@ class Api:
         Adds a package, with links to desired destination.
 
         :param name: name of the new package
-        :param links: list of urls
+        :param links: list or iterable of urls
         :param dest: `Destination`
         :return: package id of the new package
         """
@@ -430,11 +478,11 @@ class Api:
 
         pid = self.pyload.files.add_package(name, folder, Destination(dest))
 
-        self.pyload.files.add_links(links, pid)
+        count = self.pyload.files.add_links(links, pid, self._import_progress(pid))
 
         self.pyload.log.info(
             self._("Added package {name} containing {count:d} links").format(
-                name=name, count=len(links)
+                name=name, count=count
             )
         )
 
@@ -442,6 +490,19 @@ class Api:
 
         return pid
 
+    def _import_progress(self, pid):
+        """
+        returns a callback logging the progress of large link imports.
+        """
+
+        def progress(count):
+            if count >= self.pyload.files.BULK_BATCH:
+                self.pyload.log.debug(
+                    f"Importing links into package #{pid}: {count} added so far"
+                )
+
+        return progress
+
     @legacy("parseURLs")
     @permission(Perms.ADD)
     def parse_urls(self, html=None, url=None):
@@ -670,8 +731,7 @@ class Api:
 
         :param fids: list of file ids
         """
-        for id in fids:
-            self.pyload.files.delete_link(int(id))
+        self.pyload.files.delete_links([int(id) for id in fids])
 
         self.pyload.files.save()
 
@@ -683,8 +743,7 @@ class Api:
 
         :param pids: list of package ids
         """
-        for id in pids:
-            self.pyload.files.delete_package(int(id))
+        self.pyload.files.delete_packages([int(id) for id in pids])
 
         self.pyload.files.save()
 
@@ -800,13 +859,14 @@ class Api:
         Adds files to specific package.
 
         :param pid: package id
-        :param links: list of urls
+        :param links: list or iterable of urls
         """
-        self.pyload.files.add_links(links, int(pid))
+        pid = int(pid)
+        count = self.pyload.files.add_links(links, pid, self._import_progress(pid))
 
         self.pyload.log.info(
             self._("Added {count:d} links to package #{package:d} ").format(
-                count=len(links), package=pid
+                count=count, package=pid
             )
         )
         self.pyload.files.save()
@@ -926,8 +986,7 @@ class Api:
         :param pid: destination package
         :return:
         """
-        # TODO: implement
-        pass
+        self.pyload.files.move_links([int(id) for id in fids], int(pid))
 
     @legacy("uploadContainer")
     @permission(Perms.ADD)
@@ -955,7 +1014,7 @@ class Api:
         Gives a package a new position.
 
         :param pid: package id
-        :param position:
+        :param position: index in its queue like the order of `PackageData`, -1 appends
         """
         self.pyload.files.reorder_package(pid, position)
 
@@ -966,7 +1025,7 @@ class Api:
         Gives a new position to a file within its package.
 
         :param fid: file id
-        :param position:
+        :param position: index in its package like the order of `FileData`, -1 appends
         """
         self.pyload.files.reorder_file(fid, position)
 
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+
+import inspect
+import os
+import re
+import sqlite3
+from functools import partial
+
+from .file_database import FileDatabaseMethods
+
+
+class _Row(dict):
+    """
+    Stand-in for PyFile, PyPackage and their dict representations.
+    """
+
+    __getattr__ = dict.__getitem__
+
+
+_ROW = _Row(
+    id=1,
+    url="",
+    name="",
+    size=0,
+    status=3,
+    error="",
+    plugin="",
+    packageid=1,
+    package=1,
+    order=1,
+    folder="",
+    site="",
+    password="",
+    queue=1,
+)
+
+#: arguments of methods which do more than passing them to the query
+SAMPLE_ARGS = {
+    "add_links": ([("", "BasePlugin")], 1),
+    "update_link_info": ([("", 0, 3, "")],),
+    "reorder_package": (_ROW, 0),
+    "reorder_link": (_ROW, 0),
+    "get_job": (("BasePlugin",),),
+    "get_plugin_job": ("('BasePlugin', 'DLC')",),
+    "get_link_states": ([1],),
+    "delete_packages": ([1],),
+    "delete_links": ([1],),
+    "move_links": ([1], 1),
+    "get_empty_packages": ([1],),
+    "_executemany": ("SELECT 1", []),
+    "_gap_order": ("link", 1, 1, 1),
+    "_compact_order": ("link", 1),
+    "_move": ("link", 1, 1, 1),
+}
+
+
+class _NullRow(tuple):
+    """
+    Empty result row, falsy and None for every column.
+    """
+
+    def __getitem__(self, index):
+        return None
+
+
+class _ExplainCursor:
+    """
+    Cursor recording the query plan of every statement instead of running it.
+    """
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.lastrowid = 0
+        self.plans = []
+
+    def execute(self, statement, params=()):
+        if statement.lstrip().upper().startswith(("BEGIN", "COMMIT", "VACUUM")):
+            return
+        self.cursor.execute(
+            f"EXPLAIN QUERY PLAN {statement}", (None,) * statement.count("?")
+        )
+        plan = [row[-1] for row in self.cursor.fetchall()]
+        self.plans.append((" ".join(statement.split()), plan))
+
+    def executemany(self, statement, rows):
+        rows = list(rows)
+        self.execute(statement, rows[0] if rows else ())
+
+    def fetchone(self):
+        return _NullRow()
+
+    def fetchall(self):
+        return []
+
+    def __iter__(self):
+        return iter(())
+
+
+class _ExplainDatabase:
+    def __init__(self, cursor):
+        self.c = cursor
+        self.pyload = None
+
+    def write_behind(self, key, statement, params):
+        self.c.execute(statement, params)
+
+    def __getattr__(self, attr):
+        value = getattr(FileDatabaseMethods, attr)
+        fn = getattr(value, "__wrapped__", None)
+        return value if fn is None else partial(fn, self)
+
+
+def _sample_args(fn):
+    args = []
+    for param in list(inspect.signature(fn).parameters.values())[1:]:
+        if param.default is not inspect.Parameter.empty:
+            continue
+        if param.name in ("p", "f"):
+            args.append(_ROW)
+        elif param.name in ("name", "url", "folder", "filename", "plugin"):
+            args.append("")
+        else:
+            args.append(1)
+    return tuple(args)
+
+
+def explain_queries(db_path):
+    """
+    returns [(method, [(statement, [plan detail])])] for every method of
+    FileDatabaseMethods, nothing is written to the database.
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        result = []
+        for name, value in vars(FileDatabaseMethods).items():
+            fn = getattr(value, "__func__", None)
+            fn = getattr(fn, "__wrapped__", None)
+            if fn is None:
+                continue
+
+            cursor = _ExplainCursor(conn.cursor())
+            args = SAMPLE_ARGS.get(name, _sample_args(fn))
+            fn(_ExplainDatabase(cursor), *args)
+            result.append((name, cursor.plans))
+
+        return result
+    finally:
+        conn.close()
+
+
+def print_query_plans(db_path, file=None):
+    """
+    prints the query plans of FileDatabaseMethods, full table scans are marked.
+    """
+    if not os.path.isfile(db_path):
+        print(f"Database not found: {db_path}", file=file)
+        return
+
+    for name, plans in explain_queries(db_path):
+        print(f"{name}:", file=file)
+        for statement, plan in plans:
+            print(f"    {statement}", file=file)
+            for detail in plan:
+                mark = "!" if re.match(r"SCAN (TABLE )?\w+$", detail) else " "
+                print(f"    {mark}  {detail}", file=file)
+        print(file=file)
@@ -7,7 +7,25 @@ from ..utils import format
 
 
 class FileDatabaseMethods:
-    @style.queue
+    #: distance of consecutive orders, moves take the middle of their neighbours
+    ORDER_GAP = 1 << 10
+    #: gaps below this are spread again by `compact_orders`
+    MIN_ORDER_GAP = 1 << 4
+    #: scope -> (table, order column, column grouping the orders)
+    ORDER_SCOPES = {
+        "package": ("packages", "packageorder", "queue"),
+        "link": ("links", "linkorder", "package"),
+    }
+    #: ids bound in one IN (...) list, older sqlite allows 999 variables
+    MAX_VARIABLES = 900
+
+    @classmethod
+    def _batches(cls, ids):
+        ids = list(ids)
+        for i in range(0, len(ids), cls.MAX_VARIABLES):
+            yield ids[i : i + cls.MAX_VARIABLES]
+
+    @style.read
     def filecount(self, queue):
         """
         returns number of files in queue.
@@ -40,12 +58,26 @@ class FileDatabaseMethods:
         )
         return self.c.fetchone()[0]
 
+    @style.inner
+    def _executemany(self, statement, rows):
+        """
+        runs statement for all rows in one transaction, the connection would
+        commit every row on its own.
+        """
+        self.c.execute("BEGIN")
+        try:
+            self.c.executemany(statement, rows)
+        except Exception:
+            self.c.execute("ROLLBACK")
+            raise
+        self.c.execute("COMMIT")
+
     @style.inner
     def _next_package_order(self, queue=0):
         self.c.execute("SELECT MAX(packageorder) FROM packages WHERE queue=?", (queue,))
         max = self.c.fetchone()[0]
         if max is not None:
-            return max + 1
+            return max + self.ORDER_GAP
         else:
             return 0
 
@@ -54,10 +86,112 @@ class FileDatabaseMethods:
         self.c.execute("SELECT MAX(linkorder) FROM links WHERE package=?", (package,))
         max = self.c.fetchone()[0]
         if max is not None:
-            return max + 1
+            return max + self.ORDER_GAP
         else:
             return 0
 
+    @style.inner
+    def _gap_order(self, scope, key, id, position):
+        """
+        returns the order placing row id at index position of its package or
+        queue, None if there is no room left between the neighbours.
+        """
+        table, column, group = self.ORDER_SCOPES[scope]
+        if position >= 0:
+            self.c.execute(
+                f"SELECT COUNT(*) FROM {table} WHERE {group}=? AND id!=?", (key, id)
+            )
+            if position >= self.c.fetchone()[0]:
+                position = -1  #: past the end, appended like before
+        if position < 0:
+            self.c.execute(
+                f"SELECT MAX({column}) FROM {table} WHERE {group}=? AND id!=?",
+                (key, id),
+            )
+            last = self.c.fetchone()[0]
+            return 0 if last is None else last + self.ORDER_GAP
+
+        #: the neighbours, both are found through the index
+        self.c.execute(
+            f"SELECT {column} FROM {table} WHERE {group}=? AND id!=? ORDER BY {column} LIMIT 2 OFFSET ?",
+            (key, id, max(0, position - 1)),
+        )
+        orders = [r[0] for r in self.c]
+        if position == 0:
+            before, after = None, orders[0] if orders else None
+        else:
+            before = orders[0] if orders else None
+            after = orders[1] if len(orders) > 1 else None
+
+        if after is None:
+            return 0 if before is None else before + self.ORDER_GAP
+        if before is None:
+            before = -1  #: orders stay positive
+
+        order = (before + after) // 2
+        return order if before < order < after else None
+
+    @style.inner
+    def _compact_order(self, scope, key):
+        """
+        spreads the orders of a package or queue evenly again, leaving room
+        before the first one.
+        """
+        table, column, group = self.ORDER_SCOPES[scope]
+        self.c.execute(
+            f"SELECT id FROM {table} WHERE {group}=? ORDER BY {column}", (key,)
+        )
+        ids = [r[0] for r in self.c]
+        self._executemany(
+            f"UPDATE {table} SET {column}=? WHERE id=?",
+            [((i + 1) * self.ORDER_GAP, id) for i, id in enumerate(ids)],
+        )
+
+    @style.inner
+    def _move(self, scope, key, id, position):
+        """
+        moves row id to index position, returns its new order and if the scope
+        had to be compacted.
+        """
+        table, column, group = self.ORDER_SCOPES[scope]
+        order = self._gap_order(scope, key, id, position)
+        compacted = order is None
+        if compacted:
+            self._compact_order(scope, key)
+            order = self._gap_order(scope, key, id, position)
+
+        self.c.execute(f"UPDATE {table} SET {column}=? WHERE id=?", (order, id))
+        return order, compacted
+
+    @style.inner
+    def compact_orders(self):
+        """
+        compacts the packages and queues where moves left too little room,
+        returns their number. database thread only.
+        """
+        count = 0
+        for scope, (table, column, group) in self.ORDER_SCOPES.items():
+            #: walked in python, window functions need sqlite 3.25
+            self.c.execute(
+                f"SELECT {group}, {column} FROM {table} ORDER BY {group}, {column}"
+            )
+            keys = []
+            last_key = last_order = None
+            for key, order in self.c:
+                if (
+                    key == last_key
+                    and order - last_order < self.MIN_ORDER_GAP
+                    and (not keys or keys[-1] != key)
+                ):
+                    keys.append(key)
+                last_key, last_order = key, order
+
+            for key in keys:
+                self._compact_order(scope, key)
+                count += 1
+
+        return count
+
     @style.queue
     def add_link(self, url, name, plugin, package):
         order = self._next_file_order(package)
@@ -70,15 +204,22 @@ class FileDatabaseMethods:
     @style.queue
     def add_links(self, links, package):
         """
-        links is a list of tupels (url,plugin)
+        links is a list of tupels (url,plugin), returns the new links as (id,
+        plugin, linkorder).
         """
         order = self._next_file_order(package)
-        orders = [order + x for x in range(len(links))]
+        orders = [order + x * self.ORDER_GAP for x in range(len(links))]
         links = [(x[0], x[0], x[1], package, o) for x, o in zip(links, orders)]
-        self.c.executemany(
+        self._executemany(
             "INSERT INTO links(url, name, plugin, package, linkorder) VALUES(?,?,?,?,?)",
             links,
         )
+        #: executemany does not report the row ids
+        self.c.execute(
+            "SELECT id, plugin, linkorder FROM links WHERE package=? AND linkorder>=? ORDER BY linkorder",
+            (package, order),
+        )
+        return self.c.fetchall()
 
     @style.queue
     def add_package(self, name, folder, queue):
@@ -93,20 +234,61 @@ class FileDatabaseMethods:
     def delete_package(self, p):
         self.c.execute("DELETE FROM links WHERE package=?", (str(p.id),))
         self.c.execute("DELETE FROM packages WHERE id=?", (str(p.id),))
-        self.c.execute(
-            "UPDATE packages SET packageorder=packageorder-1 WHERE packageorder > ? AND queue=?",
-            (p.order, p.queue),
-        )
+
+    @style.queue
+    def delete_packages(self, ids):
+        ids = [(id,) for id in ids]
+        self._executemany("DELETE FROM links WHERE package=?", ids)
+        self._executemany("DELETE FROM packages WHERE id=?", ids)
 
     @style.queue
     def delete_link(self, f):
         self.c.execute("DELETE FROM links WHERE id=?", (str(f.id),))
-        self.c.execute(
-            "UPDATE links SET linkorder=linkorder-1 WHERE linkorder > ? AND package=?",
-            (f.order, str(f.packageid)),
-        )
 
     @style.queue
+    def delete_links(self, ids):
+        """
+        deletes links, returns the ids of the packages they were in.
+        """
+        packages = set()
+        for batch in self._batches(ids):
+            marks = ",".join("?" * len(batch))
+            self.c.execute(
+                f"SELECT DISTINCT package FROM links WHERE id IN ({marks})", batch
+            )
+            packages.update(r[0] for r in self.c)
+        self._executemany("DELETE FROM links WHERE id=?", [(id,) for id in ids])
+        return list(packages)
+
+    @style.queue
+    def move_links(self, ids, package):
+        """
+        appends links to package in the given order, returns their new orders.
+        """
+        order = self._next_file_order(package)
+        orders = [order + x * self.ORDER_GAP for x in range(len(ids))]
+        self._executemany(
+            "UPDATE links SET package=?, linkorder=? WHERE id=?",
+            [(package, o, id) for id, o in zip(ids, orders)],
+        )
+        return dict(zip(ids, orders))
+
+    @style.read
+    def get_empty_packages(self, ids):
+        """
+        returns which of the packages have no links.
+        """
+        empty = []
+        for batch in self._batches(ids):
+            marks = ",".join("?" * len(batch))
+            self.c.execute(
+                f"SELECT id FROM packages WHERE id IN ({marks}) AND NOT EXISTS(SELECT 1 FROM links WHERE links.package=packages.id)",
+                batch,
+            )
+            empty.extend(r[0] for r in self.c)
+        return empty
+
+    @style.read
     def get_all_links(self, q):
         """
         return information about all links in queue q.
@@ -125,7 +307,10 @@ class FileDatabaseMethods:
             (q,),
         )
         data = {}
+        ranks = {}  #: package -> position of its next link
         for r in self.c:
+            rank = ranks.get(r[7], 0)
+            ranks[r[7]] = rank + 1
             data[r[0]] = {
                 "id": r[0],
                 "url": r[1],
@@ -137,12 +322,12 @@ class FileDatabaseMethods:
                 "error": r[5],
                 "plugin": r[6],
                 "package": r[7],
-                "order": r[8],
+                "order": rank,
             }
 
         return data
 
-    @style.queue
+    @style.read
     def get_all_packages(self, q):
         """
         return information about packages in queue q (only useful in get all data)
@@ -164,7 +349,10 @@ class FileDatabaseMethods:
         )
 
         data = {}
-        for r in self.c:
+        #: empty packages are left out, but they keep their position
+        for rank, r in enumerate(self.c.fetchall()):
+            if not r[10]:
+                continue
             data[r[0]] = {
                 "id": r[0],
                 "name": r[1],
@@ -172,7 +360,7 @@ class FileDatabaseMethods:
                 "site": r[3],
                 "password": r[4],
                 "queue": r[5],
-                "order": r[6],
+                "order": rank,
                 "sizetotal": int(r[7]),
                 "sizedone": r[8] if r[8] else 0,  #: these can be None
                 "linksdone": r[9] if r[9] else 0,
@@ -182,13 +370,13 @@ class FileDatabaseMethods:
 
         return data
 
-    @style.queue
+    @style.read
     def get_link_data(self, id):
         """
         get link information as dict.
         """
         self.c.execute(
-            "SELECT id,url,name,size,status,error,plugin,package,linkorder FROM links WHERE id=?",
+            "SELECT id,url,name,size,status,error,plugin,package,(SELECT COUNT(*) FROM links AS o WHERE o.package=l.package AND o.linkorder<l.linkorder) FROM links AS l WHERE l.id=?",
             (str(id),),
         )
         data = {}
@@ -211,7 +399,7 @@ class FileDatabaseMethods:
 
         return data
 
-    @style.queue
+    @style.read
     def get_package_data(self, id):
         """
         get data about links for a package.
@@ -222,7 +410,7 @@ class FileDatabaseMethods:
         )
 
         data = {}
-        for r in self.c:
+        for rank, r in enumerate(self.c):
             data[r[0]] = {
                 "id": r[0],
                 "url": r[1],
@@ -234,14 +422,18 @@ class FileDatabaseMethods:
                 "error": r[5],
                 "plugin": r[6],
                 "package": r[7],
-                "order": r[8],
+                "order": rank,
             }
 
         return data
 
-    @style.async_
+    @style.inner
     def update_link(self, f):
-        self.c.execute(
+        """
+        buffered, updates of the same link are coalesced until the next flush.
+        """
+        self.write_behind(
+            ("links", f.id),
             "UPDATE links SET url=?,name=?,size=?,status=?,error=?,package=? WHERE id=?",
             (f.url, f.name, f.size, f.status, f.error, str(f.packageid), str(f.id)),
         )
@@ -258,7 +450,7 @@ class FileDatabaseMethods:
         """
         data is list of tupels (name, size, status, url)
         """
-        self.c.executemany(
+        self._executemany(
             "UPDATE links SET name=?, size=?, status=? WHERE url=? AND status IN (1,2,3,14)",
             data,
         )
@@ -270,50 +462,50 @@ class FileDatabaseMethods:
         return ids
 
     @style.queue
-    def reorder_package(self, p, position, no_move=False):
-        if position == -1:
-            position = self._next_package_order(p.queue)
-        if not no_move:
-            if p.order > position:
-                self.c.execute(
-                    "UPDATE packages SET packageorder=packageorder+1 WHERE packageorder >= ? AND packageorder < ? AND queue=? AND packageorder >= 0",
-                    (position, p.order, p.queue),
-                )
-            elif p.order < position:
-                self.c.execute(
-                    "UPDATE packages SET packageorder=packageorder-1 WHERE packageorder <= ? AND packageorder > ? AND queue=? AND packageorder >= 0",
-                    (position, p.order, p.queue),
-                )
-
-        self.c.execute(
-            "UPDATE packages SET packageorder=? WHERE id=?", (position, str(p.id))
-        )
+    def reorder_package(self, p, position):
+        """
+        moves a package to index position of its queue, -1 appends it.
+        returns the new order and if the other orders of the queue changed.
+        """
+        return self._move("package", p.queue, p.id, position)
 
     @style.queue
     def reorder_link(self, f, position):
         """
         reorder link with f as dict for pyfile.
+        returns the new order and if the other orders of the package changed.
         """
-        if f["order"] > position:
-            self.c.execute(
-                "UPDATE links SET linkorder=linkorder+1 WHERE linkorder >= ? AND linkorder < ? AND package=?",
-                (position, f["order"], f["package"]),
-            )
-        elif f["order"] < position:
-            self.c.execute(
-                "UPDATE links SET linkorder=linkorder-1 WHERE linkorder <= ? AND linkorder > ? AND package=?",
-                (position, f["order"], f["package"]),
-            )
+        return self._move("link", f["package"], f["id"], position)
 
-        self.c.execute("UPDATE links SET linkorder=? WHERE id=?", (position, f["id"]))
+    @style.read
+    def get_package_rank(self, queue, order):
+        """
+        returns the position of the package with order in its queue.
+        """
+        self.c.execute(
+            "SELECT COUNT(*) FROM packages WHERE queue=? AND packageorder<?",
+            (queue, order),
+        )
+        return self.c.fetchone()[0]
 
-    @style.queue
-    def clear_package_order(self, p):
-        self.c.execute("UPDATE packages SET packageorder=? WHERE id=?", (-1, str(p.id)))
+    @style.read
+    def get_link_rank(self, package, order):
+        """
+        returns the position of the link with order in its package.
+        """
         self.c.execute(
-            "UPDATE packages SET packageorder=packageorder-1 WHERE packageorder > ? AND queue=? AND id != ?",
-            (p.order, p.queue, str(p.id)),
+            "SELECT COUNT(*) FROM links WHERE package=? AND linkorder<?",
+            (package, order),
         )
+        return self.c.fetchone()[0]
+
+    @style.read
+    def get_link_orders(self, pid):
+        """
+        returns {id: linkorder} of the links of a package.
+        """
+        self.c.execute("SELECT id, linkorder FROM links WHERE package=?", (pid,))
+        return dict(self.c.fetchall())
 
     @style.async_
     def restart_file(self, id):
@@ -386,6 +578,38 @@ class FileDatabaseMethods:
 
         return [x[0] for x in self.c]
 
+    @style.queue
+    def get_ready_links(self, pid=None):
+        """
+        return (id, plugin, package, linkorder) of links suitable for download, of
+        package pid only if given.
+        """
+        cmd = "SELECT id, plugin, package, linkorder FROM links WHERE status IN (2,3,14)"
+        if pid is None:
+            self.c.execute(cmd)
+        else:
+            self.c.execute(f"{cmd} AND package=?", (str(pid),))
+        return self.c.fetchall()
+
+    @style.queue
+    def get_link_states(self, ids):
+        """
+        return (id, plugin, package, linkorder, status) of the given links.
+        """
+        ids = ",".join(str(int(x)) for x in ids)
+        self.c.execute(
+            f"SELECT id, plugin, package, linkorder, status FROM links WHERE id IN ({ids})"
+        )
+        return self.c.fetchall()
+
+    @style.queue
+    def get_package_orders(self):
+        """
+        return (id, queue, packageorder) of all packages.
+        """
+        self.c.execute("SELECT id, queue, packageorder FROM packages")
+        return self.c.fetchall()
+
     @style.queue
     def get_unfinished(self, pid):
         """
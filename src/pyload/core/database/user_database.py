@@ -24,7 +24,7 @@ def _check_password(hashed, clear):
 
 
 class UserDatabaseMethods:
-    @style.queue
+    @style.read
     def check_auth(self, user, password):
         self.c.execute(
             "SELECT id, name, password, role, permission, template, email FROM users WHERE name=?",
@@ -92,7 +92,7 @@ class UserDatabaseMethods:
     def set_role(self, user, role):
         self.c.execute("UPDATE users SET role=? WHERE name=?", (role, user))
 
-    @style.queue
+    @style.read
     def list_users(self):
         self.c.execute("SELECT name FROM users")
         users = []
@@ -100,7 +100,7 @@ class UserDatabaseMethods:
             users.append(row[0])
         return users
 
-    @style.queue
+    @style.read
     def get_all_user_data(self):
         self.c.execute("SELECT id, name, permission, role, template, email FROM users")
         user = {}
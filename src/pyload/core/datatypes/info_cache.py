@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+
+import json
+import time
+import urllib.parse
+from collections import OrderedDict
+from threading import Lock
+
+from ..utils.old import lock
+
+
+def normalize_url(url):
+    """
+    returns the key of url, scheme and host are case insensitive and the
+    fragment never reaches the hoster.
+    """
+    url = url.strip()
+    try:
+        parts = urllib.parse.urlsplit(url)
+    except ValueError:
+        return url
+
+    return urllib.parse.urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), parts.path, parts.query, "")
+    )
+
+
+class InfoCache:
+    """
+    Bounded cache of online check results (name, size, status, url).
+
+    Entries are keyed by normalized url and expire after the ttl of the plugin
+    which checked them, the least recently used ones are dropped once the cache
+    is full. Plugins set their ttl in minutes with `INFO_TTL`, 0 bypasses the
+    cache.
+    """
+
+    #: storage identifier of the persisted entries
+    STORAGE = "info_cache"
+
+    def __init__(self, size=10000, ttl=30):
+        self.lock = Lock()
+        self.size = size
+        self.ttl = ttl  #: default minutes an entry stays valid
+
+        self.entries = OrderedDict()  #: url -> (result, expiry)
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def plugin_ttl(self, plugin):
+        """
+        returns the minutes results of plugin are cached.
+        """
+        ttl = getattr(plugin, "INFO_TTL", None)
+        return self.ttl if ttl is None else ttl
+
+    @lock
+    def get(self, url):
+        """
+        returns the cached result of url or None.
+        """
+        key = normalize_url(url)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+
+        result, expiry = entry
+        if expiry < time.time():
+            del self.entries[key]
+            self.stats["expired"] += 1
+            self.stats["misses"] += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return result
+
+    @lock
+    def set(self, result, plugin=None):
+        """
+        caches a result as checked by plugin.
+        """
+        ttl = self.plugin_ttl(plugin)
+        if ttl <= 0 or self.size <= 0:
+            return
+
+        key = normalize_url(result[3])
+        self.entries[key] = (tuple(result), time.time() + ttl * 60)
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    @lock
+    def discard(self, urls):
+        """
+        drops the results of urls, so they are checked again.
+        """
+        for url in urls:
+            self.entries.pop(normalize_url(url), None)
+
+    @lock
+    def purge(self):
+        """
+        drops expired entries, returns how many.
+        """
+        now = time.time()
+        expired = [key for key, (result, expiry) in self.entries.items() if expiry < now]
+        for key in expired:
+            del self.entries[key]
+
+        self.stats["expired"] += len(expired)
+        return len(expired)
+
+    @lock
+    def clear(self):
+        self.entries.clear()
+
+    @lock
+    def get_stats(self):
+        stats = dict(self.stats, size=len(self.entries), capacity=self.size)
+        total = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / total if total else 0.0
+        return stats
+
+    @lock
+    def dump(self):
+        """
+        returns the valid entries as json.
+        """
+        now = time.time()
+        return json.dumps(
+            [
+                [key, list(result), expiry]
+                for key, (result, expiry) in self.entries.items()
+                if expiry >= now
+            ]
+        )
+
+    @lock
+    def load(self, data):
+        """
+        restores entries of `dump`, returns how many are still valid.
+        """
+        now = time.time()
+        count = 0
+        for key, result, expiry in json.loads(data):
+            if expiry >= now:
+                self.entries[key] = (tuple(result), expiry)
+                count += 1
+
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+        return count
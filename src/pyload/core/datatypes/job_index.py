@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+
+from collections import deque
+from heapq import heapify, heappop, heappush
+from threading import Lock
+
+from ..utils.old import lock
+
+
+class JobIndex:
+    """
+    In-memory scheduling index of the links ready to be downloaded.
+
+    Links are bucketed by (plugin, queue); every bucket keeps a heap of its packages
+    ordered by packageorder and every package a heap of its links ordered by
+    linkorder, so picking the next job never hits the database.
+    Heap entries are invalidated lazily and dropped once they reach the top.
+    """
+
+    #: online, queued, unknown
+    READY_STATUS = (2, 3, 14)
+
+    def __init__(self):
+        self.lock = Lock()
+        self.loaded = False
+
+        self.links = {}  #: link id -> (plugin, package id, linkorder)
+        self.packages = {}  #: package id -> (queue, packageorder)
+        self.buckets = {}  #: (plugin, queue) -> {package id: [(linkorder, link id)]}
+        self.package_heaps = {}  #: (plugin, queue) -> [(packageorder, package id)]
+        self.package_links = {}  #: package id -> {link id}
+        self.package_plugins = {}  #: package id -> {plugin: number of ready links}
+        self.deferred = deque()  #: (link id, plugin) of jobs put back
+
+    def __len__(self):
+        return len(self.links)
+
+    @lock
+    def load(self, loader):
+        """
+        (re)builds the whole index, loader must return two iterables:
+        ready links as (id, plugin, package, linkorder) and packages as (id, queue,
+        packageorder).
+        """
+        links, packages = loader()
+
+        self.links.clear()
+        self.buckets.clear()
+        self.package_heaps.clear()
+        self.package_links.clear()
+        self.package_plugins.clear()
+        self.deferred.clear()
+        self.packages = {id: (queue, order) for id, queue, order in packages}
+
+        for id, plugin, pid, order in links:
+            self._insert(id, plugin, pid, order)
+
+        self.loaded = True
+
+    @lock
+    def invalidate(self):
+        """
+        forces a full reload on next use.
+        """
+        self.loaded = False
+
+    @lock
+    def update(self, id, plugin, pid, order, status):
+        """
+        updates a single link, adding or removing it according to its status.
+        """
+        if not self.loaded:
+            return
+
+        if status in self.READY_STATUS:
+            self._insert(id, plugin, pid, order)
+        else:
+            self._remove(id)
+
+    @lock
+    def remove(self, id):
+        if not self.loaded:
+            return
+
+        self._remove(id)
+        self._discard_deferred(id)
+
+    @lock
+    def set_package_links(self, pid, links):
+        """
+        replaces the ready links of a package with links as (id, plugin, package,
+        linkorder).
+        """
+        if not self.loaded:
+            return
+
+        links = list(links)
+        ids = {x[0] for x in links}
+        for id in self.package_links.get(pid, set()) - ids:
+            self._remove(id)
+
+        for id, plugin, pid, order in links:
+            self._insert(id, plugin, pid, order)
+
+    @lock
+    def set_package(self, pid, queue, order):
+        if not self.loaded:
+            return
+
+        self._set_package(pid, queue, order)
+
+    @lock
+    def set_packages(self, packages):
+        """
+        syncs order and queue of all packages with packages as (id, queue,
+        packageorder).
+        """
+        if not self.loaded:
+            return
+
+        packages = {id: (queue, order) for id, queue, order in packages}
+
+        for pid in list(self.packages):
+            if pid not in packages:
+                self._remove_package(pid)
+
+        for pid, (queue, order) in packages.items():
+            self._set_package(pid, queue, order)
+
+    @lock
+    def remove_package(self, pid):
+        if not self.loaded:
+            return
+
+        self._remove_package(pid)
+
+    @lock
+    def defer(self, id, plugin):
+        """
+        puts an already started job back, it will be handed out first.
+        """
+        self._discard_deferred(id)
+        self.deferred.append((id, plugin))
+
+    @lock
+    def get_job(self, occ, pre=()):
+        """
+        returns id of the first job of queue not using an occupied plugin, links of
+        plugins in pre are considered in the collector too.
+        """
+        for id, plugin in self.deferred:
+            if plugin not in occ or plugin in pre:
+                self.deferred.remove((id, plugin))
+                return id
+
+        keys = [
+            (plugin, queue)
+            for plugin, queue in self.buckets
+            if (queue == 1 and plugin not in occ) or plugin in pre
+        ]
+        return self._first(keys)
+
+    @lock
+    def get_plugin_job(self, plugins):
+        """
+        returns id of the first job using one of the given plugins.
+        """
+        keys = [(plugin, queue) for plugin, queue in self.buckets if plugin in plugins]
+        return self._first(keys)
+
+    def _discard_deferred(self, id):
+        for job in [x for x in self.deferred if x[0] == id]:
+            self.deferred.remove(job)
+
+    def _first(self, keys):
+        best = None
+        for key in keys:
+            head = self._peek(key)
+            if head is not None and (best is None or head < best):
+                best = head
+
+        return best[2] if best else None
+
+    def _peek(self, key):
+        """
+        returns (packageorder, linkorder, id) of the first valid job in a bucket.
+        """
+        plugin, queue = key
+        bucket = self.buckets.get(key)
+        heap = self.package_heaps.get(key)
+
+        while heap:
+            porder, pid = heap[0]
+            links = bucket.get(pid)
+            if not links or self.packages.get(pid) != (queue, porder):
+                heappop(heap)
+                continue
+
+            while links:
+                order, id = links[0]
+                if self.links.get(id) == (plugin, pid, order):
+                    return porder, order, id
+                heappop(links)
+
+            heappop(heap)
+
+        return None
+
+    def _insert(self, id, plugin, pid, order):
+        entry = (plugin, pid, order)
+        old = self.links.get(id)
+        if old == entry:
+            return
+        if old is not None:
+            self._remove(id)
+
+        self.links[id] = entry
+        self.package_links.setdefault(pid, set()).add(id)
+
+        counts = self.package_plugins.setdefault(pid, {})
+        counts[plugin] = counts.get(plugin, 0) + 1
+
+        package = self.packages.get(pid)
+        if package is None:
+            return
+
+        queue, porder = package
+        bucket = self.buckets.setdefault((plugin, queue), {})
+        if pid not in bucket:
+            bucket[pid] = []
+            heap = self.package_heaps.setdefault((plugin, queue), [])
+            heappush(heap, (porder, pid))
+            self._compact(
+                heap,
+                len(bucket),
+                lambda x: x[1] in bucket and self.packages.get(x[1]) == (queue, x[0]),
+            )
+
+        links = bucket[pid]
+        heappush(links, (order, id))
+        self._compact(
+            links,
+            counts[plugin],
+            lambda x: self.links.get(x[1]) == (plugin, pid, x[0]),
+        )
+
+    def _remove(self, id):
+        entry = self.links.pop(id, None)
+        if entry is None:
+            return
+
+        plugin, pid, order = entry
+        ids = self.package_links.get(pid, set())
+        ids.discard(id)
+        if not ids:
+            self.package_links.pop(pid, None)
+
+        counts = self.package_plugins.get(pid, {})
+        counts[plugin] = counts.get(plugin, 1) - 1
+        if counts[plugin] > 0:
+            return
+
+        del counts[plugin]
+        if not counts:
+            self.package_plugins.pop(pid, None)
+
+        package = self.packages.get(pid)
+        if package is not None:
+            bucket = self.buckets.get((plugin, package[0]), {})
+            bucket.pop(pid, None)
+            if not bucket:
+                self.buckets.pop((plugin, package[0]), None)
+                self.package_heaps.pop((plugin, package[0]), None)
+
+    def _set_package(self, pid, queue, order):
+        old = self.packages.get(pid)
+        if old == (queue, order):
+            return
+
+        self.packages[pid] = (queue, order)
+
+        for plugin in self.package_plugins.get(pid, {}):
+            if old is None:
+                # links known before their package, place them now
+                links = [
+                    (self.links[id][2], id)
+                    for id in self.package_links[pid]
+                    if self.links[id][0] == plugin
+                ]
+                heapify(links)
+            else:
+                bucket = self.buckets.get((plugin, old[0]), {})
+                links = bucket.pop(pid, [])
+                if not bucket:
+                    self.buckets.pop((plugin, old[0]), None)
+                    self.package_heaps.pop((plugin, old[0]), None)
+
+            self.buckets.setdefault((plugin, queue), {})[pid] = links
+            heap = self.package_heaps.setdefault((plugin, queue), [])
+            heappush(heap, (order, pid))
+            bucket = self.buckets[(plugin, queue)]
+            self._compact(
+                heap,
+                len(bucket),
+                lambda x: x[1] in bucket and self.packages.get(x[1]) == (queue, x[0]),
+            )
+
+    def _remove_package(self, pid):
+        for id in list(self.package_links.get(pid, ())):
+            self._remove(id)
+            self._discard_deferred(id)
+
+        self.packages.pop(pid, None)
+
+    @staticmethod
+    def _compact(heap, size, valid):
+        """
+        drops stale entries once they outnumber the valid ones.
+        """
+        if len(heap) > 2 * size + 16:
+            heap[:] = [x for x in heap if valid(x)]
+            heapify(heap)
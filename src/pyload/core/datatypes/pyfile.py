@@ -35,6 +35,33 @@ class PyFile:
     Represents a file object at runtime.
     """
 
+    __slots__ = (
+        "m",
+        "manager",
+        "id",
+        "url",
+        "name",
+        "_size",
+        "status",
+        "pluginname",
+        "packageid",
+        "error",
+        "order",
+        "lock",
+        "plugin",
+        "pluginmodule",
+        "pluginclass",
+        "wait_until",
+        "active",
+        "abort",
+        "reconnected",
+        "statusname",
+        "progress",
+        "maxprogress",
+        "synced",
+        "__weakref__",  #: evicted instances, see `FileManager.idle`
+    )
+
     def __init__(
         self, manager, id, url, name, size, status, error, pluginname, package, order
     ):
@@ -58,6 +85,8 @@ class PyFile:
         self.lock = RLock()
 
         self.plugin = None
+        self.pluginmodule = None
+        self.pluginclass = None
         # self.download = None
 
         self.wait_until = 0  #: time.time() + time to wait
@@ -72,6 +101,8 @@ class PyFile:
         self.progress = 0
         self.maxprogress = 100
 
+        self.synced = self.db_state()  #: database state at last sync
+
     # will convert all sizes to ints
     size = property(lambda self: self._size, set_size)
 
@@ -123,11 +154,23 @@ class PyFile:
     def has_status(self, status):
         return status_map[status] == self.status
 
+    def db_state(self):
+        return hash(
+            (self.url, self.name, self._size, self.status, self.error, self.packageid, self.order)
+        )
+
+    def is_dirty(self):
+        """
+        tells if the instance holds changes not synced to the database.
+        """
+        return self.synced != self.db_state()
+
     def sync(self):
         """
         sync PyFile instance with database.
         """
         self.m.update_link(self)
+        self.synced = self.db_state()
 
     @lock
     def release(self):
@@ -10,6 +10,21 @@ class PyPackage:
     Represents a package object at runtime.
     """
 
+    __slots__ = (
+        "m",
+        "manager",
+        "id",
+        "name",
+        "_folder",
+        "site",
+        "password",
+        "queue",
+        "order",
+        "set_finished",
+        "synced",
+        "__weakref__",  #: evicted instances, see `FileManager.idle`
+    )
+
     def __init__(self, manager, id, name, folder, site, password, queue, order):
         self.m = self.manager = manager
         self.m.package_cache[int(id)] = self
@@ -23,6 +38,8 @@ class PyPackage:
         self.order = order
         self.set_finished = False
 
+        self.synced = self.db_state()  #: database state at last sync
+
     @property
     def folder(self):
         return safepath(self._folder)
@@ -52,11 +69,23 @@ class PyPackage:
         """
         return self.m.get_package_data(self.id)["links"]
 
+    def db_state(self):
+        return hash(
+            (self.name, self._folder, self.site, self.password, self.queue, self.order)
+        )
+
+    def is_dirty(self):
+        """
+        tells if the instance holds changes not synced to the database.
+        """
+        return self.synced != self.db_state()
+
     def sync(self):
         """
         sync with db.
         """
         self.m.update_package(self)
+        self.synced = self.db_state()
 
     def release(self):
         """
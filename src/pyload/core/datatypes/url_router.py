@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+
+import re
+from heapq import merge
+
+try:
+    from re import _parser as sre_parse  #: python 3.11+
+except ImportError:
+    import sre_parse
+
+#: literals found in almost every url, useless to tell plugins apart
+COMMON = ("https://www.", "http://www.", "ftp://")
+
+#: most strings an alternation of literals is expanded to
+MAX_EXPAND = 16
+
+
+def _literal(items):
+    """
+    returns the strings the parsed pattern matches if they are only literals and
+    alternations of them, else None.
+    """
+    strings = [""]
+    for op, av in items:
+        op = str(op)
+        if op == "LITERAL":
+            strings = [x + chr(av) for x in strings]
+        elif op == "SUBPATTERN":
+            sub = _literal(av[-1])
+            if sub is None:
+                return None
+            strings = [x + y for x in strings for y in sub]
+        elif op == "BRANCH":
+            sub = [_literal(x) for x in av[1]]
+            if None in sub:
+                return None
+            strings = [x + y for x in strings for b in sub for y in b]
+        else:
+            return None
+
+        if len(strings) > MAX_EXPAND:
+            return None
+
+    return strings
+
+
+def _alternatives(items):
+    """
+    returns the literals of which every match of the parsed pattern contains at
+    least one, an empty tuple if there are none.
+    """
+    requirements = []
+    run = [""]  #: strings the current stretch of literals can be
+
+    def flush():
+        if run != [""]:
+            requirements.append(tuple(x.lower() for x in run))
+        run[:] = [""]
+
+    def extend(strings):
+        if len(run) * len(strings) > MAX_EXPAND:
+            flush()
+        run[:] = [x + y for x in run for y in strings]
+
+    def walk(items):
+        for op, av in items:
+            op = str(op)
+            if op == "LITERAL":
+                extend([chr(av)])
+
+            elif op in ("AT", "ASSERT", "ASSERT_NOT"):
+                continue  #: zero width, the surrounding literals stay adjacent
+
+            elif op == "SUBPATTERN":
+                walk(av[-1])
+
+            elif op in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT"):
+                low, high, sub = av
+                if low == high == 1:
+                    walk(sub)
+                    continue
+                flush()
+                if low:
+                    requirements.append(_alternatives(sub))
+
+            elif op == "BRANCH":
+                strings = _literal([(op, av)])
+                if strings is not None:
+                    extend(strings)
+                    continue
+                flush()
+                branches = [_alternatives(sub) for sub in av[1]]
+                if all(branches):
+                    requirements.append(tuple(x for b in branches for x in b))
+
+            else:
+                flush()
+
+    walk(items)
+    flush()
+
+    #: the weakest literal decides how many urls a requirement lets through
+    usable = [r for r in requirements if r and all(_selective(x) for x in r)]
+    if not usable:
+        return ()
+    return max(usable, key=lambda r: (min(len(x) for x in r), -len(r)))
+
+
+def _selective(literal):
+    return len(literal) >= URLRouter.MIN_LITERAL and not any(
+        literal in x for x in COMMON
+    )
+
+
+def required_literals(pattern):
+    """
+    returns lowercase literals of which every url matching pattern contains at
+    least one, an empty tuple if they can't be told.
+    """
+    try:
+        return _alternatives(sre_parse.parse(pattern))
+    except Exception:
+        return ()
+
+
+def _trie(literals):
+    """
+    returns a regex matching the longest of literals, built as a prefix tree so
+    every position of the text is tested in one pass.
+    """
+    root = {}
+    for literal in literals:
+        node = root
+        for char in literal:
+            node = node.setdefault(char, {})
+        node[""] = {}  #: a literal ends here
+
+    def build(node):
+        #: longer literals first, the empty branch ends the match
+        branches = [re.escape(char) + build(sub) for char, sub in sorted(node.items()) if char]
+        if "" in node:
+            branches.append("")
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    return build(root)
+
+
+class URLRouter:
+    """
+    Finds the first plugin whose pattern matches an url without trying them all.
+
+    Every plugin is indexed under literals its pattern requires (usually the
+    domain name). All literals are compiled into one regex which finds them in an
+    url at once, only the plugins whose literals occur are matched then, plus the
+    few plugins without a usable literal. Candidates are matched in the original
+    plugin order, so the result is the same as trying all patterns in turn.
+    """
+
+    #: shortest literal worth indexing
+    MIN_LITERAL = 3
+
+    def __init__(self, plugins, literals=None):
+        """
+        plugins is an iterable of (name, {"pattern", "re"}) in match priority,
+        literals the cache of a former router.
+        """
+        self.entries = []  #: [(name, plugin dict, compiled pattern)]
+        self.index = {}  #: literal -> positions in entries of it and its prefixes
+        self.fallback = []  #: positions of plugins without usable literal
+        self.literals = literals if literals is not None else {}  #: pattern -> required literals
+
+        owners = {}  #: literal -> positions in entries
+        for name, value in plugins:
+            regex = value.get("re")
+            if regex is None:  #: invalid pattern
+                continue
+
+            pos = len(self.entries)
+            self.entries.append((name, value, regex))
+
+            literals = self.literals.get(regex.pattern)
+            if literals is None:
+                literals = self.literals[regex.pattern] = required_literals(
+                    regex.pattern
+                )
+
+            if not literals:
+                self.fallback.append(pos)
+                continue
+
+            for literal in literals:
+                owners.setdefault(literal, []).append(pos)
+
+        #: the regex reports the longest literal at a position, shorter ones
+        #: starting there are its prefixes
+        for literal in owners:
+            self.index[literal] = sorted(
+                {
+                    pos
+                    for size in range(self.MIN_LITERAL, len(literal) + 1)
+                    for pos in owners.get(literal[:size], ())
+                }
+            )
+
+        self.finder = re.compile(f"(?=({_trie(owners)}))") if owners else None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def is_stale(self, plugins):
+        """
+        tells if the plugins or their patterns changed since the router was built.
+        """
+        entries = iter(self.entries)
+        for name, value in plugins:
+            if "re" not in value:
+                continue
+            entry = next(entries, None)
+            if entry is None or entry[1] is not value or entry[2] is not value["re"]:
+                return True
+
+        return next(entries, None) is not None
+
+    def candidates(self, url):
+        """
+        returns the positions of the plugins which may match url, in order.
+        """
+        if self.finder is None:
+            return iter(self.fallback)
+
+        index = self.index
+        found = set()
+        for literal in self.finder.findall(url.lower()):
+            found.update(index[literal])
+
+        return merge(sorted(found), self.fallback)
+
+    def match(self, url):
+        """
+        returns (name, plugin dict) of the first plugin matching url or None.
+        """
+        for pos in self.candidates(url):
+            name, value, regex = self.entries[pos]
+            if regex.match(url):
+                return name, value
+
+        return None
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 
+import time
 from functools import wraps
 from threading import RLock
 from types import MethodType
@@ -66,6 +67,11 @@ class AddonManager:
 
         self.events = {}  #: contains events
 
+        #: enabled addons not loaded yet -> events loading them
+        self.deferred = {}
+        self.ready = False  #: core_ready was dispatched
+        self.timings = {}  #: addon name -> {"import", "init", "activate"} in ms
+
         # registering callback for config event
         self.pyload.config.plugin_cb = MethodType(
             self.dispatch_event, "plugin_config_changed"
@@ -91,6 +97,9 @@ class AddonManager:
         if parse:
             args = tuple(literal_eval(x) for x in args)
 
+        if plugin in self.deferred:
+            self.load_deferred(plugin=plugin)
+
         plugin = self.plugin_map[plugin]
         f = getattr(plugin, func)
         return f(*args)
@@ -100,23 +109,25 @@ class AddonManager:
 
         active = []
         deactive = []
+        deferred = []
 
-        for pluginname in self.pyload.plugin_manager.addon_plugins:
+        for pluginname, info in self.pyload.plugin_manager.addon_plugins.items():
             try:
                 # addon_class = getattr(plugin, plugin.__name__)
 
                 if self.pyload.config.get_plugin(pluginname, "enabled"):
-                    plugin_class = self.pyload.plugin_manager.load_class(
-                        "addon", pluginname
-                    )
-                    if not plugin_class:
+                    if info.get("events"):
+                        self.deferred[pluginname] = set(info["events"])
+                        deferred.append(pluginname)
+                        continue
+
+                    plugin = self.load_addon(pluginname)
+                    if not plugin:
                         continue
 
-                    plugin = plugin_class(self.pyload, self)
                     plugins.append(plugin)
-                    self.plugin_map[plugin_class.__name__] = plugin
                     if plugin.is_activated():
-                        active.append(plugin_class.__name__)
+                        active.append(plugin.classname)
                 else:
                     deactive.append(pluginname)
 
@@ -130,12 +141,72 @@ class AddonManager:
         self.pyload.log.info(
             self._("Activated plugins: {}").format(", ".join(sorted(active)))
         )
+        self.pyload.log.info(
+            self._("Deferred plugins: {}").format(", ".join(sorted(deferred)))
+        )
         self.pyload.log.info(
             self._("Deactivate plugins: {}").format(", ".join(sorted(deactive)))
         )
 
         self.plugins = plugins
 
+    def load_addon(self, name):
+        """
+        imports and creates the addon, returns None if it can't be loaded.
+        """
+        start = time.perf_counter()
+        plugin_class = self.pyload.plugin_manager.load_class("addon", name)
+        loaded = time.perf_counter()
+        if not plugin_class:
+            return None
+
+        plugin = plugin_class(self.pyload, self)
+        self.plugin_map[plugin_class.__name__] = plugin
+        self.timings[name] = {
+            "import": (loaded - start) * 1000,
+            "init": (time.perf_counter() - loaded) * 1000,
+        }
+        return plugin
+
+    def load_deferred(self, event=None, plugin=None):
+        """
+        loads the deferred addons waiting for event, or the addon named plugin.
+        """
+        if not self.deferred:
+            return
+
+        with self.lock:
+            names = [
+                name
+                for name, events in self.deferred.items()
+                if name == plugin or event in events
+            ]
+            for name in names:
+                del self.deferred[name]
+                try:
+                    addon = self.load_addon(name)
+                    if not addon:
+                        continue
+
+                    self.pyload.log.debug(f"Plugin loaded on demand: {name}")
+                    self.plugins.append(addon)
+                    if self.ready:
+                        self.activate_loaded(addon)
+
+                except Exception:
+                    self.pyload.log.warning(
+                        self._("Failed activating {}").format(name),
+                        exc_info=self.pyload.debug > 1,
+                        stack_info=self.pyload.debug > 2,
+                    )
+
+    def activate_loaded(self, plugin):
+        start = time.perf_counter()
+        plugin.core_ready()
+        self.timings.setdefault(plugin.classname, {})["activate"] = (
+            time.perf_counter() - start
+        ) * 1000
+
     def manage_addons(self, plugin, name, value):
         if name == "enabled" and value:
             self.activate_addon(plugin)
@@ -149,22 +220,27 @@ class AddonManager:
             if inst.__name__ == plugin:
                 return
 
-        plugin_class = self.pyload.plugin_manager.load_class("addon", plugin)
+        #: loaded when needed
+        if plugin in self.deferred:
+            return
 
-        if not plugin_class:
+        plugin = self.load_addon(plugin)
+
+        if not plugin:
             return
 
-        self.pyload.log.debug(f"Plugin loaded: {plugin}")
+        self.pyload.log.debug(f"Plugin loaded: {plugin.classname}")
 
-        plugin = plugin_class(self.pyload, self)
         self.plugins.append(plugin)
-        self.plugin_map[plugin_class.__name__] = plugin
 
         # call core Ready
         start_new_thread(plugin.core_ready, tuple())
 
     def deactivate_addon(self, plugin):
 
+        if self.deferred.pop(plugin, None) is not None:
+            return  #: never loaded
+
         addon = None
         for inst in self.plugins:
             if inst.__name__ == plugin:
@@ -185,9 +261,10 @@ class AddonManager:
 
     @try_catch
     def core_ready(self):
+        self.ready = True
         for plugin in self.plugins:
             if plugin.is_activated():
-                plugin.core_ready()
+                self.activate_loaded(plugin)
 
         self.dispatch_event("core_ready")
 
@@ -201,6 +278,7 @@ class AddonManager:
 
     @lock
     def download_preparing(self, pyfile):
+        self.load_deferred("download_preparing")
         for plugin in self.plugins:
             if plugin.is_activated():
                 plugin.download_preparing(pyfile)
@@ -209,6 +287,7 @@ class AddonManager:
 
     @lock
     def download_finished(self, pyfile):
+        self.load_deferred("download_finished")
         for plugin in self.plugins:
             if plugin.is_activated():
                 if "download_finished" in plugin.__threaded__:
@@ -221,6 +300,7 @@ class AddonManager:
     @lock
     @try_catch
     def download_failed(self, pyfile):
+        self.load_deferred("download_failed")
         for plugin in self.plugins:
             if plugin.is_activated():
                 if "download_failed" in plugin.__threaded__:
@@ -232,6 +312,7 @@ class AddonManager:
 
     @lock
     def package_finished(self, package):
+        self.load_deferred("package_finished")
         for plugin in self.plugins:
             if plugin.is_activated():
                 if "package_finished" in plugin.__threaded__:
@@ -243,6 +324,7 @@ class AddonManager:
 
     @lock
     def before_reconnecting(self, ip):
+        self.load_deferred("before_reconnecting")
         for plugin in self.plugins:
             plugin.before_reconnecting(ip)
 
@@ -250,6 +332,7 @@ class AddonManager:
 
     @lock
     def after_reconnecting(self, ip):
+        self.load_deferred("after_reconnecting")
         for plugin in self.plugins:
             if plugin.is_activated():
                 plugin.after_reconnecting(ip)
@@ -259,10 +342,12 @@ class AddonManager:
     def start_thread(self, function, *args, **kwargs):
         return AddonThread(self.pyload.thread_manager, function, args, kwargs)
 
-    def active_plugins(self):
+    def active_plugins(self, event=None):
         """
-        returns all active plugins.
+        returns all active plugins, deferred ones waiting for event are loaded.
         """
+        if event is not None:
+            self.load_deferred(event)
         return [x for x in self.plugins if x.is_activated()]
 
     def get_all_info(self):
@@ -305,6 +390,7 @@ class AddonManager:
         """
         dispatches event with args.
         """
+        self.load_deferred(event)
         if event in self.events:
             for f in self.events[event]:
                 try:
@@ -47,7 +47,7 @@ class CaptchaManager:
         # if cli:  #: Client connected -> should solve the captcha
         #     task.set_waiting(50)  #: Wait minimum 50 sec for response
 
-        for plugin in self.pyload.addon_manager.active_plugins():
+        for plugin in self.pyload.addon_manager.active_plugins("new_captcha_task"):
             try:
                 plugin.new_captcha_task(task)
             except Exception:
@@ -1,63 +1,91 @@
 # -*- coding: utf-8 -*-
 
 import time
+from collections import deque
+from itertools import islice
+from threading import Condition
 
 from ..utils.purge import uniquify
 
 
 class EventManager:
+    """
+    Keeps the recent events in a bounded ring buffer shared by all clients, every
+    client only remembers up to which event it has read.
+    """
+
+    #: events kept for clients to catch up, older ones need a full reload
+    MAX_EVENTS = 1000
+    #: seconds after which an inactive client is forgotten
+    CLIENT_TIMEOUT = 30
+
     def __init__(self, core):
         self.pyload = core
         self._ = core._
-        self.clients = []
+        self.clients = {}  #: uuid -> Client
+        self.events = deque(maxlen=self.MAX_EVENTS)  #: (sequence number, event)
+        self.seq = 0  #: sequence number of the last event
+        self.cond = Condition()
 
     def new_client(self, uuid):
-        self.clients.append(Client(uuid))
+        self.clients[uuid] = Client(uuid, self.seq)
 
     def clean(self):
-        for n, client in enumerate(self.clients):
-            if client.last_active + 30 < time.time():
-                del self.clients[n]
+        timeout = time.time() - self.CLIENT_TIMEOUT
+        for uuid, client in list(self.clients.items()):
+            if client.last_active < timeout:
+                del self.clients[uuid]
 
     def get_events(self, uuid):
-        events = []
-        valid_uuid = False
-        for client in self.clients:
-            if client.uuid == uuid:
-                client.last_active = time.time()
-                valid_uuid = True
-                while client.new_events():
-                    events.append(client.pop_event().to_list())
-                break
-        if not valid_uuid:
+        client = self.clients.get(uuid)
+        if client is None:
+            self.clean()
             self.new_client(uuid)
-            events = [
+            return [
                 ReloadAllEvent("queue").to_list(),
                 ReloadAllEvent("collector").to_list(),
             ]
-        return uniquify(events)  # return uniquify(events, repr)
+
+        client.last_active = time.time()
+        client.cursor, events = self.read(client.cursor)
+        return events
+
+    def read(self, cursor):
+        """
+        returns the sequence number of the last event and the events after cursor
+        as coalesced lists, a reload of everything if they are not kept anymore.
+        """
+        with self.cond:
+            seq = self.seq
+            if seq - cursor > len(self.events):
+                return seq, [
+                    ReloadAllEvent("queue").to_list(),
+                    ReloadAllEvent("collector").to_list(),
+                ]
+            events = list(islice(self.events, len(self.events) - (seq - cursor), None))
+
+        events = uniquify([tuple(event.to_list()) for _, event in events])
+        return seq, [list(event) for event in events]
+
+    def wait(self, cursor, timeout=None):
+        """
+        blocks until there are events after cursor, returns if there are.
+        """
+        with self.cond:
+            return self.cond.wait_for(lambda: self.seq != cursor, timeout)
 
     def add_event(self, event):
-        for client in self.clients:
-            client.add_event(event)
+        with self.cond:
+            self.seq += 1
+            self.events.append((self.seq, event))
+            self.cond.notify_all()
 
 
 class Client:
-    def __init__(self, uuid):
+    def __init__(self, uuid, cursor=0):
         self.uuid = uuid
         self.last_active = time.time()
-        self.events = []
-
-    def new_events(self):
-        return len(self.events) > 0
-
-    def pop_event(self):
-        if not len(self.events):
-            return None
-        return self.events.pop(0)
-
-    def add_event(self, event):
-        self.events.append(event)
+        self.cursor = cursor  #: sequence number of the last event read
 
 
 class UpdateEvent:
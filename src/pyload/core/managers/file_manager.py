@@ -1,10 +1,14 @@
 # -*- coding: utf-8 -*-
 
+import sys
+import weakref
+from itertools import islice
 from threading import RLock
 
 from ..datatypes.enums import Destination
+from ..datatypes.job_index import JobIndex
 from ..utils.old import lock
-from .event_manager import InsertEvent, ReloadAllEvent, RemoveEvent, UpdateEvent
+from .event_manager import InsertEvent, RemoveEvent, UpdateEvent
 
 
 def change(func):
@@ -12,7 +16,6 @@ def change(func):
         self.unchanged = False
         self.filecount = -1
         self.queuecount = -1
-        self.job_cache = {}
         return func(self, *args)
 
     return new
@@ -24,6 +27,17 @@ class FileManager:
     links or packages.
     """
 
+    #: plugins which are processed in collector
+    COLLECTOR_PLUGINS = ("DLC", "LinkList", "SerienjunkiesOrg", "CCF", "RSDF")
+
+    #: waiting, starting, decrypting, downloading, processing
+    ACTIVE_STATUS = (5, 7, 10, 12, 13)
+
+    #: links routed and written at once by add_links
+    BULK_BATCH = 1000
+    #: most links announced one by one, larger batches update their package
+    INSERT_EVENTS = 50
+
     def __init__(self, core):
         """
         Constructor.
@@ -50,11 +64,18 @@ class FileManager:
             self._("unknown"),
         ]
 
-        # TODO: purge the cache
-        self.cache = {}  #: holds instances for files
+        self.cache = {}  #: holds instances for files, see `trim_cache`
         self.package_cache = {}  #: same for packages
+        #: evicted instances still referenced elsewhere, handed out again on lookup
+        self.idle = weakref.WeakValueDictionary()
+        self.idle_packages = weakref.WeakValueDictionary()
+        self.cache_size = (
+            core.config.get("general", "file_cache"),
+            core.config.get("general", "package_cache"),
+        )
+        self.trim_at = self.cache_size  #: cache sizes triggering the next trim
 
-        self.job_cache = {}
+        self.job_index = JobIndex()  #: ready links, loaded on first job request
 
         self.lock = RLock()  # TODO: should be a Lock w/o R
         # self.lock._Verbose__verbose = True
@@ -94,12 +115,10 @@ class FileManager:
         data = self.pyload.db.get_all_links(queue)
         packs = self.pyload.db.get_all_packages(queue)
 
-        data.update((x.id, x.to_db_dict()[x.id]) for x in self.cache.values())
-
-        for x in self.package_cache.values():
-            if x.queue != queue or x.id not in packs:
-                continue
-            packs[x.id].update(x.to_dict()[x.id])
+        self._merge_cached(data, self.cache.values())
+        self._merge_cached(
+            packs, (x for x in self.package_cache.values() if x.queue == queue)
+        )
 
         for key, value in data.items():
             if value["package"] in packs:
@@ -114,28 +133,83 @@ class FileManager:
         """
         queue = queue.value
         packs = self.pyload.db.get_all_packages(queue)
-        for x in self.package_cache.values():
-            if x.queue != queue or x.id not in packs:
-                continue
-            packs[x.id].update(x.to_dict()[x.id])
+        self._merge_cached(
+            packs, (x for x in self.package_cache.values() if x.queue == queue)
+        )
 
         return packs
 
+    @staticmethod
+    def _merge_cached(data, instances):
+        """
+        updates the dicts of data with the cached instances, their order stays
+        the position the database reported instead of the gap spaced one.
+        """
+        for x in instances:
+            if x.id in data:
+                order = data[x.id]["order"]
+                data[x.id].update(x.to_dict()[x.id])
+                data[x.id]["order"] = order
+
+    def add_links(self, urls, package, progress=None):
+        """
+        adds links, urls may be any iterable.
+
+        The urls are routed and inserted in batches of `BULK_BATCH`, the lock is
+        only held while a batch is written, so huge imports don't block the
+        queue. progress is called with the number of links added so far after
+        every batch. returns the number of links added.
+        """
+        urls = iter(urls)
+        data = []
+        added = 0
+
+        while True:
+            batch = list(islice(urls, self.BULK_BATCH))
+            if not batch:
+                break
+
+            self.pyload.addon_manager.dispatch_event("links_added", batch, package)
+            links = self.pyload.plugin_manager.parse_urls(batch)
+
+            self._insert_links(links, package)
+            data.extend(links)
+            added += len(links)
+
+            if progress is not None:
+                progress(added)
+
+        if data:
+            self.pyload.thread_manager.create_info_thread(data, package)
+
+        return added
+
     @lock
     @change
-    def add_links(self, urls, package):
+    def _insert_links(self, links, package):
         """
-        adds links.
+        writes one batch of routed links and announces them.
         """
-        self.pyload.addon_manager.dispatch_event("links_added", urls, package)
+        rows = self.pyload.db.add_links(links, package)
 
-        data = self.pyload.plugin_manager.parse_urls(urls)
+        for id, plugin, order in rows:
+            self.job_index.update(id, plugin, package, order, 3)
 
-        self.pyload.db.add_links(data, package)
-        self.pyload.thread_manager.create_info_thread(data, package)
+        pack = self.get_package(package)
+        if pack is None:
+            return
+        dest = "collector" if pack.queue == Destination.COLLECTOR.value else "queue"
 
-        # TODO: change from reload_all event to package update event
-        self.pyload.event_manager.add_event(ReloadAllEvent("collector"))
+        #: the event buffer would overflow, clients rather reload the package
+        if len(rows) > self.INSERT_EVENTS:
+            self.pyload.event_manager.add_event(UpdateEvent("pack", package, dest))
+            return
+
+        if not rows:
+            return
+        first = self.pyload.db.get_link_rank(package, rows[0][2])
+        for rank, (id, plugin, order) in enumerate(rows, first):
+            self.pyload.event_manager.add_event(InsertEvent("file", id, rank, dest))
 
     # ----------------------------------------------------------------------
     @lock
@@ -146,10 +220,11 @@ class FileManager:
         """
         last_id = self.pyload.db.add_package(name, folder, queue.value)
         p = self.pyload.db.get_package(last_id)
+        self.job_index.set_package(last_id, p.queue, p.order)
         e = InsertEvent(
             "pack",
             last_id,
-            p.order,
+            self.pyload.db.get_package_rank(p.queue, p.order),
             "collector" if queue is Destination.COLLECTOR else "queue",
         )
         self.pyload.event_manager.add_event(e)
@@ -166,11 +241,9 @@ class FileManager:
         if not p:
             if id in self.package_cache:
                 del self.package_cache[id]
+            self.idle_packages.pop(id, None)
             return
 
-        oldorder = p.order
-        queue = p.queue
-
         e = RemoveEvent("pack", id, "collector" if not p.queue else "queue")
 
         pyfiles = list(self.cache.values())
@@ -178,19 +251,42 @@ class FileManager:
             if pyfile.packageid == id:
                 pyfile.abort_download()
                 pyfile.release()
+        self._forget_idle({id})
 
         self.pyload.db.delete_package(p)
+        self.job_index.remove_package(id)
+        self._refresh_job_packages()
         self.pyload.event_manager.add_event(e)
         self.pyload.addon_manager.dispatch_event("package_deleted", id)
 
         if id in self.package_cache:
             del self.package_cache[id]
 
-        packs = self.package_cache.values()
-        for pack in packs:
-            if pack.queue == queue and pack.order > oldorder:
-                pack.order -= 1
-                pack.notify_change()
+    @lock
+    @change
+    def delete_packages(self, ids):
+        """
+        deletes packages and their links in one pass.
+        """
+        packs = [p for p in map(self.get_package, ids) if p]
+        if not packs:
+            return
+
+        ids = {p.id for p in packs}
+        for pyfile in list(self.cache.values()):
+            if pyfile.packageid in ids:
+                pyfile.abort_download()
+                pyfile.release()
+        self._forget_idle(ids)
+
+        self.pyload.db.delete_packages(list(ids))
+
+        for p in packs:
+            self.job_index.remove_package(p.id)
+            self.package_cache.pop(p.id, None)
+            e = RemoveEvent("pack", p.id, "collector" if not p.queue else "queue")
+            self.pyload.event_manager.add_event(e)
+            self.pyload.addon_manager.dispatch_event("package_deleted", p.id)
 
     # ----------------------------------------------------------------------
     @lock
@@ -206,27 +302,99 @@ class FileManager:
         pid = f.packageid
         e = RemoveEvent("file", id, "collector" if not f.package().queue else "queue")
 
-        oldorder = f.order
-
         if id in self.pyload.thread_manager.processing_ids():
             self.cache[id].abort_download()
 
         if id in self.cache:
             del self.cache[id]
+        self.idle.pop(id, None)
 
         self.pyload.db.delete_link(f)
+        self.job_index.remove(id)
 
         self.pyload.event_manager.add_event(e)
 
+        if self.pyload.db.get_empty_packages([pid]):
+            self.delete_package(pid)
+
+    @lock
+    @change
+    def delete_links(self, ids):
+        """
+        deletes links in one pass, packages left empty are deleted too.
+        """
+        ids = [int(x) for x in ids]
+        processing = set(self.pyload.thread_manager.processing_ids())
+
+        for id in ids:
+            self.idle.pop(id, None)
+            pyfile = self.cache.get(id)
+            if pyfile is None:
+                continue
+            if id in processing:
+                pyfile.abort_download()
+            self.cache.pop(id, None)
+
+        pids = self.pyload.db.delete_links(ids)
+
+        for id in ids:
+            self.job_index.remove(id)
+
+        dest = {}
+        for pid in pids:
+            p = self.get_package(pid)
+            dest[pid] = "collector" if p and not p.queue else "queue"
+        for pid in pids:
+            self.pyload.event_manager.add_event(UpdateEvent("pack", pid, dest[pid]))
+
+        empty = self.pyload.db.get_empty_packages(pids) if pids else []
+        if empty:
+            self.delete_packages(empty)
+
+    @lock
+    @change
+    def move_links(self, ids, pid):
+        """
+        appends links to another package in one pass.
+        """
         p = self.get_package(pid)
-        if not len(p.get_children()):
-            p.delete()
+        if not p:
+            return
 
-        pyfiles = self.cache.values()
-        for pyfile in pyfiles:
-            if pyfile.packageid == pid and pyfile.order > oldorder:
-                pyfile.order -= 1
-                pyfile.notify_change()
+        ids = [int(x) for x in ids]
+        old = {}
+        for id in ids:
+            f = self.get_file(id)
+            if f:
+                old[id] = f.packageid
+        ids = [id for id in ids if id in old]
+        if not ids:
+            return
+
+        orders = self.pyload.db.move_links(ids, pid)
+
+        dest = "collector" if not p.queue else "queue"
+        for id in ids:
+            pyfile = self.cache.get(id)
+            if pyfile is not None:
+                pyfile.packageid = pid
+                pyfile.order = orders[id]
+                pyfile.synced = pyfile.db_state()
+
+        self._refresh_job_package(pid)
+        for opid in set(old.values()):
+            self._refresh_job_package(opid)
+            op = self.get_package(opid)
+            if op:
+                e = UpdateEvent("pack", opid, "collector" if not op.queue else "queue")
+                self.pyload.event_manager.add_event(e)
+
+        #: appended in the given order
+        first = self.pyload.db.get_link_rank(pid, orders[ids[0]])
+        for rank, id in enumerate(ids, first):
+            self.pyload.event_manager.add_event(InsertEvent("file", id, rank, dest))
+
+        self.pyload.db.commit()
 
     # ----------------------------------------------------------------------
     def release_link(self, id):
@@ -235,6 +403,7 @@ class FileManager:
         """
         if id in self.cache:
             del self.cache[id]
+        self.idle.pop(id, None)
 
     # ----------------------------------------------------------------------
     def release_package(self, id):
@@ -243,6 +412,7 @@ class FileManager:
         """
         if id in self.package_cache:
             del self.package_cache[id]
+        self.idle_packages.pop(id, None)
 
     # ----------------------------------------------------------------------
     def update_link(self, pyfile):
@@ -250,6 +420,9 @@ class FileManager:
         updates link.
         """
         self.pyload.db.update_link(pyfile)
+        self.job_index.update(
+            pyfile.id, pyfile.pluginname, pyfile.packageid, pyfile.order, pyfile.status
+        )
 
         e = UpdateEvent(
             "file", pyfile.id, "collector" if not pyfile.package().queue else "queue"
@@ -271,10 +444,14 @@ class FileManager:
         """
         return package instance.
         """
-        if id in self.package_cache:
-            return self.package_cache[id]
+        pack = self._lookup(self.package_cache, self.idle_packages, id)
+        if pack is not None:
+            return pack
         else:
-            return self.pyload.db.get_package(id)
+            pack = self.pyload.db.get_package(id)
+            if len(self.package_cache) > self.trim_at[1]:
+                self.trim_cache()
+            return pack
 
     # ----------------------------------------------------------------------
     def get_package_data(self, id):
@@ -286,17 +463,13 @@ class FileManager:
         if not pack:
             return None
 
+        order = pack.order
+        queue = pack.queue
         pack = pack.to_dict()[id]
+        pack["order"] = self.pyload.db.get_package_rank(queue, order)
 
         data = self.pyload.db.get_package_data(id)
-
-        tmplist = []
-
-        cache = self.cache.values()
-        for x in cache:
-            if int(x.to_db_dict()[x.id]["package"]) == int(id):
-                tmplist.append((x.id, x.to_db_dict()[x.id]))
-        data.update(tmplist)
+        self._merge_cached(data, self.cache.values())
 
         pack["links"] = data
 
@@ -308,7 +481,12 @@ class FileManager:
         returns dict with file information.
         """
         if id in self.cache:
-            return self.cache[id].to_db_dict()
+            pyfile = self.cache[id]
+            data = pyfile.to_db_dict()
+            data[id]["order"] = self.pyload.db.get_link_rank(
+                pyfile.packageid, pyfile.order
+            )
+            return data
 
         return self.pyload.db.get_link_data(id)
 
@@ -317,75 +495,167 @@ class FileManager:
         """
         returns pyfile instance.
         """
-        if id in self.cache:
-            return self.cache[id]
+        pyfile = self._lookup(self.cache, self.idle, id)
+        if pyfile is not None:
+            return pyfile
         else:
-            return self.pyload.db.get_file(id)
+            pyfile = self.pyload.db.get_file(id)
+            if len(self.cache) > self.trim_at[0]:
+                self.trim_cache()
+            return pyfile
+
+    # ----------------------------------------------------------------------
+    def _lookup(self, cache, idle, id):
+        """
+        returns the cached instance of id, an evicted one still in use is cached
+        again so everybody keeps sharing it.
+        """
+        obj = cache.get(id)
+        if obj is None:
+            obj = idle.pop(id, None)
+            if obj is not None:
+                cache[id] = obj
+        return obj
+
+    def _forget_idle(self, pids):
+        """
+        drops the evicted instances of files in the packages pids.
+        """
+        for pyfile in list(self.idle.values()):
+            if pyfile.packageid in pids:
+                self.idle.pop(pyfile.id, None)
+
+    def _evict(self, cache, idle, size, pinned):
+        """
+        moves the oldest clean and unpinned instances to idle, until cache is a
+        tenth below size. returns the size triggering the next trim.
+        """
+        target = size - size // 10
+        for id in list(cache):
+            if len(cache) <= target:
+                break
+
+            obj = cache.get(id)
+            if obj is None or pinned(obj) or obj.is_dirty():
+                continue
+
+            #: idle only holds it as long as somebody else does
+            idle[id] = obj
+            del cache[id]
+
+        #: everything left is in use, don't rescan on every lookup
+        return max(size, len(cache) + size // 10)
+
+    @lock
+    def trim_cache(self):
+        """
+        evicts clean instances once a cache exceeds its size, files with a
+        running plugin or an active status and finished packages stay pinned.
+        """
+        files, packages = self.cache_size
+
+        files = self._evict(
+            self.cache,
+            self.idle,
+            files,
+            lambda x: x.plugin or x.status in self.ACTIVE_STATUS,
+        )
+        packages = self._evict(
+            self.package_cache, self.idle_packages, packages, lambda x: x.set_finished
+        )
+
+        self.trim_at = (files, packages)
+
+    def get_cache_info(self):
+        """
+        returns size, pinned count and approximate memory use of the caches.
+        """
+
+        def measure(cache):
+            objs = list(cache.values())
+            size = sum(sys.getsizeof(x) for x in objs)
+            for obj in objs:
+                for name in obj.__slots__:
+                    value = getattr(obj, name, None)
+                    if isinstance(value, (str, bytes, int, float)):
+                        size += sys.getsizeof(value)
+            return len(objs), size
+
+        files, files_bytes = measure(self.cache)
+        packages, packages_bytes = measure(self.package_cache)
+        #: the lock of every file
+        files_bytes += files * sys.getsizeof(RLock())
+
+        return {
+            "files": files,
+            "files_limit": self.cache_size[0],
+            "files_bytes": files_bytes,
+            "packages": packages,
+            "packages_limit": self.cache_size[1],
+            "packages_bytes": packages_bytes,
+            "job_index": len(self.job_index),
+        }
 
     # ----------------------------------------------------------------------
+    def _load_job_index(self):
+        if not self.job_index.loaded:
+            self.job_index.load(
+                lambda: (
+                    self.pyload.db.get_ready_links(),
+                    self.pyload.db.get_package_orders(),
+                )
+            )
+
+    def _refresh_job_package(self, pid):
+        """
+        reloads ready links of a package into the job index.
+        """
+        if self.job_index.loaded:
+            self.job_index.set_package_links(pid, self.pyload.db.get_ready_links(pid))
+
+    def _refresh_job_packages(self):
+        """
+        reloads queue and order of all packages into the job index.
+        """
+        if self.job_index.loaded:
+            self.job_index.set_packages(self.pyload.db.get_package_orders())
+
     @lock
     def get_job(self, occ):
         """
         get suitable job.
         """
-        # TODO: clean mess
-        # TODO: improve selection of valid jobs
-
-        if occ in self.job_cache:
-            if self.job_cache[occ]:
-                id = self.job_cache[occ].pop()
-                if id == "empty":
-                    pyfile = None
-                    self.job_cache[occ].append("empty")
-                else:
-                    pyfile = self.get_file(id)
-            else:
-                jobs = self.pyload.db.get_job(occ)
-                jobs.reverse()
-                if not jobs:
-                    self.job_cache[occ].append("empty")
-                    pyfile = None
-                else:
-                    self.job_cache[occ].extend(jobs)
-                    pyfile = self.get_file(self.job_cache[occ].pop())
-
-        else:
-            self.job_cache = {}  #: better not caching to much
-            jobs = self.pyload.db.get_job(occ)
-            jobs.reverse()
-            self.job_cache[occ] = jobs
+        self._load_job_index()
 
-            if not jobs:
-                self.job_cache[occ].append("empty")
-                pyfile = None
-            else:
-                pyfile = self.get_file(self.job_cache[occ].pop())
+        id = self.job_index.get_job(occ, self.COLLECTOR_PLUGINS)
+        if id is None:
+            return None
 
-            # TODO: maybe the new job has to be approved...
+        return self.get_file(id)
 
-        # pyfile = self.get_file(self.job_cache[occ].pop())
-        return pyfile
+    def put_back_job(self, pyfile):
+        """
+        returns a job that could not be started, it will be handed out again first.
+        """
+        self.job_index.defer(pyfile.id, pyfile.pluginname)
 
     @lock
     def get_decrypt_job(self):
         """
         return job for decrypting.
         """
-        if "decrypt" in self.job_cache:
-            return None
+        self._load_job_index()
 
-        plugins = list(self.pyload.plugin_manager.crypter_plugins.keys()) + list(
-            self.pyload.plugin_manager.container_plugins.keys()
+        plugins = set(self.pyload.plugin_manager.crypter_plugins) | set(
+            self.pyload.plugin_manager.container_plugins
         )
-        plugins = str(tuple(plugins))
 
-        jobs = self.pyload.db.get_plugin_job(plugins)
-        if jobs:
-            return self.get_file(jobs[0])
-        else:
-            self.job_cache["decrypt"] = "empty"
+        id = self.job_index.get_plugin_job(plugins)
+        if id is None:
             return None
 
+        return self.get_file(id)
+
     def get_file_count(self):
         """
         returns number of files.
@@ -439,15 +709,20 @@ class FileManager:
         """
         restart package.
         """
-        pyfiles = list(self.cache.values())
+        pyfiles = list(self.cache.values()) + list(self.idle.values())
         for pyfile in pyfiles:
             if pyfile.packageid == id:
                 self.restart_file(pyfile.id)
 
         self.pyload.db.restart_package(id)
+        self._refresh_job_package(id)
+        self.pyload.thread_manager.info_cache.discard(
+            x["url"] for x in self.pyload.db.get_package_data(id).values()
+        )
 
-        if id in self.package_cache:
-            self.package_cache[id].set_finished = False
+        pack = self._lookup(self.package_cache, self.idle_packages, id)
+        if pack is not None:
+            pack.set_finished = False
 
         e = UpdateEvent(
             "pack", id, "collector" if not self.get_package(id).queue else "queue"
@@ -460,18 +735,23 @@ class FileManager:
         """
         restart file.
         """
-        if id in self.cache:
-            self.cache[id].status = 3
-            self.cache[id].name = self.cache[id].url
-            self.cache[id].error = ""
-            self.cache[id].abort_download()
+        pyfile = self._lookup(self.cache, self.idle, id)
+        if pyfile is not None:
+            pyfile.status = 3
+            pyfile.name = pyfile.url
+            pyfile.error = ""
+            pyfile.abort_download()
 
         self.pyload.db.restart_file(id)
 
+        f = self.get_file(id)
+        self.job_index.update(f.id, f.pluginname, f.packageid, f.order, f.status)
+        self.pyload.thread_manager.info_cache.discard([f.url])
+
         e = UpdateEvent(
             "file",
             id,
-            "collector" if not self.get_file(id).package().queue else "queue",
+            "collector" if not f.package().queue else "queue",
         )
         self.pyload.event_manager.add_event(e)
 
@@ -483,33 +763,44 @@ class FileManager:
         """
         queue = queue.value
         p = self.pyload.db.get_package(id)
-        oldorder = p.order
 
         e = RemoveEvent("pack", id, "collector" if not p.queue else "queue")
         self.pyload.event_manager.add_event(e)
 
-        self.pyload.db.clear_package_order(p)
-
-        p = self.pyload.db.get_package(id)
-
         p.queue = queue
         self.pyload.db.update_package(p)
-
-        self.pyload.db.reorder_package(p, -1, True)
-
-        packs = self.package_cache.values()
-        for pack in packs:
-            if pack.queue != queue and pack.order > oldorder:
-                pack.order -= 1
-                pack.notify_change()
+        p.order, compacted = self.pyload.db.reorder_package(p, -1)
+        p.synced = p.db_state()
+        self._refresh_job_packages()
 
         self.pyload.db.commit()
-        self.release_package(id)
-        p = self.get_package(id)
 
-        e = InsertEvent("pack", id, p.order, "collector" if not p.queue else "queue")
+        rank = self.pyload.db.get_package_rank(p.queue, p.order)
+        e = InsertEvent("pack", id, rank, "collector" if not p.queue else "queue")
         self.pyload.event_manager.add_event(e)
 
+    def _refresh_package_orders(self):
+        """
+        reloads the orders of the cached packages after a queue was compacted.
+        """
+        orders = {id: order for id, queue, order in self.pyload.db.get_package_orders()}
+        for pack in list(self.package_cache.values()):
+            if pack.id in orders:
+                pack.order = orders[pack.id]
+                pack.synced = pack.db_state()
+                pack.notify_change()
+
+    def _refresh_link_orders(self, pid):
+        """
+        reloads the orders of the cached links of a compacted package.
+        """
+        orders = self.pyload.db.get_link_orders(pid)
+        for pyfile in list(self.cache.values()):
+            if pyfile.packageid == pid and pyfile.id in orders:
+                pyfile.order = orders[pyfile.id]
+                pyfile.synced = pyfile.db_state()
+                pyfile.notify_change()
+
     @lock
     @change
     def reorder_package(self, id, position):
@@ -517,25 +808,19 @@ class FileManager:
 
         e = RemoveEvent("pack", id, "collector" if not p.queue else "queue")
         self.pyload.event_manager.add_event(e)
-        self.pyload.db.reorder_package(p, position)
 
-        packs = self.package_cache.values()
-        for pack in packs:
-            if pack.queue != p.queue or pack.order < 0 or pack == p:
-                continue
-            if p.order > position:
-                if pack.order >= position and pack.order < p.order:
-                    pack.order += 1
-                    pack.notify_change()
-            elif p.order < position:
-                if pack.order <= position and pack.order > p.order:
-                    pack.order -= 1
-                    pack.notify_change()
-
-        p.order = position
+        #: only the moved package gets a new order, unless the queue was compacted
+        p.order, compacted = self.pyload.db.reorder_package(p, position)
+        p.synced = p.db_state()
+        if compacted:
+            self._refresh_package_orders()
+
+        self._refresh_job_packages()
         self.pyload.db.commit()
 
-        e = InsertEvent("pack", id, position, "collector" if not p.queue else "queue")
+        #: the position the package ended up at, -1 or past the end appends
+        rank = self.pyload.db.get_package_rank(p.queue, p.order)
+        e = InsertEvent("pack", id, rank, "collector" if not p.queue else "queue")
         self.pyload.event_manager.add_event(e)
 
     @lock
@@ -551,30 +836,21 @@ class FileManager:
         )
         self.pyload.event_manager.add_event(e)
 
-        self.pyload.db.reorder_link(f, position)
+        order, compacted = self.pyload.db.reorder_link(f, position)
 
-        pyfiles = self.cache.values()
-        for pyfile in pyfiles:
-            if pyfile.packageid != f["package"] or pyfile.order < 0:
-                continue
-            if f["order"] > position:
-                if pyfile.order >= position and pyfile.order < f["order"]:
-                    pyfile.order += 1
-                    pyfile.notify_change()
-            elif f["order"] < position:
-                if pyfile.order <= position and pyfile.order > f["order"]:
-                    pyfile.order -= 1
-                    pyfile.notify_change()
-
-        if id in self.cache:
-            self.cache[id].order = position
+        if compacted:
+            self._refresh_link_orders(f["package"])
+        elif id in self.cache:
+            self.cache[id].order = order
+            self.cache[id].synced = self.cache[id].db_state()
 
+        self._refresh_job_package(f["package"])
         self.pyload.db.commit()
 
         e = InsertEvent(
             "file",
             id,
-            position,
+            self.pyload.db.get_link_rank(f["package"], order),
             "collector" if not self.get_package(f["package"]).queue else "queue",
         )
         self.pyload.event_manager.add_event(e)
@@ -584,7 +860,11 @@ class FileManager:
         """
         updates file info (name, size, status, url)
         """
-        self.pyload.db.update_link_info(data)
+        ids = self.pyload.db.update_link_info(data)
+        if ids and self.job_index.loaded:
+            for state in self.pyload.db.get_link_states(ids):
+                self.job_index.update(*state)
+
         e = UpdateEvent(
             "pack", pid, "collector" if not self.get_package(pid).queue else "queue"
         )
@@ -615,6 +895,8 @@ class FileManager:
             if pyfile["status"] not in (0, 12, 13):
                 urls.append((pyfile["url"], pyfile["plugin"]))
 
+        #: a recheck asks the hoster again
+        self.pyload.thread_manager.info_cache.discard(url for url, plugin in urls)
         self.pyload.thread_manager.create_info_thread(urls, pid)
 
     @lock
@@ -647,3 +929,4 @@ class FileManager:
         restart all failed links.
         """
         self.pyload.db.restart_failed()
+        self.job_index.invalidate()
@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
 
+import ast
 import importlib
+import json
 import os
 import re
 import sys
+import time
 from ast import literal_eval
 from itertools import chain
 
@@ -11,6 +14,78 @@ from itertools import chain
 
 from pyload import APPID, PKGDIR
 
+from ..datatypes.url_router import URLRouter
+
+
+#: addon methods called on events -> name of the event
+ADDON_HOOKS = {
+    "after_reconnect": "after_reconnecting",
+    "after_reconnecting": "after_reconnecting",
+    "all_downloads_finished": "all_downloads_finished",
+    "all_downloads_processed": "all_downloads_processed",
+    "before_reconnect": "before_reconnecting",
+    "before_reconnecting": "before_reconnecting",
+    "captcha_task": "new_captcha_task",
+    "config_changed": "config_changed",
+    "download_failed": "download_failed",
+    "download_finished": "download_finished",
+    "download_preparing": "download_preparing",
+    "download_processed": "download_processed",
+    "download_start": "download_start",
+    "links_added": "links_added",
+    "new_captcha_task": "new_captcha_task",
+    "package_deleted": "package_deleted",
+    "package_failed": "package_failed",
+    "package_finished": "package_finished",
+    "package_processed": "package_processed",
+}
+
+#: addons doing something on their own must be loaded at start
+ADDON_EAGER = ("__init__", "activate", "core_ready", "periodical_task")
+
+
+def addon_events(content, name):
+    """
+    returns the events the addon class name in content reacts on, None if it
+    has to be loaded at start.
+    """
+    try:
+        tree = ast.parse(content)
+    except SyntaxError:
+        return None
+
+    cls = next(
+        (x for x in tree.body if isinstance(x, ast.ClassDef) and x.name == name), None
+    )
+    #: methods of other base classes are unknown
+    if cls is None or [getattr(x, "id", None) for x in cls.bases] != ["BaseAddon"]:
+        return None
+
+    events = set()
+    for node in cls.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            if node.name in ADDON_EAGER:
+                return None
+            if node.name in ADDON_HOOKS:
+                events.add(ADDON_HOOKS[node.name])
+
+    for node in ast.walk(cls):
+        #: listeners or jobs registered at runtime
+        if isinstance(node, ast.Attribute) and node.attr in ("add_event", "periodical"):
+            return None
+
+        if isinstance(node, ast.Assign) and any(
+            isinstance(x, ast.Attribute) and x.attr == "event_map" for x in node.targets
+        ):
+            if not isinstance(node.value, ast.Dict):
+                return None
+            for key in node.value.keys:
+                if not isinstance(key, ast.Constant) or not isinstance(key.value, str):
+                    return None
+                events.add(key.value)
+
+    return sorted(events) or None
+
 
 class PluginManager:
     ROOT = "pyload.plugins."
@@ -32,11 +107,27 @@ class PluginManager:
     _CONFIG = re.compile(r"\s*__config__\s*=\s*(\[[^\]]+\])", re.MULTILINE)
     _DESC = re.compile(r'\s*__description__\s*=\s*(?:"|"""|\')([^"\']+)', re.MULTILINE)
 
+    #: format of the metadata index file, bump when the stored fields change
+    INDEX_VERSION = 2
+    INDEX_FILENAME = "plugins.idx"
+    #: files modified more recently (in seconds) are not cached, the same mtime
+    #: could still be given to another version of them
+    INDEX_MIN_AGE = 2
+
     def __init__(self, core):
         self.pyload = core
         self._ = core._
 
         self.plugins = {}
+        self.router = None  #: finds the plugin handling an url
+
+        self.index_file = os.path.join(core.tempdir, self.INDEX_FILENAME)
+        self.index = {}  #: path -> {"stamp": [mtime, size], "meta": {...}}
+        self.literals = {}  #: pattern -> literals the url router indexes it by
+        self.index_stats = {"cached": 0, "parsed": 0}
+        self.index_changed = False
+        self.load_index()
+
         self.create_index()
 
         # register for import addon
@@ -62,6 +153,9 @@ class PluginManager:
                     dst[name] = src[name]
 
         self.pyload.log.debug("Indexing plugins...")
+        start = time.perf_counter()
+        self.index_stats = {"cached": 0, "parsed": 0}
+        seen = set()
 
         sys.path.append(os.path.join(self.pyload.userdir, "plugins"))
 
@@ -74,38 +168,57 @@ class PluginManager:
         except Exception:
             pass
 
-        self.crypter_plugins, config = self.parse("decrypters", pattern=True)
+        self.crypter_plugins, config = self.parse("decrypters", pattern=True, seen=seen)
         self.plugins["decrypter"] = self.crypter_plugins
         default_config = config
 
-        self.container_plugins, config = self.parse("containers", pattern=True)
+        self.container_plugins, config = self.parse("containers", pattern=True, seen=seen)
         self.plugins["container"] = self.container_plugins
         merge(default_config, config)
 
-        self.hoster_plugins, config = self.parse("downloaders", pattern=True)
+        self.hoster_plugins, config = self.parse("downloaders", pattern=True, seen=seen)
         self.plugins["downloader"] = self.hoster_plugins
         merge(default_config, config)
 
-        self.addon_plugins, config = self.parse("addons")
+        self.addon_plugins, config = self.parse("addons", seen=seen)
         self.plugins["addon"] = self.addon_plugins
         merge(default_config, config)
 
-        self.captcha_plugins, config = self.parse("anticaptchas")
+        self.captcha_plugins, config = self.parse("anticaptchas", seen=seen)
         self.plugins["anticaptcha"] = self.captcha_plugins
         merge(default_config, config)
 
-        self.extract_plugins, config = self.parse("extractors")
+        self.extract_plugins, config = self.parse("extractors", seen=seen)
         self.plugins["extractor"] = self.extract_plugins
         merge(default_config, config)
 
-        self.account_plugins, config = self.parse("accounts")
+        self.account_plugins, config = self.parse("accounts", seen=seen)
         self.plugins["account"] = self.account_plugins
         merge(default_config, config)
 
-        self.internal_plugins, config = self.parse("base")
+        self.internal_plugins, config = self.parse("base", seen=seen)
         self.plugins["base"] = self.internal_plugins
         merge(default_config, config)
 
+        known = set(self.literals)
+        self.router = URLRouter(self.pattern_plugins(), self.literals)
+        for pattern in known - {regex.pattern for _, _, regex in self.router.entries}:
+            del self.literals[pattern]
+        if set(self.literals) != known:
+            self.index_changed = True
+
+        #: files gone since the last start
+        for path in set(self.index) - seen:
+            del self.index[path]
+            self.index_changed = True
+        self.save_index()
+
+        self.pyload.log.debug(
+            "Indexed {} plugin files in {:.0f} ms ({parsed} parsed, {cached} cached)".format(
+                len(seen), (time.perf_counter() - start) * 1000, **self.index_stats
+            )
+        )
+
         for name, config in default_config.items():
             desc = config.pop("desc", "")
             config = [[k] + list(v) for k, v in config.items()]
@@ -119,7 +232,7 @@ class PluginManager:
                     stack_info=self.pyload.debug > 2,
                 )
 
-    def parse(self, folder, pattern=False, home={}):
+    def parse(self, folder, pattern=False, home={}, seen=None):
         """
         returns dict with information
         home contains parsed plugins from pyload.
@@ -143,12 +256,14 @@ class PluginManager:
 
         configs = {}
         for entry in os.listdir(pfolder):
+            path = os.path.join(pfolder, entry)
             if (
-                os.path.isfile(os.path.join(pfolder, entry)) and entry.endswith(".py")
+                os.path.isfile(path) and entry.endswith(".py")
             ) and not entry.startswith("_"):
 
-                with open(os.path.join(pfolder, entry)) as data:
-                    content = data.read()
+                meta = self.read_meta(path)
+                if seen is not None:
+                    seen.add(path)
 
                 name = entry[:-3]
                 if name[-1] == ".":
@@ -180,12 +295,11 @@ class PluginManager:
                 #         )
                 #         continue
 
-                m_ver = self._VERSION.search(content)
-                if m_ver is None:
+                if meta["version"] is None:
                     self.pyload.log.debug(f"__version__ not found in plugin {name}")
                     version = 0
                 else:
-                    version = float(m_ver.group(1))
+                    version = meta["version"]
 
                 # home contains plugins from pyload root
                 if isinstance(home, dict) and name in home:
@@ -202,9 +316,12 @@ class PluginManager:
                 plugins[name]["name"] = module
                 plugins[name]["folder"] = folder
 
+                if folder == "addons":
+                    #: the addon can be loaded when one of them is dispatched
+                    plugins[name]["events"] = meta["events"]
+
                 if pattern:
-                    m_pat = self._PATTERN.search(content)
-                    pattern = r"^unmachtable$" if m_pat is None else m_pat.group(1)
+                    pattern = meta["pattern"] or r"^unmachtable$"
 
                     plugins[name]["pattern"] = pattern
 
@@ -220,29 +337,21 @@ class PluginManager:
                     self.pyload.config.delete_config(name)
                     continue
 
-                m_desc = self._DESC.search(content)
-                desc = "" if m_desc is None else m_desc.group(1)
+                desc = meta["desc"]
 
-                config = self._CONFIG.findall(content)
-                if not config:
+                config = meta["config"]
+                if config is None:
                     new_config = {"enabled": ["bool", "Activated", False], "desc": desc}
                     configs[name] = new_config
                     continue
 
-                config = literal_eval(
-                    config[0].strip().replace("\n", "").replace("\r", "")
-                )
-
-                if isinstance(config, list) and all(
-                    isinstance(c, tuple) for c in config
-                ):
-                    config = {x[0]: x[1:] for x in config}
-                else:
+                if "invalid" in meta:
                     self.pyload.log.error(
-                        self._("Invalid config in {}: {}").format(name, config)
+                        self._("Invalid config in {}: {}").format(name, meta["invalid"])
                     )
                     continue
 
+                config = dict(config)
                 if folder == "addons" and "enabled" not in config:
                     config["enabled"] = ["bool", "Activated", False]
 
@@ -250,17 +359,134 @@ class PluginManager:
                 configs[name] = config
 
         if not home and folder != "base":
-            temp_plugins, temp_configs = self.parse(folder, pattern, plugins or True)
+            temp_plugins, temp_configs = self.parse(
+                folder, pattern, plugins or True, seen
+            )
             plugins.update(temp_plugins)
             configs.update(temp_configs)
 
         return plugins, configs
 
+    def read_meta(self, path):
+        """
+        returns version, pattern, description and config of a plugin file, taken
+        from the index if the file didn't change.
+        """
+        stat = os.stat(path)
+        stamp = [stat.st_mtime_ns, stat.st_size]
+
+        cached = self.index.get(path)
+        if cached is not None and cached["stamp"] == stamp:
+            self.index_stats["cached"] += 1
+            return cached["meta"]
+
+        with open(path) as data:
+            content = data.read()
+
+        m_ver = self._VERSION.search(content)
+        m_pat = self._PATTERN.search(content)
+        m_desc = self._DESC.search(content)
+
+        meta = {
+            "version": None if m_ver is None else float(m_ver.group(1)),
+            "pattern": None if m_pat is None else m_pat.group(1),
+            "desc": "" if m_desc is None else m_desc.group(1),
+            "config": None,
+            "events": None,
+        }
+
+        folder, entry = os.path.split(path)
+        if os.path.basename(folder) == "addons":
+            meta["events"] = addon_events(content, entry[:-3])
+
+        config = self._CONFIG.findall(content)
+        if config:
+            config = literal_eval(config[0].strip().replace("\n", "").replace("\r", ""))
+
+            if isinstance(config, list) and all(isinstance(c, tuple) for c in config):
+                meta["config"] = {x[0]: list(x[1:]) for x in config}
+            else:
+                meta["config"] = {}
+                meta["invalid"] = str(config)
+
+        self.index_stats["parsed"] += 1
+        if time.time() - stat.st_mtime >= self.INDEX_MIN_AGE:
+            self.index[path] = {"stamp": stamp, "meta": meta}
+            self.index_changed = True
+
+        return meta
+
+    def load_index(self):
+        """
+        loads the plugin metadata stored by the last run.
+        """
+        try:
+            with open(self.index_file, encoding="utf-8") as fp:
+                data = json.load(fp)
+        except FileNotFoundError:
+            return
+        except Exception as exc:
+            self.pyload.log.debug(f"Plugin index not readable: {exc}")
+            return
+
+        if not isinstance(data, dict) or data.get("version") != self.INDEX_VERSION:
+            self.pyload.log.debug("Plugin index outdated, plugins will be parsed again")
+            return
+
+        self.index = data.get("plugins", {})
+        self.literals = data.get("literals", {})
+
+    def save_index(self):
+        """
+        stores the plugin metadata, only written if a plugin changed.
+        """
+        if not self.index_changed:
+            return
+
+        tmp_file = f"{self.index_file}.tmp"
+        try:
+            with open(tmp_file, mode="w", encoding="utf-8") as fp:
+                json.dump(
+                    {
+                        "version": self.INDEX_VERSION,
+                        "plugins": self.index,
+                        "literals": self.literals,
+                    },
+                    fp,
+                )
+            os.replace(tmp_file, self.index_file)
+        except OSError as exc:
+            self.pyload.log.warning(
+                self._("Unable to save plugin index: {}").format(exc)
+            )
+        else:
+            self.index_changed = False
+
+    def pattern_plugins(self):
+        """
+        returns (name, plugin dict) of all plugins handling urls, in the order
+        they are tried.
+        """
+        return chain(
+            self.crypter_plugins.items(),
+            self.hoster_plugins.items(),
+            self.container_plugins.items(),
+        )
+
+    def get_router(self):
+        """
+        returns the url router, it is rebuilt when addons changed patterns.
+        """
+        if self.router is None or self.router.is_stale(self.pattern_plugins()):
+            self.pyload.log.debug("Plugin patterns changed, rebuilding url router")
+            self.router = URLRouter(self.pattern_plugins(), self.literals)
+        return self.router
+
     def parse_urls(self, urls):
         """
         parse plugins for given list of urls.
         """
-        last = (None, {})
+        router = self.get_router()
         res = []  #: tupels of (url, plugin)
 
         for url in urls:
@@ -270,26 +496,9 @@ class PluginManager:
                 memoryview,
             ):  #: check memoryview (as py2 byffer)
                 continue
-            found = False
-
-            # NOTE: E1136: Value 'last' is unsubscriptable (unsubscriptable-object)
-            if last != (None, {}) and last[1]["re"].match(url):
-                res.append((url, last[0]))
-                continue
-
-            for name, value in chain(
-                self.crypter_plugins.items(),
-                self.hoster_plugins.items(),
-                self.container_plugins.items(),
-            ):
-                if value["re"].match(url):
-                    res.append((url, name))
-                    last = (name, value)
-                    found = True
-                    break
 
-            if not found:
-                res.append((url, "DefaultPlugin"))
+            found = router.match(url)
+            res.append((url, found[0] if found else "DefaultPlugin"))
 
         return res
 
@@ -461,6 +670,9 @@ class PluginManager:
         self.plugins["account"] = self.account_plugins
         merge(default_config, config)
 
+        self.router = URLRouter(self.pattern_plugins(), self.literals)
+        self.save_index()
+
         for name, config in default_config.items():
             desc = config.pop("desc", "")
             config = [[k] + list(v) for k, v in config.items()]
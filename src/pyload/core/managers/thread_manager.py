@@ -10,10 +10,12 @@ from threading import Event, Lock
 
 # import pycurl
 
+from ..datatypes.info_cache import InfoCache
 from ..datatypes.pyfile import PyFile
 from ..network.request_factory import get_url
 from ..threads.decrypter_thread import DecrypterThread
 from ..threads.download_thread import DownloadThread
+from ..threads.info_pool import InfoPool
 from ..threads.info_thread import InfoThread
 from ..utils import fs
 from ..utils.old import lock
@@ -43,14 +45,19 @@ class ThreadManager:
         self.lock = Lock()
 
         # some operations require to fetch url info from hoster, so we caching them so it wont be done twice
-        # contains a timestamp and will be purged after timeout
-        self.info_cache = {}
+        self.info_cache = InfoCache(
+            self.pyload.config.get("download", "info_cache_size"),
+            self.pyload.config.get("download", "info_cache_ttl"),
+        )
+        self.load_info_cache()
 
         # pool of ids for online check
         self.result_ids = 0
 
         # threads which are fetching hoster results
         self.info_results = {}
+        # workers shared by all online checks
+        self.info_pool = InfoPool(self)
         # timeout for cache purge
         self.timestamp = 0
 
@@ -59,6 +66,33 @@ class ThreadManager:
         for i in range(self.pyload.config.get("download", "max_downloads")):
             self.create_thread()
 
+    def load_info_cache(self):
+        """
+        restores the online checks stored by `save_info_cache`.
+        """
+        if not self.pyload.config.get("download", "info_cache_persist"):
+            return
+
+        data = self.pyload.db.get_storage(InfoCache.STORAGE, "entries")
+        if not data:
+            return
+
+        try:
+            count = self.info_cache.load(data)
+        except (ValueError, TypeError) as exc:
+            self.pyload.log.debug(f"Invalid stored online checks | {exc}")
+        else:
+            self.pyload.log.debug(f"Restored {count} cached online checks")
+
+    def save_info_cache(self):
+        """
+        stores the valid online checks, if enabled.
+        """
+        if self.pyload.config.get("download", "info_cache_persist"):
+            self.pyload.db.set_storage(
+                InfoCache.STORAGE, "entries", self.info_cache.dump()
+            )
+
     def create_thread(self):
         """
         create a download thread.
@@ -68,12 +102,22 @@ class ThreadManager:
 
     def create_info_thread(self, data, pid):
         """
-        start a thread whichs fetches online status and other infos
-        data = [ .. () .. ]
+        fetches online status and other infos in the info pool, results are
+        written to the package as they arrive and saved once a plugin is done
+        data = [ .. (url, pluginname) .. ]
         """
         self.timestamp = time.time() + timedelta(minutes=5).seconds
 
-        InfoThread(self, data, pid)
+        containers = self.pyload.plugin_manager.container_plugins
+
+        def update_db(plugin, result):
+            self.pyload.files.update_file_info(result, pid)
+
+        self.info_pool.check(
+            [(url, name) for url, name in data if name not in containers],
+            update_db,
+            done=self.pyload.files.save,
+        )
 
     @lock
     def create_result_thread(self, data, add=False):
@@ -153,9 +197,12 @@ class ThreadManager:
             # it may be failed non critical so we try it again
 
         if (self.info_cache or self.info_results) and self.timestamp < time.time():
-            self.info_cache.clear()
+            self.timestamp = time.time() + timedelta(minutes=5).seconds
             self.info_results.clear()
-            self.pyload.log.debug("Cleared Result cache")
+            expired = self.info_cache.purge()
+            self.pyload.log.debug(
+                f"Cleared Result cache, {expired} expired online checks dropped"
+            )
 
     # ----------------------------------------------------------------------
     def try_reconnect(self):
@@ -340,9 +387,7 @@ class ThreadManager:
                     thread.put(job)
                 else:
                     # put job back
-                    if occ not in self.pyload.files.job_cache:
-                        self.pyload.files.job_cache[occ] = []
-                    self.pyload.files.job_cache[occ].append(job.id)
+                    self.pyload.files.put_back_job(job)
 
                     # check for decrypt jobs
                     job = self.pyload.files.get_decrypt_job()
@@ -95,6 +95,8 @@ class Browser:
             resume=False,
             status_notify=None,
             disposition=False,
+            hasher=None,
+            transform=None,
     ):
         """
         this can also download ftp.
@@ -112,6 +114,8 @@ class Browser:
             options=self.options,
             status_notify=status_notify,
             disposition=disposition,
+            hasher=hasher,
+            transform=transform,
         )
         name = self.dl.download(chunks, resume)
         self._size = self.dl.size
@@ -45,5 +45,107 @@ class Bucket:
             return 0  # NOTE: May become unresponsive otherwise
         self._calc_token()
         self.token -= amount
-        consumed = -self.token // self._rate if self.token < 0 else 0
+        consumed = -self.token / self._rate if self.token < 0 else 0
         return consumed
+
+
+class BucketChain:
+    """
+    The limited buckets a transfer is charged to, from its own up to the global
+    one, it waits for the most exhausted. Consumption is accounted in batches
+    and the buckets are looked up again whenever a limit changed.
+    """
+
+    BATCH = 16 << 10  #: bytes accounted at once
+
+    def __init__(self, tree, keys):
+        self.tree = tree
+        self.keys = keys
+        self.version = None
+        self.buckets = ()
+        self.pending = 0
+
+    def _resolve(self):
+        if self.version != self.tree.version:
+            self.version, self.buckets = self.tree.resolve(self.keys)
+
+    def __bool__(self):
+        self._resolve()
+        return bool(self.buckets)
+
+    def consumed(self, amount):
+        """
+        Return time the process have to sleep, after consumed specified amount.
+        """
+        self._resolve()
+        self.pending += amount
+        if self.pending < self.BATCH or not self.buckets:
+            return 0
+
+        amount, self.pending = self.pending, 0
+        return max(bucket.consumed(amount) for bucket in self.buckets)
+
+
+class BucketTree:
+    """
+    Speed limits of the hierarchy global -> plugin -> account -> package -> file.
+
+    A transfer is charged to every limited level above it, so bandwidth one
+    level leaves unused is shared by the others.
+    """
+
+    LEVELS = ("file", "package", "account", "plugin")
+
+    def __init__(self):
+        self.lock = Lock()
+        self.version = 0
+        self.root = Bucket()
+        self.buckets = {}  #: (level, key) -> Bucket, only limited ones
+
+    @lock
+    def set_rate(self, rate, level=None, key=None):
+        """
+        sets the limit of a level in bytes per second, the global one if level is
+        None, rates below Bucket.MIN_RATE remove it.
+        """
+        if level is None:
+            self.root.set_rate(rate)
+        elif level not in self.LEVELS:
+            raise ValueError(f"Unknown bucket level: {level}")
+        elif rate < Bucket.MIN_RATE:
+            self.buckets.pop((level, key), None)
+        elif (level, key) in self.buckets:
+            self.buckets[(level, key)].set_rate(rate)
+        else:
+            bucket = self.buckets[(level, key)] = Bucket()
+            bucket.set_rate(rate)
+
+        self.version += 1
+
+    @lock
+    def get_rates(self):
+        """
+        returns {(level, key): rate} of all limits, the global one as (None, None).
+        """
+        rates = {(level, key): bucket.rate for (level, key), bucket in self.buckets.items()}
+        rates[(None, None)] = self.root.rate
+        return rates
+
+    def chain(self, plugin=None, account=None, package=None, file=None):
+        keys = (
+            ("file", file),
+            ("package", package),
+            ("account", (plugin, account)),
+            ("plugin", plugin),
+        )
+        return BucketChain(self, keys)
+
+    @lock
+    def resolve(self, keys):
+        """
+        returns the current version and the limited buckets of keys.
+        """
+        buckets = [self.buckets[key] for key in keys if key in self.buckets]
+        if self.root:
+            buckets.append(self.root)
+        return self.version, tuple(buckets)
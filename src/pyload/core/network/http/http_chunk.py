@@ -3,7 +3,6 @@
 import codecs
 import os
 import re
-import time
 import urllib.parse
 from cgi import parse_header as parse_header_line
 from email.header import decode_header as parse_mime_header
@@ -21,24 +20,30 @@ class WrongFormat(Exception):
 
 
 class ChunkInfo:
+    """
+    layout of a chunked download, all chunks are written at their final offset
+    into a single part file.
+    """
+
     def __init__(self, name):
         self.name = os.fsdecode(name)
+        self.part_name = f"{self.name}.chunk0"  #: file the data is loaded into
         self.size = 0
         self.resume = False
-        self.chunks = []
+        self.chunks = []  #: [(start, end), arrived]
 
     def __repr__(self):
         ret = f"ChunkInfo: {self.name}, {self.size}\n"
         for i, c in enumerate(self.chunks):
-            ret += f"{i}# {c[1]}\n"
+            ret += f"{i}# {c[0]}, {c[1]}\n"
 
         return ret
 
     def set_size(self, size):
         self.size = int(size)
 
-    def add_chunk(self, name, range):
-        self.chunks.append((name, range))
+    def add_chunk(self, range, arrived=0):
+        self.chunks.append([range, arrived])
 
     def clear(self):
         self.chunks = []
@@ -50,7 +55,7 @@ class ChunkInfo:
         current = 0
         for i in range(chunks):
             end = self.size - 1 if (i == chunks - 1) else current + chunk_size
-            self.add_chunk(f"{self.name}.chunk{i}", (current, end))
+            self.add_chunk((current, end))
             current += chunk_size + 1
 
     def save(self):
@@ -60,8 +65,8 @@ class ChunkInfo:
             fh.write(f"size:{self.size}\n")
             for i, c in enumerate(self.chunks):
                 fh.write(f"#{i}:\n")
-                fh.write(f"\tname:{c[0]}\n")
-                fh.write(f"\trange:{c[1][0]}-{c[1][1]}\n")
+                fh.write(f"\trange:{c[0][0]}-{c[0][1]}\n")
+                fh.write(f"\tarrived:{c[1]}\n")
 
     @staticmethod
     def load(name):
@@ -75,7 +80,6 @@ class ChunkInfo:
                 name = name[5:]
                 size = size[5:]
             else:
-                fh.close()
                 raise WrongFormat
             ci = ChunkInfo(name)
             ci.loaded = True
@@ -83,15 +87,16 @@ class ChunkInfo:
             while True:
                 if not fh.readline():  #: skip line
                     break
-                name = fh.readline()[1:-1]
                 range = fh.readline()[1:-1]
-                if name.startswith("name:") and range.startswith("range:"):
-                    name = name[5:]
+                arrived = fh.readline()[1:-1]
+                #: info files of separately stored chunks can't be resumed
+                if range.startswith("range:") and arrived.startswith("arrived:"):
                     range = range[6:].split("-")
+                    arrived = arrived[8:]
                 else:
                     raise WrongFormat
 
-                ci.add_chunk(name, (int(range[0]), int(range[1])))
+                ci.add_chunk((int(range[0]), int(range[1])), int(arrived))
 
         return ci
 
@@ -103,12 +108,18 @@ class ChunkInfo:
     def get_count(self):
         return len(self.chunks)
 
-    def get_chunk_name(self, index):
+    def get_chunk_range(self, index):
         return self.chunks[index][0]
 
-    def get_chunk_range(self, index):
+    def get_chunk_arrived(self, index):
         return self.chunks[index][1]
 
+    def set_chunk_range(self, index, range):
+        self.chunks[index][0] = range
+
+    def set_chunk_arrived(self, index, arrived):
+        self.chunks[index][1] = arrived
+
 
 class HTTPChunk(HTTPRequest):
     def __init__(self, id, parent, range=None, resume=False):
@@ -118,8 +129,8 @@ class HTTPChunk(HTTPRequest):
         self.resume = resume
         self.log = parent.log
 
-        self.size = range[1] - range[0] if range else -1
-        self.arrived = 0
+        self.size = range[1] - range[0] + 1 if range else -1
+        self.arrived = 0  #: bytes written from the start of the range
         self.last_url = self.p.referer
 
         self.aborted = False  # indicates that the chunk aborted gracefully
@@ -138,8 +149,6 @@ class HTTPChunk(HTTPRequest):
 
         self.rep = None
 
-        self.sleep = 0.0
-        self.last_size = 0
 
     def __repr__(self):
         return f"<HTTPChunk id={self.id}, size={self.size}, arrived={self.arrived}>"
@@ -148,19 +157,19 @@ class HTTPChunk(HTTPRequest):
     def cj(self):
         return self.p.cj
 
+    @property
+    def offset(self):
+        """
+        position of the next byte in the part file.
+        """
+        return self.range[0] + self.arrived if self.range else self.arrived
+
     def format_range(self):
-        if self.id == len(self.p.info.chunks) - 1:  #: as last chunk don't set end range, so we get everything
+        start = self.range[0] + self.arrived
+        if self.range[1] >= self.p.size - 1:  #: as last chunk don't set end range, so we get everything
             end = ""
-            if self.resume:
-                start = self.arrived + self.range[0]
-            else:
-                start = self.range[0]
         else:
             end = min(self.range[1] + 1, self.p.size - 1)
-            if self.id == 0 and not self.resume:  #: special case for first chunk
-                start = 0
-            else:
-                start = self.arrived + self.range[0]
 
         return f"{start}-{end}"
 
@@ -177,16 +186,13 @@ class HTTPChunk(HTTPRequest):
         # request all bytes, since some servers in russia seems to have a defect
         # arithmetic unit
 
-        fs_name = self.p.info.get_chunk_name(self.id)
+        fs_name = self.p.info.part_name
         if self.resume:
-            self.fp = open(fs_name, mode="ab")
-            self.arrived = self.fp.tell()
-            if not self.arrived:
-                self.arrived = os.stat(fs_name).st_size
+            self.arrived = self.p.info.get_chunk_arrived(self.id)
 
             if self.range:
                 #: do nothing if chunk already finished
-                if self.arrived + self.range[0] >= self.range[1]:
+                if self.arrived >= self.size:
                     return None
 
                 range = self.format_range()
@@ -197,6 +203,8 @@ class HTTPChunk(HTTPRequest):
                 self.log.debug(f"Resume File from {self.arrived}")
                 self.c.setopt(pycurl.RESUME_FROM, self.arrived)
 
+            self.fp = open(fs_name, mode="rb+")
+
         else:
             if self.range:
                 range = self.format_range()
@@ -204,7 +212,10 @@ class HTTPChunk(HTTPRequest):
                 self.log.debug(f"Chunk {self.id + 1} chunked with range {range}")
                 self.c.setopt(pycurl.RANGE, range)
 
-            self.fp = open(fs_name, mode="wb")
+            #: the initial chunk creates the part file, the others write into it
+            self.fp = open(fs_name, mode="rb+" if self.id else "wb")
+
+        self.fp.seek(self.offset)
 
         return self.c
 
@@ -214,48 +225,62 @@ class HTTPChunk(HTTPRequest):
         # as first chunk, we will parse the headers
         if not self.range and self.header.endswith(b"\r\n\r\n"):
             self.parse_header()
+            self.p.wakeup()  #: chunks can be created now
         #: FTP file size parsing
         elif not self.range and buf.startswith(b"150") and b"data connection" in buf:
             size = re.search(rb"(\d+) bytes", buf)
             if size:
                 self.p.size = int(size.group(1))
                 self.p.chunk_support = True
+                self.p.wakeup()
 
         self.header_parsed = True
 
     def write_body(self, buf):
         #: ignore BOM, it confuses unrar
         if not self.BOMChecked:
-            if buf[:3] == codecs.BOM_UTF8:
+            if (
+                not self.range
+                and not self.offset
+                and not self.p.transform
+                and buf[:3] == codecs.BOM_UTF8
+            ):
                 buf = buf[3:]
+                #: the content is shifted now, offsets of other chunks would not match
+                self.p.chunk_support = False
             self.BOMChecked = True
 
         size = len(buf)
 
-        self.arrived += size
+        #: never write past the range, the next chunk continues there
+        if self.range and self.arrived + size > self.size:
+            buf = buf[: max(0, self.size - self.arrived)]
+
+        if self.p.transform:
+            buf = self.p.transform(self.offset, buf)
 
         self.fp.write(buf)
+        if self.p.hasher:
+            self.p.hasher.update(self.offset, buf)
+        self.arrived += len(buf)
 
         if self.p.bucket:
-            time.sleep(self.p.bucket.consumed(size))
-        else:
-            # Avoid small buffers, increasing sleep time slowly if buffer size gets smaller
-            # otherwise reduce sleep time percentual (values are based on tests)
-            # So in general cpu time is saved without reducing bandwidth too much
+            #: runs in the reactor, so instead of sleeping the transfer is paused
+            sleep = self.p.bucket.consumed(size)
+            if sleep > 0:
+                self.c.pause(pycurl.PAUSE_RECV)
+                self.p.reactor.call_later(sleep, self.unpause)
 
-            if size < self.last_size:
-                self.sleep += 0.002
-            else:
-                self.sleep *= 0.7
-
-            self.last_size = size
-
-            time.sleep(self.sleep)
-
-        if self.range and self.arrived > self.size:
+        if self.range and len(buf) < size:
             self.aborted = True  #: tell parent to ignore the pycurl Exception
             return 0  #: close if chunk has enough data
 
+    def unpause(self):
+        try:
+            self.c.pause(pycurl.PAUSE_CONT)
+        except pycurl.error:  #: closed in the meantime
+            pass
+
     def parse_header(self):
         """
         parse data from recieved header.
@@ -357,16 +382,18 @@ class HTTPChunk(HTTPRequest):
 
     def set_range(self, range):
         self.range = range
-        self.size = range[1] - range[0]
+        self.size = range[1] - range[0] + 1
         self.log.debug("Chunk {id} chunked with range {range}".format(id=self.id + 1, range=self.format_range()))
 
     def flush_file(self):
         """
         flush and close file.
         """
+        if self.fp.closed:
+            return
         self.fp.flush()
         os.fsync(self.fp.fileno())  #: make sure everything was written to disk
-        self.fp.close()  #: needs to be closed, or merging chunks will fail
+        self.fp.close()  #: needs to be closed, or renaming the part file will fail
 
     def close(self):
         """
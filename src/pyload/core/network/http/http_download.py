@@ -3,12 +3,14 @@
 import os
 import time
 from logging import getLogger
+from queue import Empty, Queue
 
 import pycurl
 from pyload import APPID
 
 from ..exceptions import Abort
-from .http_chunk import ChunkInfo, HTTPChunk
+from .http_chunk import ChunkInfo, HTTPChunk, WrongFormat
+from .http_reactor import get_reactor
 from .http_request import BadHeader
 
 
@@ -17,6 +19,11 @@ class HTTPDownload:
     loads a url http + ftp.
     """
 
+    #: smallest range handed over to a free connection (in bytes)
+    MIN_SPLIT_SIZE = 1 << 20
+    #: least time left (in seconds) a chunk needs to be split
+    MIN_SPLIT_TIME = 2
+
     def __init__(
             self,
             url,
@@ -30,6 +37,8 @@ class HTTPDownload:
             options={},
             status_notify=None,
             disposition=False,
+            hasher=None,
+            transform=None,
     ):
         self.url = url
         self.filename = filename  #: complete file destination, not only name
@@ -40,26 +49,33 @@ class HTTPDownload:
         self.bucket = bucket
         self.options = options
         self.disposition = disposition
+        self.hasher = hasher  #: `StreamHasher` fed with the data as it is written
+        self.transform = transform  #: callable(offset, data) returning what is written
         # all arguments
 
         self.abort = False
+        self.finished = False
         self.size = size
         self.name_disposition = None  #: will be parsed from content disposition
 
         self.chunks = []
+        self.chunk_map = {}  #: curl handle -> chunk
 
         self.log = getLogger(APPID)
 
         try:
             self.info = ChunkInfo.load(filename)
+            if not os.path.exists(self.info.part_name):
+                raise IOError
             self.info.resume = True  #: resume is only possible with valid info file
             self.size = self.info.size
             self.info_saved = True
-        except IOError:
+        except (IOError, WrongFormat):
             self.info = ChunkInfo(filename)
 
         self.chunk_support = None
-        self.m = self.manager = pycurl.CurlMulti()
+        self.reactor = get_reactor()
+        self.events = Queue()  #: (curl handle, errno, msg) of finished chunks
 
         # needed for speed calculation
         self.last_arrived = []
@@ -84,31 +100,22 @@ class HTTPDownload:
             return 0
         return (self.arrived * 100) // self.size
 
-    def _copy_chunks(self):
-        init = self.info.get_chunk_name(0)  #: initial chunk name
+    def _finish(self):
+        """
+        the chunks were loaded in place, only the part file has to be renamed.
+        """
+        self.finished = True
+        init = self.info.part_name
 
         if self.info.get_count() > 1:
-            with open(init, mode="rb+") as fo:  #: first chunk file
-                for i in range(1, self.info.get_count()):
-                    # input file
-                    # seek to beginning of chunk, to get rid of overlapping chunks
-                    fo.seek(self.info.get_chunk_range(i - 1)[1] + 1)
-                    fname = f"{self.filename}.chunk{i}"
-                    with open(fname, mode="rb") as fi:
-                        buf = 32 << 10
-                        while True:  #: copy in chunks, consumes less memory
-                            data = fi.read(buf)
-                            if not data:
-                                break
-                            fo.write(data)
-                    if fo.tell() < self.info.get_chunk_range(i)[1]:
-                        fo.close()
-                        os.remove(init)
-                        self.info.remove()  #: there are probably invalid chunks
-                        raise Exception(
-                            "Downloaded content was smaller than expected. Try to reduce download connections."
-                        )
-                    os.remove(fname)  #: os.remove chunk
+            for i in range(self.info.get_count()):
+                start, end = self.info.get_chunk_range(i)
+                if self.info.get_chunk_arrived(i) < end - start + 1:
+                    os.remove(init)
+                    self.info.remove()  #: there are probably invalid chunks
+                    raise Exception(
+                        "Downloaded content was smaller than expected. Try to reduce download connections."
+                    )
 
         if self.name_disposition and self.disposition:
             self.filename = os.path.join(
@@ -118,6 +125,21 @@ class HTTPDownload:
         os.rename(init, self.filename)
         self.info.remove()  #: os.remove info file
 
+    def save_info(self):
+        """
+        stores how far every chunk got, so the download can be resumed.
+        """
+        if not self.info.size:
+            return
+
+        for chunk in self.chunks:
+            if chunk.fp and not chunk.fp.closed:
+                chunk.fp.flush()  #: never store more than has been written
+            if chunk.id < self.info.get_count():
+                self.info.set_chunk_arrived(chunk.id, chunk.arrived)
+
+        self.info.save()
+
     def download(self, chunks=1, resume=False):
         """
         returns new filename or None.
@@ -142,6 +164,8 @@ class HTTPDownload:
             else:
                 raise
         finally:
+            if not self.finished:
+                self.save_info()
             self.close()
 
         if self.name_disposition and self.disposition:
@@ -152,23 +176,23 @@ class HTTPDownload:
     def _download(self, chunks, resume):
         if not resume:
             self.info.clear()
-            self.info.add_chunk(
-                f"{self.filename}.chunk0", (0, 0)
-            )  #: create an initial entry)
+            self.info.add_chunk((0, 0))  #: create an initial entry
 
         self.chunks = []
+        self.chunk_map = {}
+
+        if self.hasher:
+            self.hasher.reset()  #: data loaded before is hashed from disk
 
         # initial chunk that will load complete file (if needed)
         init = HTTPChunk(0, self, None, resume)
 
         self.chunks.append(init)
-        self.m.add_handle(init.get_handle())
+        self.add_chunk(init, init.get_handle())
 
-        last_finish_check = 0
         last_time_check = 0
         chunks_done = set()  #: list of curl handles that are finished
         chunks_created = False
-        done = False
         if (
             self.info.get_count() > 1
         ):  #: This is a resume, if we were chunked originally assume still can
@@ -185,6 +209,9 @@ class HTTPDownload:
                     self.info.create_chunks(chunks)
                     self.info.save()
 
+                    #: reserve the whole file, chunks write at their offsets
+                    os.truncate(self.info.part_name, self.size)
+
                 chunks = self.info.get_count()
 
                 init.set_range(self.info.get_chunk_range(0))
@@ -195,7 +222,7 @@ class HTTPDownload:
                     handle = c.get_handle()
                     if handle:
                         self.chunks.append(c)
-                        self.m.add_handle(handle)
+                        self.add_chunk(c, handle)
                     else:
                         # close immediately
                         self.log.debug("Invalid curl handle -> closed")
@@ -203,91 +230,89 @@ class HTTPDownload:
 
                 chunks_created = True
 
-            while True:
-                ret, num_handles = self.m.perform()
-                if ret != pycurl.E_CALL_MULTI_PERFORM:
-                    break
-
-            t = time.time()
-
-            # reduce these calls
-            while last_finish_check + 0.5 < t:
-                # list of failed curl handles
-                failed = []
-                ex = None  #: save only last exception, we can only raise one anyway
-
-                num_q, ok_list, err_list = self.m.info_read()
-                for c in ok_list:
-                    chunk = self.find_chunk(c)
-                    try:  #: check if the header implies success, else add it to failed list
-                        chunk.verify_header()
-                    except BadHeader as exc:
-                        self.log.debug(f"Chunk {chunk.id + 1} failed: {exc}")
-                        failed.append(chunk)
-                        ex = exc
-                    else:
-                        self.log.debug(f"Chunk {chunk.id + 1} download finished")
-                        chunks_done.add(c)
-
-                for c in err_list:
-                    curl, errno, msg = c
-                    chunk = self.find_chunk(curl)
-                    # test if chunk was finished
-                    if errno != pycurl.E_WRITE_ERROR or not chunk.aborted:
-                        failed.append(chunk)
-                        ex = pycurl.error(errno, msg)
-                        self.log.debug(f"Chunk {chunk.id + 1} failed: {ex}")
-                        continue
-
-                    try:  #: check if the header implies success, else add it to failed list
-                        chunk.verify_header()
-                    except BadHeader as exc:
-                        self.log.debug(f"Chunk {chunk.id + 1} failed: {exc}")
-                        failed.append(chunk)
-                        ex = exc
-                    else:
-                        self.log.debug(f"Chunk {chunk.id + 1} download finished")
-                        chunks_done.add(curl)
-                if not num_q:  #: no more infos to get
-
-                    # check if init is not finished so we reset download connections
-                    # note that other chunks are closed and downloaded with init too
-                    if failed and init not in failed and init.c not in chunks_done:
-                        self.log.error(
-                            f"Download chunks failed, fallback to single connection | {ex}"
-                        )
-
-                        # list of chunks to clean and os.remove
-                        to_clean = [x for x in self.chunks if x is not init]
-                        for chunk in to_clean:
-                            self.close_chunk(chunk)
-                            self.chunks.remove(chunk)
-                            os.remove(self.info.get_chunk_name(chunk.id))
-
-                        # let first chunk load the rest and update the info file
-                        init.reset_range()
-                        self.info.clear()
-                        self.info.add_chunk(f"{self.filename}.chunk0", (0, self.size))
-                        self.info.save()
-                    elif failed:
-                        raise ex or Exception
-
-                    last_finish_check = t
-
-                    if len(chunks_done) >= len(self.chunks):
-                        if len(chunks_done) > len(self.chunks):
-                            self.log.warning(
-                                "Finished download chunks size incorrect, please report bug."
-                            )
-                        done = True  #: all chunks loaded
-
-                    break
-
-            if done:
+            # sleep until a chunk finishes or the header arrived, at most until the
+            # next speed calculation
+            events = []
+            try:
+                events.append(
+                    self.events.get(timeout=max(0, last_time_check + 1 - time.time()))
+                )
+                while True:
+                    events.append(self.events.get_nowait())
+            except Empty:
+                pass
+
+            # list of failed and finished chunks
+            failed = []
+            finished = []
+            ex = None  #: save only last exception, we can only raise one anyway
+
+            for event in events:
+                if event is None:  #: just woken up
+                    continue
+
+                curl, errno, msg = event
+                chunk = self.find_chunk(curl)
+                if chunk is None:  #: already closed
+                    continue
+
+                # test if chunk was finished
+                if errno and (errno != pycurl.E_WRITE_ERROR or not chunk.aborted):
+                    failed.append(chunk)
+                    ex = pycurl.error(errno, msg)
+                    self.log.debug(f"Chunk {chunk.id + 1} failed: {ex}")
+                    continue
+
+                try:  #: check if the header implies success, else add it to failed list
+                    chunk.verify_header()
+                except BadHeader as exc:
+                    self.log.debug(f"Chunk {chunk.id + 1} failed: {exc}")
+                    failed.append(chunk)
+                    ex = exc
+                else:
+                    self.log.debug(f"Chunk {chunk.id + 1} download finished")
+                    chunks_done.add(curl)
+                    finished.append(chunk)
+
+            # check if init is not finished so we reset download connections
+            # note that other chunks are closed and downloaded with init too
+            if failed and init not in failed and init.c not in chunks_done:
+                self.log.error(
+                    f"Download chunks failed, fallback to single connection | {ex}"
+                )
+
+                # list of chunks to clean
+                to_clean = [x for x in self.chunks if x is not init]
+                for chunk in to_clean:
+                    self.close_chunk(chunk)
+                    self.chunks.remove(chunk)
+                    del self.chunk_map[chunk.c]
+                    chunks_done.discard(chunk.c)
+
+                # let first chunk load the rest and update the info file
+                init.reset_range()
+                self.info.clear()
+                self.info.add_chunk((0, self.size - 1), init.arrived)
+                self.info.save()
+            elif failed:
+                raise ex or Exception
+
+            elif chunks_created:
+                # let the free connections take over from the slowest chunks
+                for chunk in finished:
+                    chunk.flush_file()
+                    self.split_chunk(chunks_done)
+
+            if len(chunks_done) >= len(self.chunks):
+                if len(chunks_done) > len(self.chunks):
+                    self.log.warning(
+                        "Finished download chunks size incorrect, please report bug."
+                    )
                 break  #: all chunks loaded
 
             # calc speed once per second, averaging over 3 seconds
-            if last_time_check + 1 < t:
+            t = time.time()
+            if last_time_check + 1 <= t:
                 diff = [
                     c.arrived
                     - (self.last_arrived[i] if len(self.last_arrived) > i else 0)
@@ -300,18 +325,70 @@ class HTTPDownload:
                 self.last_arrived = [c.arrived for c in self.chunks]
                 last_time_check = t
                 self.update_progress()
+                self.save_info()
 
             if self.abort:
                 raise Abort
 
-            # time.sleep(0.003) #supress busy waiting - limits dl speed to  (1 / x) *
-            # buffersize
-            self.m.select(1)
-
         for chunk in self.chunks:
             chunk.flush_file()  #: make sure downloads are written to disk
 
-        self._copy_chunks()
+        for chunk in self.chunks:
+            if chunk.id < self.info.get_count():
+                self.info.set_chunk_arrived(chunk.id, chunk.arrived)
+
+        self._finish()
+
+    def split_chunk(self, chunks_done):
+        """
+        hands the second half of the chunk expected to finish last to a new chunk.
+        """
+        #: the reactor writes to the donor meanwhile, so its range may only change
+        #: between two writes
+        donor, chunk = self.reactor.call(self._split, chunks_done, wait=True)
+        if chunk is None:
+            return None
+
+        self.save_info()
+        self.log.debug(f"Chunk {chunk.id + 1} took over from chunk {donor.id + 1}")
+        return chunk
+
+    def _split(self, chunks_done):
+        donor = None
+        longest = 0
+        for i, chunk in enumerate(self.chunks):
+            if not chunk.range or chunk.c in chunks_done:
+                continue
+
+            remaining = chunk.size - chunk.arrived
+            if remaining < 2 * self.MIN_SPLIT_SIZE:
+                continue
+
+            if i >= len(self.speeds):
+                eta = self.MIN_SPLIT_TIME  #: not measured yet
+            elif self.speeds[i]:
+                eta = remaining / self.speeds[i]
+            else:
+                eta = float("inf")  #: stalled
+
+            if eta >= self.MIN_SPLIT_TIME and eta > longest:
+                donor, longest = chunk, eta
+
+        if donor is None:
+            return None, None
+
+        start, end = donor.range
+        middle = donor.offset + (donor.size - donor.arrived) // 2
+
+        donor.set_range((start, middle - 1))
+        self.info.set_chunk_range(donor.id, donor.range)
+
+        self.info.add_chunk((middle, end))
+        chunk = HTTPChunk(self.info.get_count() - 1, self, (middle, end))
+        handle = chunk.get_handle()
+        self.chunks.append(chunk)
+        self.add_chunk(chunk, handle)
+        return donor, chunk
 
     def update_progress(self):
         if self.status_notify:
@@ -323,16 +400,24 @@ class HTTPDownload:
             self.status_notify({'disposition': disposition})
 
     def find_chunk(self, handle):
+        return self.chunk_map.get(handle)
+
+    def add_chunk(self, chunk, handle):
         """
-        linear search to find a chunk (should be ok since chunk size is usually low)
+        starts the transfer of a chunk, it reports back through the event queue.
         """
-        for chunk in self.chunks:
-            if chunk.c == handle:
-                return chunk
+        self.chunk_map[handle] = chunk
+        self.reactor.add_handle(handle, self._chunk_finished)
+
+    def _chunk_finished(self, handle, errno, msg):
+        self.events.put((handle, errno, msg))
+
+    def wakeup(self):
+        self.events.put(None)
 
     def close_chunk(self, chunk):
         try:
-            self.m.remove_handle(chunk.c)
+            self.reactor.remove_handle(chunk.c)
         except pycurl.error as exc:
             self.log.debug(f"Error removing chunk: {exc}")
         finally:
@@ -346,9 +431,7 @@ class HTTPDownload:
             self.close_chunk(chunk)
 
         self.chunks = []
-        if hasattr(self, "m"):
-            self.m.close()
-            del self.m
+        self.chunk_map = {}
         if hasattr(self, "cj"):
             del self.cj
         if hasattr(self, "info"):
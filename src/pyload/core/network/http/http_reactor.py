@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+
+import heapq
+import itertools
+import selectors
+import socket
+import time
+from collections import deque
+from logging import getLogger
+from threading import Event, Lock, Thread, current_thread
+
+import pycurl
+from pyload import APPID
+
+_REACTOR = None
+_REACTOR_LOCK = Lock()
+
+
+def get_reactor():
+    """
+    returns the reactor shared by all downloads, it is started on first use.
+    """
+    global _REACTOR
+    with _REACTOR_LOCK:
+        if _REACTOR is None or not _REACTOR.is_alive():
+            _REACTOR = HTTPReactor()
+            _REACTOR.start()
+        return _REACTOR
+
+
+class HTTPReactor(Thread):
+    """
+    drives the transfers of all downloads with one CurlMulti.
+
+    curl tells which sockets to watch and when it has to be called again, so the
+    thread only wakes up when there is something to do. Finished transfers are
+    reported to their callback immediately.
+    """
+
+    #: curl socket events -> selector events
+    EVENTS = {
+        pycurl.POLL_IN: selectors.EVENT_READ,
+        pycurl.POLL_OUT: selectors.EVENT_WRITE,
+        pycurl.POLL_INOUT: selectors.EVENT_READ | selectors.EVENT_WRITE,
+    }
+
+    def __init__(self):
+        super().__init__(name="HTTPReactor", daemon=True)
+        self.log = getLogger(APPID)
+
+        self.m = pycurl.CurlMulti()
+        self.m.setopt(pycurl.M_SOCKETFUNCTION, self._on_socket)
+        self.m.setopt(pycurl.M_TIMERFUNCTION, self._on_timer)
+
+        self.selector = selectors.DefaultSelector()
+        self.waker, self.wakeup = socket.socketpair()
+        self.waker.setblocking(False)
+        self.wakeup.setblocking(False)
+        self.selector.register(self.waker, selectors.EVENT_READ)
+
+        self.lock = Lock()
+        self.calls = deque()  #: (function, args, finished event, result) from other threads
+        self.timers = []  #: heap of (due time, sequence, function, args)
+        self.sequence = itertools.count()
+        self.timeout = None  #: due time of the curl timeout
+        self.callbacks = {}  #: curl handle -> function(handle, errno, msg)
+
+    def call(self, func, *args, wait=False):
+        """
+        runs func in the reactor thread, curl handles may only be touched there.
+        """
+        if current_thread() is self:
+            return func(*args)
+
+        job = [func, args, Event() if wait else None, None]
+        with self.lock:
+            self.calls.append(job)
+        self._wakeup()
+
+        if not wait:
+            return None
+
+        job[2].wait()
+        if isinstance(job[3], BaseException):
+            raise job[3]
+        return job[3]
+
+    def call_later(self, delay, func, *args):
+        """
+        runs func in the reactor thread after delay seconds.
+        """
+        self.call(
+            heapq.heappush,
+            self.timers,
+            (time.monotonic() + delay, next(self.sequence), func, args),
+        )
+
+    def add_handle(self, handle, callback):
+        """
+        starts the transfer of handle, callback(handle, errno, msg) is called when
+        it is finished, errno is 0 on success.
+        """
+        self.call(self._add_handle, handle, callback)
+
+    def remove_handle(self, handle):
+        """
+        stops the transfer of handle, returns when it's safe to close it.
+        """
+        self.call(self._remove_handle, handle, wait=True)
+
+    def _add_handle(self, handle, callback):
+        self.callbacks[handle] = callback
+        self.m.add_handle(handle)
+
+    def _remove_handle(self, handle):
+        if self.callbacks.pop(handle, None) is not None:
+            self.m.remove_handle(handle)
+
+    def _wakeup(self):
+        try:
+            self.wakeup.send(b"\0")
+        except OSError:  #: buffer full, reactor is awake anyway
+            pass
+
+    def _on_socket(self, what, fd, multi, data):
+        if what == pycurl.POLL_REMOVE:
+            try:
+                self.selector.unregister(fd)
+            except (KeyError, ValueError):
+                pass
+            return
+
+        events = self.EVENTS[what]
+        try:
+            self.selector.modify(fd, events)
+        except KeyError:
+            self.selector.register(fd, events)
+
+    def _on_timer(self, timeout_ms):
+        self.timeout = None if timeout_ms < 0 else time.monotonic() + timeout_ms / 1000
+
+    def _socket_action(self, fd, mask):
+        try:
+            while True:
+                ret, running = self.m.socket_action(fd, mask)
+                if ret != pycurl.E_CALL_MULTI_PERFORM:
+                    break
+        except pycurl.error as exc:
+            self.log.error(f"HTTPReactor socket action failed | {exc}")
+
+    def _read_info(self):
+        while True:
+            num_q, ok_list, err_list = self.m.info_read()
+            for c in ok_list:
+                self._finish(c, 0, "")
+            for c, errno, msg in err_list:
+                self._finish(c, errno, msg)
+            if not num_q:
+                break
+
+    def _finish(self, handle, errno, msg):
+        callback = self.callbacks.pop(handle, None)
+        if callback is None:
+            return
+
+        self.m.remove_handle(handle)
+        try:
+            callback(handle, errno, msg)
+        except Exception as exc:
+            self.log.error(f"HTTPReactor callback failed | {exc}", exc_info=True)
+
+    def _run_calls(self):
+        with self.lock:
+            calls, self.calls = self.calls, deque()
+
+        for job in calls:
+            func, args, event, _ = job
+            try:
+                job[3] = func(*args)
+            except Exception as exc:
+                job[3] = exc
+                if event is None:
+                    self.log.error(f"HTTPReactor call failed | {exc}", exc_info=True)
+            finally:
+                if event is not None:
+                    event.set()
+
+    def _run_timers(self, now):
+        while self.timers and self.timers[0][0] <= now:
+            _, _, func, args = heapq.heappop(self.timers)
+            try:
+                func(*args)
+            except Exception as exc:
+                self.log.error(f"HTTPReactor timer failed | {exc}", exc_info=True)
+
+    def _next_timeout(self):
+        due = [x for x in (self.timeout, self.timers[0][0] if self.timers else None) if x is not None]
+        if not due:
+            return None
+        return max(0, min(due) - time.monotonic())
+
+    def run(self):
+        while True:
+            for key, mask in self.selector.select(self._next_timeout()):
+                if key.fileobj is self.waker:
+                    try:
+                        while self.waker.recv(4096):
+                            pass
+                    except OSError:
+                        pass
+                    continue
+
+                action = 0
+                if mask & selectors.EVENT_READ:
+                    action |= pycurl.CSELECT_IN
+                if mask & selectors.EVENT_WRITE:
+                    action |= pycurl.CSELECT_OUT
+                self._socket_action(key.fd, action)
+
+            now = time.monotonic()
+            if self.timeout is not None and self.timeout <= now:
+                self.timeout = None
+                self._socket_action(pycurl.SOCKET_TIMEOUT, 0)
+
+            self._run_timers(now)
+            self._run_calls()
+            self._read_info()
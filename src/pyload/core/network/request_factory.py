@@ -4,7 +4,7 @@ from threading import Lock
 
 from ..utils.old import lock
 from .browser import Browser
-from .bucket import Bucket
+from .bucket import BucketTree
 from .cookie_jar import CookieJar
 from .http.http_request import HTTPRequest
 from .xdcc.request import XDCCRequest
@@ -17,7 +17,8 @@ class RequestFactory:
         self.lock = Lock()
         self.pyload = core
         self._ = core._
-        self.bucket = Bucket()
+        self.buckets = BucketTree()
+        self.bucket = self.buckets.root  #: global limit
         self.update_bucket()
         self.cookiejars = {}
 
@@ -34,11 +35,13 @@ class RequestFactory:
         options = self.get_options()
         options.update(kwargs)  #: submit kwargs as additional options
 
+        bucket = self.get_bucket(plugin_name, account)
+
         if type == "XDCC":
-            req = XDCCRequest(self.bucket, options)
+            req = XDCCRequest(bucket, options)
 
         else:
-            req = Browser(self.bucket, options)
+            req = Browser(bucket, options)
 
             if account:
                 cj = self.get_cookie_jar(plugin_name, account)
@@ -118,14 +121,20 @@ class RequestFactory:
             "ipv6": self.pyload.config.get("download", "ipv6"),
         }
 
+    def get_bucket(self, plugin_name=None, account=None, package=None, file=None):
+        """
+        returns the speed limits a download has to respect.
+        """
+        return self.buckets.chain(plugin_name, account, package, file)
+
     def update_bucket(self):
         """
         set values in the bucket according to settings.
         """
         if not self.pyload.config.get("download", "limit_speed"):
-            self.bucket.set_rate(-1)
+            self.buckets.set_rate(-1)
         else:
-            self.bucket.set_rate(self.pyload.config.get("download", "max_speed") << 10)
+            self.buckets.set_rate(self.pyload.config.get("download", "max_speed") << 10)
 
 
 def get_url(*args, **kwargs):
@@ -0,0 +1,544 @@
+# -*- coding: utf-8 -*-
+
+import os
+import random
+import re
+import socket
+import time
+from collections import deque
+from logging import getLogger
+from queue import Empty, Queue
+from threading import Event, Lock, RLock, Thread
+
+from pyload import APPID
+
+_SESSIONS = {}  #: (host, port, nick) -> IRCSession
+_SESSIONS_LOCK = Lock()
+
+
+def get_session(host, port, nick, ident, realname):
+    """
+    returns the session connected to the IRC server host:port as nick, it is
+    shared by all downloads from that network and connected on first use.
+    release it when done.
+    """
+    key = (host.lower(), port, nick)
+    with _SESSIONS_LOCK:
+        session = _SESSIONS.get(key)
+        if session is None or session.closed.is_set():
+            session = _SESSIONS[key] = IRCSession(host, port, nick, ident, realname)
+        session.users += 1
+
+    try:
+        session.wait_registered()
+    except Exception:
+        session.release()
+        raise
+
+    return session
+
+
+def parse_message(line):
+    """
+    breaks a message from an IRC server into its origin, command, and arguments.
+    """
+    origin = ""
+    if line[0] == ":":
+        origin, line = line[1:].split(" ", 1)
+
+    if line.find(" :") != -1:
+        line, trailing = line.split(" :", 1)
+        args = line.split()
+        args.append(trailing)
+
+    else:
+        args = line.split()
+
+    return origin, args.pop(0).upper(), args
+
+
+def origin_nick(origin):
+    return origin.split("@")[0].split("!")[0]
+
+
+class PackRequest:
+    """
+    a pack requested from a bot. The bot is asked for one pack of a session at a
+    time, the following requests are queued until it is closed. Messages of the
+    bot to us are routed to the request being served.
+    """
+
+    def __init__(self, session, bot, pack):
+        self.session = session
+        self.bot = bot
+        self.pack = pack
+
+        self.sent = None  #: time the pack was requested last, None while queued
+        self.offered = False  #: the bot sent a DCC offer
+        self.messages = Queue()  #: (sender nick, text) from the bot
+        self.accepts = Queue()  #: texts of DCC ACCEPT from the bot
+
+    def send(self):
+        """
+        (re)sends the request to the bot.
+        """
+        self.sent = time.time()
+        self.session.send("PRIVMSG {} :xdcc send #{}".format(self.bot, self.pack))
+
+    def get(self, timeout=None):
+        """
+        returns the next (sender nick, text) of the bot or None after timeout.
+        raises if the connection to the server was lost.
+        """
+        try:
+            return self.messages.get(timeout=timeout)
+        except Empty:
+            if self.session.closed.is_set():
+                raise self.session.error or ConnectionError("Not connected")
+            return None
+
+    def resume(self, port, file_name, position, timeout=30):
+        """
+        asks the bot to resume the offer on port at position, returns the position
+        it acknowledged or 0.
+        """
+        if not self.sent:
+            return 0
+
+        while not self.accepts.empty():  #: drop answers of former attempts
+            self.accepts.get_nowait()
+
+        self.session.send(
+            'PRIVMSG {} :\x01DCC RESUME "{}" {} {}\x01'.format(
+                self.bot, os.fsdecode(file_name), port, position
+            )
+        )
+
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                text = self.accepts.get(timeout=max(0, deadline - time.monotonic()))
+            except Empty:
+                return 0
+
+            m = re.match(r"\x01DCC ACCEPT .*? {} (\d+)\x01".format(port), text)
+            if m:
+                return int(m.group(1))
+
+    def cancel(self):
+        """
+        cancels the offer of the bot.
+        """
+        if self.sent:
+            self.session.send("PRIVMSG {} :xdcc cancel".format(self.bot))
+
+    def close(self):
+        """
+        removes the request from the session and lets the next pack queued for the
+        bot be requested.
+        """
+        if self.sent and not self.offered:
+            self.session.send("PRIVMSG {} :xdcc remove #{}".format(self.bot, self.pack))
+        self.session.close_request(self)
+
+
+class IRCSession:
+    """
+    one connection to an IRC server shared by several downloads.
+
+    A thread reads the messages of the server, answers pings and hands the
+    messages to the requests waiting for them. Channels are joined and the nick
+    identified only once per connection, lines sent are paced to stay under the
+    flood limit of the server. The connection is closed `LINGER` seconds after
+    its last user released it.
+    """
+
+    #: seconds a connection is kept after its last user left
+    LINGER = 60
+
+    #: lines sent at once and seconds between the following ones
+    FLOOD_BURST = 5
+    FLOOD_DELAY = 2
+
+    #: ERR_NOSUCHCHANNEL, ERR_TOOMANYCHANNELS, ERR_KEYSET, ERR_CHANNELISFULL,
+    #: ERR_INVITEONLYCHAN, ERR_BANNEDFROMCHAN, ERR_BADCHANNELKEY
+    JOIN_ERRORS = ("403", "405", "467", "471", "473", "474", "475")
+
+    def __init__(self, host, port, nick, ident, realname):
+        self.log = getLogger(APPID)
+
+        self.host = host
+        self.port = port
+        self.nick = (
+            "pyload-{:04}".format(random.randrange(10000)) if nick == "pyload" else nick
+        )
+        self.user = (ident, realname)
+
+        self.lock = RLock()
+        self.send_lock = Lock()
+        self.join_lock = Lock()
+
+        self.sock = None
+        self.penalty = 0  #: time until the flood limit is reached
+        self.registered = Event()
+        self.closed = Event()
+        self.error = None
+
+        self.users = 0
+        self.idle_since = time.monotonic()
+
+        self.channels = set()
+        self.identified = False
+        self.bot_hosts = {}  #: bot nick (lower) -> host
+        self.waiters = []  #: [match(origin, command, args), event, result]
+        self.requests = {}  #: bot nick (lower) -> deque of PackRequest
+
+        self.thread = Thread(
+            target=self.run, name="IRC {}:{}".format(host, port), daemon=True
+        )
+        self.thread.start()
+
+    def wait_registered(self, timeout=60):
+        if not self.registered.wait(timeout):
+            raise socket.timeout(
+                "Connection to {}:{} timed out".format(self.host, self.port)
+            )
+        if self.closed.is_set():
+            raise self.error or ConnectionError("Not connected")
+
+    def release(self):
+        with _SESSIONS_LOCK:
+            self.users -= 1
+            if not self.users:
+                self.idle_since = time.monotonic()
+
+    def send(self, line, throttle=True):
+        """
+        sends line, waits first if the flood limit of the server would be reached.
+        """
+        if throttle:
+            with self.send_lock:
+                now = time.monotonic()
+                self.penalty = max(self.penalty, now) + self.FLOOD_DELAY
+                delay = self.penalty - now - self.FLOOD_BURST * self.FLOOD_DELAY
+            if delay > 0:
+                time.sleep(delay)
+
+        with self.send_lock:
+            if self.closed.is_set():
+                raise self.error or ConnectionError("Not connected")
+
+            self.sock.sendall((line + "\r\n").encode("utf-8"))
+
+    def expect(self, line, match, timeout=30):
+        """
+        sends line and returns the first result of match(origin, command, args) not
+        being None for the following messages, None after timeout.
+        """
+        waiter = [match, Event(), None]
+        with self.lock:
+            self.waiters.append(waiter)
+
+        try:
+            self.send(line)
+            waiter[1].wait(timeout)
+            return waiter[2]
+
+        finally:
+            with self.lock:
+                if waiter in self.waiters:
+                    self.waiters.remove(waiter)
+
+    def _from(self, origin, bot):
+        nick = origin_nick(origin)
+        return nick.lower() == bot.lower() or (
+            "@" in origin and origin.split("@")[1] == self.bot_hosts.get(bot.lower())
+        )
+
+    def _to_us(self, args):
+        return bool(args) and args[0].lower() == self.nick.lower()
+
+    def in_channel(self, chan):
+        chan = chan if chan.startswith("#") else "#" + chan
+        return chan.lower() in self.channels
+
+    def join_channel(self, chan):
+        chan = chan if chan.startswith("#") else "#" + chan
+
+        def match(origin, command, args):
+            if (
+                command in self.JOIN_ERRORS
+                and len(args) > 2
+                and args[1].lower() == chan.lower()
+            ):
+                self.log.error(
+                    "Cannot join channel {} (error {}: '{}')".format(
+                        chan, command, args[2]
+                    )
+                )
+                return False
+
+            elif command == "JOIN" and origin_nick(origin).lower() == self.nick.lower():
+                return args[0].lower() == chan.lower() or None
+
+        with self.join_lock:
+            if chan.lower() in self.channels:
+                return True
+
+            self.log.info("Joining channel {}".format(chan))
+            if not self.expect("JOIN {}".format(chan), match):
+                return False
+
+            self.channels.add(chan.lower())
+            return True
+
+    def is_bot_online(self, bot):
+        """
+        asks the server who bot is and remembers its host.
+        """
+        if bot.lower() in self.bot_hosts:
+            return True
+
+        def match(origin, command, args):
+            if len(args) < 2 or args[1].lower() != bot.lower():
+                return None
+
+            elif command == "401":  #: ERR_NOSUCHNICK
+                return False
+
+            elif command == "311" and len(args) > 3:  #: RPL_WHOISUSER
+                self.bot_hosts[bot.lower()] = args[3]
+                return True
+
+        online = self.expect("WHOIS {}".format(bot), match)
+        if online is None:
+            self.log.error("Server did not respond in a reasonable time")
+        return bool(online)
+
+    def _ask(self, bot, line, commands=("PRIVMSG", "NOTICE")):
+        """
+        sends line to bot and returns (command, text) of its answer or None.
+        """
+        if not self.is_bot_online(bot):
+            return None
+
+        def match(origin, command, args):
+            if command in commands and self._to_us(args) and self._from(origin, bot):
+                return command, args[-1]
+
+        answer = self.expect("PRIVMSG {} :{}".format(bot, line), match)
+        if answer is None:
+            self.log.warning("'{}' did not respond to the request".format(bot))
+        return answer
+
+    def nickserv_identify(self, password):
+        with self.join_lock:
+            if self.identified:
+                return
+
+            self.log.info("Authenticating nickname")
+            answer = self._ask("nickserv", "identify {}".format(password))
+            if answer:
+                self.log.info("PrivMsg: <nickserv> {}".format(answer[1]))
+            self.identified = True
+
+    def send_invite_request(self, bot, chan, password):
+        self.log.info("Sending invite request for #{} to '{}'".format(chan, bot))
+        answer = self._ask(
+            bot,
+            "enter #{} {} {}".format(chan, self.nick, password),
+            ("PRIVMSG", "NOTICE", "INVITE"),
+        )
+        if answer and answer[0] == "INVITE":
+            self.log.info("Got invite to #{}".format(chan))
+        elif answer:
+            self.log.info("PrivMsg: <{}> {}".format(bot, answer[1]))
+
+    def request_pack(self, bot, pack):
+        """
+        returns the PackRequest of pack, it is sent to bot once the packs requested
+        from it before are closed.
+        """
+        request = PackRequest(self, bot, pack)
+        with self.lock:
+            queue = self.requests.setdefault(bot.lower(), deque())
+            queue.append(request)
+            first = len(queue) == 1
+
+        if first:
+            request.send()
+        return request
+
+    def close_request(self, request):
+        with self.lock:
+            queue = self.requests.get(request.bot.lower())
+            if not queue or request not in queue:
+                return
+
+            first = queue[0] is request
+            queue.remove(request)
+            if not queue:
+                del self.requests[request.bot.lower()]
+                return
+
+            following = queue[0] if first else None
+
+        if following is not None:
+            following.send()
+
+    def _route(self, origin, text):
+        """
+        hands a message sent to us to the request being served by its sender.
+        """
+        nick = origin_nick(origin)
+        with self.lock:
+            for bot, queue in self.requests.items():
+                if self._from(origin, bot):
+                    request = queue[0]
+                    break
+            else:
+                self.log.debug("PrivMsg: <{}> {}".format(nick, text))
+                return
+
+        if text.startswith("\x01DCC ACCEPT "):
+            request.accepts.put(text)
+        else:
+            if text.startswith("\x01DCC SEND "):
+                request.offered = True
+            request.messages.put((nick, text))
+
+    def _ctcp(self, sender, text):
+        command, _, args = text[1:-1].partition(" ")
+        if command == "VERSION":
+            reply = "VERSION pyLoad! IRC Interface"
+        elif command == "TIME":
+            reply = time.strftime("%a %b %d %H:%M:%S %Y")
+        elif command == "PING":
+            reply = "PING {}".format(args)  # NOTE: PING is not a typo
+        else:
+            return False
+
+        self.log.debug("[{}] CTCP {}".format(sender, command))
+        self.send("NOTICE {} :\x01{}\x01".format(sender, reply), throttle=False)
+        return True
+
+    def _handle(self, line):
+        origin, command, args = parse_message(line)
+
+        if command == "PING":
+            self.send("PONG :{}".format(args[0] if args else ""), throttle=False)
+            return
+
+        elif command == "001":  #: RPL_WELCOME
+            self.nick = args[0]
+            self.log.debug(
+                "Successfully connected to {}:{}".format(self.host, self.port)
+            )
+            self.registered.set()
+
+        elif command == "433" and not self.registered.is_set():  #: ERR_NICKNAMEINUSE
+            self.nick = "{}-{:04}".format(self.nick[:20], random.randrange(10000))
+            self.send("NICK {}".format(self.nick), throttle=False)
+
+        elif command == "NICK" and origin_nick(origin).lower() == self.nick.lower():
+            self.nick = args[0]
+
+        elif command in ("KICK", "PART") and (
+            args[1] if command == "KICK" else origin_nick(origin)
+        ).lower() == self.nick.lower():
+            self.channels.discard(args[0].lower())
+
+        with self.lock:
+            for waiter in self.waiters:
+                result = waiter[0](origin, command, args)
+                if result is not None:
+                    waiter[2] = result
+                    waiter[1].set()
+                    self.waiters.remove(waiter)
+                    return
+
+        if command in ("PRIVMSG", "NOTICE") and "!" in origin and self._to_us(args):
+            text = args[-1]
+            if text[:1] == text[-1:] == "\x01" and command == "PRIVMSG":
+                if self._ctcp(origin_nick(origin), text):
+                    return
+            self._route(origin, text)
+
+    def _idle(self):
+        """
+        returns whether the connection is unused for too long and marks it closed.
+        """
+        with _SESSIONS_LOCK:
+            if self.users or time.monotonic() - self.idle_since < self.LINGER:
+                return False
+
+            self.closed.set()  #: not handed out anymore
+            return True
+
+    def run(self):
+        try:
+            self.log.info("Connecting to: {}:{}".format(self.host, self.port))
+            self.sock = socket.create_connection((self.host, self.port), 30)
+            self.sock.settimeout(1)
+
+            self.send("NICK {}".format(self.nick), throttle=False)
+            self.send(
+                "USER {} {} bla :{}".format(self.user[0], self.host, self.user[1]),
+                throttle=False,
+            )
+
+            deadline = time.monotonic() + 30
+            buffer = b""
+            while True:
+                try:
+                    data = self.sock.recv(1 << 12)
+                except socket.timeout:
+                    data = None
+
+                if data == b"":
+                    raise ConnectionError(
+                        "Connection to {}:{} closed".format(self.host, self.port)
+                    )
+
+                if data:
+                    *lines, buffer = (buffer + data).split(b"\n")
+                    for line in lines:
+                        line = line.rstrip(b"\r")
+                        try:
+                            line = line.decode("utf-8")
+                        except UnicodeDecodeError:
+                            line = line.decode("latin1", "replace")
+                        if line:
+                            self._handle(line)
+
+                if not self.registered.is_set():
+                    if time.monotonic() > deadline:
+                        raise socket.timeout(
+                            "Connection to {}:{} failed".format(self.host, self.port)
+                        )
+
+                elif self._idle():
+                    self.log.info(
+                        "Disconnecting from {}:{}".format(self.host, self.port)
+                    )
+                    self.sock.sendall(b"QUIT :byebye\r\n")
+                    break
+
+        except Exception as exc:
+            self.error = exc
+            self.log.error("IRC {}:{}: {}".format(self.host, self.port, exc))
+
+        finally:
+            with _SESSIONS_LOCK:
+                self.closed.set()
+                for key, session in list(_SESSIONS.items()):
+                    if session is self:
+                        del _SESSIONS[key]
+
+            with self.lock:
+                for waiter in self.waiters:
+                    waiter[1].set()
+                self.registered.set()
+
+            if self.sock is not None:
+                self.sock.close()
@@ -1,8 +1,7 @@
 # -*- coding: utf-8 -*-
 
-import errno
 import os
-import select
+import selectors
 import socket
 import struct
 import time
@@ -11,24 +10,38 @@ from ..exceptions import Abort
 
 
 class XDCCRequest:
+    """
+    receives a file by DCC SEND.
+    """
+
+    #: bytes received into the buffer before they are written at once
+    BUFFER_SIZE = 1 << 20
+    #: most bytes received before they are acknowledged, the sender is told what
+    #: arrived anyway whenever it paused
+    ACK_SIZE = 1 << 18
+    #: seconds to wait for data before checking for abort
+    POLL_TIMEOUT = 0.5
+
     def __init__(self, bucket=None, options={}):
         self.proxies = options.get("proxies", {})
         self.bucket = bucket
+        #: size of the socket receive buffer in bytes, 0 for the system default
+        self.recv_buffer = options.get("recv_buffer", 0)
 
         self.fh = None
         self.dccsock = None
 
         self.filesize = 0
         self.received = 0
+        self.acked = 0
         self.speeds = [0.0, 0.0, 0.0]
 
-        self.sleep = 0.000
-        self.last_recv_size = 0
         self.send_64bits_ack = False
 
         self.abort = False
 
         self.status_notify = None
+        self.hasher = None  #: `StreamHasher` fed with the data as it is written
 
     def create_socket(self):
         # proxytype = None
@@ -48,52 +61,69 @@ class XDCCRequest:
         # return sock
 
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        # sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 16384)
+        if self.recv_buffer > 0:
+            #: set before connecting, so the tcp window is scaled accordingly
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.recv_buffer)
 
         return sock
 
     def _write_func(self, buf):
-        size = len(buf)
-
-        self.received += size
-
         self.fh.write(buf)
+        if self.hasher:
+            self.hasher.update(self.received, buf)
 
-        if self.bucket:
-            time.sleep(self.bucket.consumed(size))
-
-        else:
-            # Avoid small buffers, increasing sleep time slowly if buffer size gets smaller
-            # otherwise reduce sleep time percentequal (values are based on tests)
-            # So in general cpu time is saved without reducing bandwidth too much
-
-            if size < self.last_recv_size:
-                self.sleep += 0.002
-            else:
-                self.sleep *= 0.7
-
-            self.last_recv_size = size
+        self.received += len(buf)
 
-            time.sleep(self.sleep)
+        if self.bucket:
+            time.sleep(self.bucket.consumed(len(buf)))
 
     def _send_ack(self):
         # acknowledge data by sending number of received bytes
         try:
             self.dccsock.send(
-                struct.pack("!Q" if self.send_64bits_ack else "!I", self.received)
+                struct.pack(
+                    "!Q" if self.send_64bits_ack else "!I",
+                    self.received if self.send_64bits_ack else self.received & 0xFFFFFFFF,
+                )
             )
+            self.acked = self.received
 
         except socket.error:
             pass
 
-    def download(self, ip, port, filename, status_notify=None, resume=None):
+    def _receive(self, view):
+        """
+        reads what the socket holds into view, returns the bytes read and if the
+        connection was closed.
+        """
+        filled = 0
+        while filled < len(view):
+            try:
+                count = self.dccsock.recv_into(view[filled:])
+
+            except (BlockingIOError, InterruptedError):
+                break
+
+            if not count:
+                return filled, True
+
+            filled += count
+
+        return filled, False
+
+    def download(
+        self, ip, port, filename, status_notify=None, resume=None, hasher=None
+    ):
         self.status_notify = status_notify
+        self.hasher = hasher
+        if hasher:
+            hasher.reset()
         self.send_64bits_ack = not self.filesize < 1 << 32
 
         chunk_name = filename + ".chunk0"
 
         if resume and os.path.exists(chunk_name):
-            self.fh = open(chunk_name, mode="ab")
+            self.fh = open(chunk_name, mode="ab", buffering=0)
             resume_position = self.fh.tell()
             if not resume_position:
                 resume_position = os.stat(chunk_name).st_size
@@ -103,64 +133,67 @@ class XDCCRequest:
             self.received = resume_position
 
         else:
-            self.fh = open(chunk_name, mode="wb")
+            self.fh = open(chunk_name, mode="wb", buffering=0)
+
+        self.acked = self.received
 
         last_update = time.time()
         num_recv_len = 0
 
-        self.dccsock = self.create_socket()
+        buf = memoryview(bytearray(self.BUFFER_SIZE))
 
-        recv_list = [self.dccsock]
+        self.dccsock = self.create_socket()
         self.dccsock.connect((ip, port))
-        self.dccsock.setblocking(0)
-
-        # recv loop for dcc socket
-        while True:
-            if self.abort:
-                self.dccsock.close()
-                self.fh.close()
-                raise Abort
-
-            fdset = select.select(recv_list, [], [], 0.1)
-            if self.dccsock in fdset[0]:
-                try:
-                    data = self.dccsock.recv(16384)
-
-                except socket.error as exc:
-                    if exc.errno == errno.EAGAIN or exc.errno == errno.EWOULDBLOCK:
-                        continue
-
-                    else:
-                        raise
-
-                data_len = len(data)
-                if (
-                    data_len == 0
-                    or self.filesize
-                    and self.received + data_len > self.filesize
-                ):
-                    break
+        self.dccsock.setblocking(False)
 
-                num_recv_len += data_len
+        selector = selectors.DefaultSelector()  #: epoll where available
+        selector.register(self.dccsock, selectors.EVENT_READ)
 
-                self._write_func(data)
-                self._send_ack()
+        try:
+            # recv loop for dcc socket
+            while True:
+                if self.abort:
+                    raise Abort
+
+                closed = False
+                if selector.select(self.POLL_TIMEOUT):
+                    #: never read past the end of the file
+                    size = len(buf)
+                    if self.filesize:
+                        size = max(0, min(size, self.filesize - self.received))
+
+                    filled, closed = self._receive(buf[:size])
+                    if filled:
+                        num_recv_len += filled
+                        self._write_func(buf[:filled])
+
+                    #: acknowledge once the sender paused or enough arrived
+                    if filled < size or self.received - self.acked >= self.ACK_SIZE:
+                        self._send_ack()
+
+                done = self.filesize and self.received >= self.filesize
+                if done or closed:
+                    if self.received != self.acked:
+                        self._send_ack()
+                    break
 
-            now = time.time()
-            timespan = now - last_update
-            if timespan > 1:
-                # calc speed once per second, averaging over 3 seconds
-                self.speeds[2] = self.speeds[1]
-                self.speeds[1] = self.speeds[0]
-                self.speeds[0] = num_recv_len // timespan
+                now = time.time()
+                timespan = now - last_update
+                if timespan > 1:
+                    # calc speed once per second, averaging over 3 seconds
+                    self.speeds[2] = self.speeds[1]
+                    self.speeds[1] = self.speeds[0]
+                    self.speeds[0] = num_recv_len // timespan
 
-                num_recv_len = 0
-                last_update = now
+                    num_recv_len = 0
+                    last_update = now
 
-                self.update_progress()
+                    self.update_progress()
 
-        self.dccsock.close()
-        self.fh.close()
+        finally:
+            selector.close()
+            self.dccsock.close()
+            self.fh.close()
 
         os.rename(chunk_name, filename)
 
@@ -184,7 +217,7 @@ class XDCCRequest:
     @property
     def speed(self):
         speeds = [x for x in self.speeds if x]
-        return sum(speeds) // len(speeds)
+        return sum(speeds) // len(speeds) if speeds else 0
 
     @property
     def percent(self):
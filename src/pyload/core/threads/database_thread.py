@@ -4,17 +4,18 @@ import inspect
 import os
 import shutil
 import sqlite3
+import time
 
 from contextlib import closing
-from queue import Queue
-from threading import Event, Thread
+from queue import Empty, Queue
+from threading import Event, Lock, Thread
 
 from ... import exc_logger
 from ..database import FileDatabaseMethods, StorageDatabaseMethods, UserDatabaseMethods
 from ..utils.struct.style import style
 
 # DATABASE VERSION
-__version__ = 4
+__version__ = 7
 
 # TODO: rewrite using peewee
 class DatabaseJob:
@@ -61,6 +62,30 @@ class DatabaseJob:
         self.done.wait()
 
 
+class DatabaseReader:
+    """
+    Read-only connection used by `style.read` methods outside the database thread.
+    """
+
+    def __init__(self, db, path):
+        self.db = db
+        self.pyload = db.pyload
+
+        self.conn = sqlite3.connect(
+            f"file:{path}?mode=ro", uri=True, check_same_thread=False
+        )
+        self.c = self.conn.cursor()
+        self.c.execute("PRAGMA query_only=ON")
+        db.tune(self.c)
+
+    def close(self):
+        self.c.close()
+        self.conn.close()
+
+    def __getattr__(self, attr):
+        return getattr(self.db, attr)
+
+
 class DatabaseThread(Thread):
 
     subs = []
@@ -81,6 +106,26 @@ class DatabaseThread(Thread):
         self.version_path = os.path.join(datadir, self.VERSION_FILENAME)
 
         self.jobs = Queue()
+        self.outstanding = 0  #: jobs queued or running on the database thread
+        self.outstanding_lock = Lock()
+
+        self.wal_mode = self.pyload.config.get("database", "wal_mode")
+        self.readers = None  #: pool of DatabaseReader, WAL mode only
+
+        # write-behind buffer of coalesced updates, flushed in one transaction
+        self.pending = {}  #: key -> (statement, params)
+        self.pending_lock = Lock()
+        self.flush_scheduled = False
+        self.write_delay = self.pyload.config.get("database", "write_delay") / 1000
+        self.write_batch = self.pyload.config.get("database", "write_batch")
+        self.write_stats = {
+            "updates": 0,  #: updates submitted to the buffer
+            "coalesced": 0,  #: updates merged into an already pending one
+            "flushes": 0,
+            "flushed": 0,  #: rows written by flushes
+            "flush_time": 0.0,  #: total seconds spent flushing
+            "flush_time_max": 0.0,
+        }
 
         self.setuplock = Event()
 
@@ -101,23 +146,70 @@ class DatabaseThread(Thread):
 
         self.c = self.conn.cursor()  #: compatibility
 
+        self.c.execute(
+            "PRAGMA journal_mode={}".format("WAL" if self.wal_mode else "DELETE")
+        )
+        if self.wal_mode:
+            self.c.execute("PRAGMA synchronous=NORMAL")
+        self.tune(self.c)
+
         if convert is not None:
             self._convert_db(convert)
 
         self._create_tables()
         self._migrate_user()
 
+        compacted = self.compact_orders()
+        if compacted:
+            self.pyload.log.debug(f"Compacted the order of {compacted} packages and queues")
+
         self.conn.commit()
 
+        if self.wal_mode:
+            self.readers = Queue()
+            for i in range(max(1, self.pyload.config.get("database", "readers"))):
+                self.readers.put(DatabaseReader(self, self.db_path))
+
         self.setuplock.set()
 
         while True:
-            j = self.jobs.get()
+            try:
+                j = self.jobs.get(timeout=self.write_delay if self.pending else None)
+            except Empty:
+                self.flush()
+                continue
+
+            if j == "wakeup":
+                continue
+
+            # pending updates must land before anything that could read or
+            # overwrite them
+            self.flush()
+
             if j == "quit":
+                self._close_readers()
+                self.c.execute("PRAGMA optimize")
                 self.c.close()
                 self.conn.close()
                 break
-            j.process_job()
+            if j != "flush":
+                j.process_job()
+                with self.outstanding_lock:
+                    self.outstanding -= 1
+
+    def tune(self, c):
+        """
+        applies the configured cache and memory-map sizes to a connection.
+        """
+        cache_size = self.pyload.config.get("database", "cache_size")
+        mmap_size = self.pyload.config.get("database", "mmap_size") << 20
+        c.execute(f"PRAGMA cache_size=-{max(0, cache_size)}")
+        c.execute(f"PRAGMA mmap_size={max(0, mmap_size)}")
+
+    def _close_readers(self):
+        readers, self.readers = self.readers, None
+        while readers is not None and not readers.empty():
+            readers.get().close()
 
     @style.queue
     def shutdown(self):
@@ -167,6 +259,36 @@ class DatabaseThread(Thread):
             'CREATE TABLE IF NOT EXISTS "users" ("id" INTEGER PRIMARY KEY AUTOINCREMENT, "name" TEXT NOT NULL, "email" TEXT DEFAULT "" NOT NULL, "password" TEXT NOT NULL, "role" INTEGER DEFAULT 0 NOT NULL, "permission" INTEGER DEFAULT 0 NOT NULL, "template" TEXT DEFAULT "default" NOT NULL)'
         )
         self.pyload.log.info(self._("Database was converted from v3 to v4."))
+        self._convertV4()
+
+    def _convertV4(self):
+        self.c.execute('DROP VIEW IF EXISTS "pstats"')
+        self._create_package_stats()
+        self.c.execute(
+            'INSERT OR REPLACE INTO "pstats" (id, sizetotal, sizedone, linkstotal, linksdone) \
+        SELECT p.id, IFNULL(SUM(l.size), 0), IFNULL(SUM(CASE WHEN l.status IN (0,4,13) THEN l.size ELSE 0 END), 0), \
+        COUNT(l.id), IFNULL(SUM(l.status IN (0,4,13)), 0) \
+        FROM packages p LEFT OUTER JOIN links l ON p.id = l.package GROUP BY p.id'
+        )
+        self.pyload.log.info(self._("Database was converted from v4 to v5."))
+        self._convertV5()
+
+    def _convertV5(self):
+        self.c.execute('DROP INDEX IF EXISTS "p_id_index"')
+        self._create_indexes()
+        self.c.execute("ANALYZE")
+        self.pyload.log.info(self._("Database was converted from v5 to v6."))
+        self._convertV6()
+
+    def _convertV6(self):
+        #: leave room between the orders, moves only touch the moved row
+        gap = FileDatabaseMethods.ORDER_GAP
+        self.c.execute("UPDATE links SET linkorder=linkorder*?", (gap,))
+        self.c.execute("UPDATE packages SET packageorder=packageorder*?", (gap,))
+        self.c.execute("SELECT DISTINCT queue FROM packages WHERE packageorder < 0")
+        for queue in [r[0] for r in self.c.fetchall()]:
+            self._compact_order("package", queue)
+        self.pyload.log.info(self._("Database was converted from v6 to v7."))
 
     # --convert scripts end
 
@@ -180,7 +302,7 @@ class DatabaseThread(Thread):
         self.c.execute(
             'CREATE TABLE IF NOT EXISTS "links" ("id" INTEGER PRIMARY KEY AUTOINCREMENT, "url" TEXT NOT NULL, "name" TEXT, "size" INTEGER DEFAULT 0 NOT NULL, "status" INTEGER DEFAULT 3 NOT NULL, "plugin" TEXT DEFAULT "DefaultPlugin" NOT NULL, "error" TEXT DEFAULT "", "linkorder" INTEGER DEFAULT 0 NOT NULL, "package" INTEGER DEFAULT 0 NOT NULL, FOREIGN KEY(package) REFERENCES packages(id))'
         )
-        self.c.execute('CREATE INDEX IF NOT EXISTS "p_id_index" ON links(package)')
+        self._create_indexes()
         self.c.execute(
             'CREATE TABLE IF NOT EXISTS "storage" ("id" INTEGER PRIMARY KEY AUTOINCREMENT, "identifier" TEXT NOT NULL, "key" TEXT NOT NULL, "value" TEXT DEFAULT "")'
         )
@@ -188,14 +310,7 @@ class DatabaseThread(Thread):
             'CREATE TABLE IF NOT EXISTS "users" ("id" INTEGER PRIMARY KEY AUTOINCREMENT, "name" TEXT NOT NULL, "email" TEXT DEFAULT "" NOT NULL, "password" TEXT NOT NULL, "role" INTEGER DEFAULT 0 NOT NULL, "permission" INTEGER DEFAULT 0 NOT NULL, "template" TEXT DEFAULT "default" NOT NULL)'
         )
 
-        self.c.execute(
-            'CREATE VIEW IF NOT EXISTS "pstats" AS \
-        SELECT p.id AS id, SUM(l.size) AS sizetotal, COUNT(l.id) AS linkstotal, linksdone, sizedone\
-        FROM packages p JOIN links l ON p.id = l.package LEFT OUTER JOIN\
-        (SELECT p.id AS id, COUNT(*) AS linksdone, SUM(l.size) AS sizedone \
-        FROM packages p JOIN links l ON p.id = l.package AND l.status in (0,4,13) GROUP BY p.id) s ON s.id = p.id \
-        GROUP BY p.id'
-        )
+        self._create_package_stats()
 
         # try to lower ids
         self.c.execute("SELECT max(id) FROM LINKS")
@@ -218,6 +333,59 @@ class DatabaseThread(Thread):
 
         self.c.execute("VACUUM")
 
+    def _create_indexes(self):
+        """
+        create indexes for package, status, plugin, url and name based lookups.
+        """
+        self.c.execute(
+            'CREATE INDEX IF NOT EXISTS "p_id_index" ON links(package, linkorder)'
+        )
+        self.c.execute(
+            'CREATE INDEX IF NOT EXISTS "l_status_index" ON links(status, plugin, package)'
+        )
+        self.c.execute('CREATE INDEX IF NOT EXISTS "l_url_index" ON links(url)')
+        self.c.execute('CREATE INDEX IF NOT EXISTS "l_name_index" ON links(name)')
+        self.c.execute(
+            'CREATE INDEX IF NOT EXISTS "p_queue_index" ON packages(queue, packageorder)'
+        )
+
+    def _create_package_stats(self):
+        """
+        create the pstats table, kept up to date by triggers on packages and links.
+        """
+        done = "(CASE WHEN {0}.status IN (0,4,13) THEN 1 ELSE 0 END)"
+        add = (
+            "UPDATE pstats SET sizetotal=sizetotal+new.size, linkstotal=linkstotal+1, "
+            f"sizedone=sizedone+new.size*{done.format('new')}, "
+            f"linksdone=linksdone+{done.format('new')} WHERE id=new.package;"
+        )
+        sub = (
+            "UPDATE pstats SET sizetotal=sizetotal-old.size, linkstotal=linkstotal-1, "
+            f"sizedone=sizedone-old.size*{done.format('old')}, "
+            f"linksdone=linksdone-{done.format('old')} WHERE id=old.package;"
+        )
+
+        self.c.execute(
+            'CREATE TABLE IF NOT EXISTS "pstats" ("id" INTEGER PRIMARY KEY, "sizetotal" INTEGER DEFAULT 0 NOT NULL, "sizedone" INTEGER DEFAULT 0 NOT NULL, "linkstotal" INTEGER DEFAULT 0 NOT NULL, "linksdone" INTEGER DEFAULT 0 NOT NULL)'
+        )
+        self.c.execute(
+            'CREATE TRIGGER IF NOT EXISTS "pstats_package_insert" AFTER INSERT ON packages BEGIN INSERT OR REPLACE INTO pstats(id) VALUES (new.id); END'
+        )
+        self.c.execute(
+            'CREATE TRIGGER IF NOT EXISTS "pstats_package_delete" AFTER DELETE ON packages BEGIN DELETE FROM pstats WHERE id=old.id; END'
+        )
+        self.c.execute(
+            f'CREATE TRIGGER IF NOT EXISTS "pstats_link_insert" AFTER INSERT ON links BEGIN {add} END'
+        )
+        self.c.execute(
+            f'CREATE TRIGGER IF NOT EXISTS "pstats_link_delete" AFTER DELETE ON links BEGIN {sub} END'
+        )
+        self.c.execute(
+            f'CREATE TRIGGER IF NOT EXISTS "pstats_link_update" AFTER UPDATE OF size, status, package ON links \
+        WHEN old.size != new.size OR old.package != new.package OR {done.format("old")} != {done.format("new")} \
+        BEGIN {sub} {add} END'
+        )
+
     def _migrate_user(self):
         if os.path.exists("pyload.db"):
             self.pyload.log.info(self._("Converting old Django DB"))
@@ -246,24 +414,115 @@ class DatabaseThread(Thread):
 
     @style.queue
     def sync_save(self):
+        self.flush()
         self.conn.commit()
 
     @style.async_
     def rollback(self):
         self.conn.rollback()
 
+    def write_behind(self, key, statement, params):
+        """
+        buffers a write, replacing any pending one with the same key.
+
+        Buffered writes are flushed together by the database thread after
+        `write_delay`, once `write_batch` of them are pending and before any other
+        job is processed.
+        """
+        with self.pending_lock:
+            self.write_stats["updates"] += 1
+            if key in self.pending:
+                self.write_stats["coalesced"] += 1
+            self.pending[key] = (statement, params)
+
+            if len(self.pending) >= self.write_batch and not self.flush_scheduled:
+                self.flush_scheduled = True
+                self.jobs.put("flush")
+            elif len(self.pending) == 1:
+                self.jobs.put("wakeup")  #: start the flush timer
+
+    def flush(self):
+        """
+        writes all pending updates in a single transaction, database thread only.
+        """
+        with self.pending_lock:
+            pending = self.pending
+            self.pending = {}
+            self.flush_scheduled = False
+
+        if not pending:
+            return
+
+        start = time.perf_counter()
+
+        statements = {}
+        for statement, params in pending.values():
+            statements.setdefault(statement, []).append(params)
+
+        self.c.execute("BEGIN")
+        try:
+            for statement, rows in statements.items():
+                self.c.executemany(statement, rows)
+        except Exception:
+            self.c.execute("ROLLBACK")
+            exc_logger.exception(f"Database Error @ flush of {len(pending)} updates")
+        else:
+            self.c.execute("COMMIT")
+
+        elapsed = time.perf_counter() - start
+        self.write_stats["flushes"] += 1
+        self.write_stats["flushed"] += len(pending)
+        self.write_stats["flush_time"] += elapsed
+        self.write_stats["flush_time_max"] = max(
+            self.write_stats["flush_time_max"], elapsed
+        )
+
+    def get_write_stats(self):
+        """
+        returns counters of the write-behind buffer.
+        """
+        with self.pending_lock:
+            stats = dict(self.write_stats, pending=len(self.pending))
+        return stats
+
     def async_(self, f, *args, **kwargs):
         args = (self,) + args
         job = DatabaseJob(f, *args, **kwargs)
-        self.jobs.put(job)
+        self._put(job)
 
     def queue(self, f, *args, **kwargs):
         args = (self,) + args
         job = DatabaseJob(f, *args, **kwargs)
-        self.jobs.put(job)
+        self._put(job)
         job.wait()
         return job.result
 
+    def read(self, f, *args, **kwargs):
+        """
+        runs a read-only method on a reader connection in the calling thread.
+
+        Falls back to the database thread without WAL mode or while jobs are
+        outstanding there, so callers always read their own queued writes;
+        buffered link updates may be seen up to `write_delay` late.
+        """
+        readers = self.readers
+        if readers is None or self.outstanding:
+            return self.queue(f, *args, **kwargs)
+
+        reader = readers.get()
+        try:
+            return f(reader, *args, **kwargs)
+        except Exception:
+            msg = f"Database Error @ {f.__name__} {args} {kwargs}"
+            exc_logger.exception(msg)
+        finally:
+            readers.put(reader)
+
+    def _put(self, job):
+        with self.outstanding_lock:
+            self.outstanding += 1
+        self.jobs.put(job)
+
     @classmethod
     def register_sub(cls, klass):
         cls.subs.append(klass)
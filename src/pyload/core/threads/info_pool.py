@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+
+import time
+from collections import deque
+from threading import Condition, Event, Thread
+
+
+class InfoJob:
+    """
+    batches of one online check request, done once all of them finished.
+    `finished` is called under the lock of the pool, returns True for the last
+    batch.
+    """
+
+    def __init__(self, pending, callback=None):
+        self.pending = pending
+        self.callback = callback  #: called by the worker finishing the last batch
+        self.done = Event()
+        if not pending:
+            self.done.set()
+
+    def finished(self):
+        self.pending -= 1
+        if self.pending <= 0:
+            self.done.set()
+            return True
+        return False
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+
+class InfoPool:
+    """
+    Shared workers calling the `get_info` of hoster plugins.
+
+    Urls are split into batches per plugin. At most `info_threads` batches are
+    fetched at once, at most `info_per_plugin` of them by the same plugin, which
+    also doesn't start more than `info_rate` batches a minute. Results are handed
+    to the callback of the request as soon as a plugin yields them.
+    """
+
+    #: seconds an idle worker waits for new batches before it quits
+    IDLE_TIMEOUT = 60
+
+    def __init__(self, manager):
+        self.m = self.manager = manager
+        self.pyload = manager.pyload
+        self._ = manager._
+
+        self.cond = Condition()
+        self.tasks = deque()  #: (plugin name, plugin, urls, callback, err, job)
+        self.running = {}  #: plugin name -> batches in progress
+        self.next_start = {}  #: plugin name -> earliest start of its next batch
+        self.workers = 0
+        self.idle = 0
+
+    def _limits(self):
+        config = self.pyload.config
+        rate = config.get("download", "info_rate")
+        return (
+            max(1, config.get("download", "info_threads")),
+            max(1, config.get("download", "info_per_plugin")),
+            60.0 / rate if rate > 0 else 0,
+            max(1, config.get("download", "info_batch")),
+        )
+
+    def submit(self, pluginname, plugin, urls, callback, err=False, done=None):
+        """
+        queues the urls to be checked by plugin, callback is called with
+        (pluginname, result) from the workers, done without arguments once all
+        results were handed to callback. returns an `InfoJob`.
+        """
+        threads, per_plugin, interval, size = self._limits()
+        batches = [urls[i : i + size] for i in range(0, len(urls), size)]
+        job = InfoJob(len(batches), done)
+
+        with self.cond:
+            for batch in batches:
+                self.tasks.append((pluginname, plugin, batch, callback, err, job))
+
+            #: start workers as needed, they quit again when idle
+            spawn = min(len(batches) - self.idle, threads - self.workers)
+            for i in range(max(0, spawn)):
+                self.workers += 1
+                Thread(target=self._work, daemon=True).start()
+
+            self.cond.notify_all()
+
+        return job
+
+    def check(self, data, callback, err=False, done=None):
+        """
+        queues the (url, pluginname) pairs of data by plugin, done is called once
+        per plugin, see `submit`. returns the jobs and {pluginname: urls} of
+        plugins without `get_info`.
+        """
+        plugins = {}
+        for url, pluginname in data:
+            plugins.setdefault(pluginname, []).append(url)
+
+        jobs = []
+        unsupported = {}
+        for pluginname, urls in plugins.items():
+            plugin = self.pyload.plugin_manager.get_plugin(pluginname, True)
+            if hasattr(plugin, "get_info"):
+                jobs.append(
+                    self.submit(pluginname, plugin, urls, callback, err, done)
+                )
+            else:
+                unsupported[pluginname] = urls
+
+        return jobs, unsupported
+
+    def _take(self):
+        """
+        returns the first batch whose plugin may start now, or the seconds until
+        one may.
+        """
+        threads, per_plugin, interval, size = self._limits()
+        now = time.time()
+        delay = None
+
+        for task in self.tasks:
+            name = task[0]
+            if self.running.get(name, 0) >= per_plugin:
+                continue
+
+            wait = self.next_start.get(name, 0) - now
+            if wait > 0:
+                delay = wait if delay is None else min(delay, wait)
+                continue
+
+            self.tasks.remove(task)
+            self.running[name] = self.running.get(name, 0) + 1
+            self.next_start[name] = now + interval
+            return task
+
+        return delay
+
+    def _work(self):
+        while True:
+            with self.cond:
+                self.idle += 1
+                deadline = time.time() + self.IDLE_TIMEOUT
+                while True:
+                    task = self._take()
+                    if isinstance(task, tuple):
+                        break
+
+                    timeout = deadline - time.time()
+                    if timeout <= 0:
+                        self.idle -= 1
+                        self.workers -= 1
+                        return
+
+                    self.cond.wait(timeout if task is None else min(task, timeout))
+
+                self.idle -= 1
+
+            pluginname, plugin, urls, callback, err, job = task
+            last = False
+            try:
+                self.fetch(pluginname, plugin, urls, callback, err)
+            finally:
+                with self.cond:
+                    self.running[pluginname] -= 1
+                    if not self.running[pluginname]:
+                        del self.running[pluginname]
+                    last = job.finished()
+                    self.cond.notify_all()
+
+            if last and job.callback is not None:
+                try:
+                    job.callback()
+                except Exception as exc:
+                    self.pyload.log.warning(
+                        self._("Info Fetching for {name} failed | {err}").format(
+                            name=pluginname, err=exc
+                        ),
+                        exc_info=self.pyload.debug > 1,
+                        stack_info=self.pyload.debug > 2,
+                    )
+
+    def fetch(self, pluginname, plugin, urls, cb, err=False):
+        """
+        checks one batch of urls, cached results are used first.
+        """
+        try:
+            cache = self.m.info_cache
+            result = []  #: result loaded from cache
+            process = []  #: urls to process
+            if cache.plugin_ttl(plugin) > 0:
+                for url in urls:
+                    res = cache.get(url)
+                    if res is None:
+                        process.append(url)
+                    else:
+                        #: links are updated by their exact url
+                        result.append(res[:3] + (url,))
+            else:
+                process = urls
+
+            if result:
+                self.pyload.log.debug(
+                    f"Fetched {len(result)} values from cache for {pluginname}"
+                )
+                cb(pluginname, result)
+
+            if process:
+                self.pyload.log.debug(
+                    f"Run Info Fetching for {pluginname} ({len(process)} links)"
+                )
+                for result in plugin.get_info(process):
+                    # result = [ .. (name, size, status, url) .. ]
+                    if not isinstance(result, list):
+                        result = [result]
+
+                    for res in result:
+                        cache.set(res, plugin)
+
+                    cb(pluginname, result)
+
+            self.pyload.log.debug(f"Finished Info Fetching for {pluginname}")
+        except Exception as exc:
+            self.pyload.log.warning(
+                self._("Info Fetching for {name} failed | {err}").format(
+                    name=pluginname, err=exc
+                ),
+                exc_info=self.pyload.debug > 1,
+                stack_info=self.pyload.debug > 2,
+            )
+
+            # generate default results
+            if err:
+                result = [(url, 0, 3, url) for url in urls]
+                cb(pluginname, result)
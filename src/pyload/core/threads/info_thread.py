@@ -2,6 +2,7 @@
 
 import time
 from datetime import timedelta
+from threading import Lock
 
 from ..api import OnlineStatus
 from ..datatypes.pyfile import PyFile
@@ -24,6 +25,7 @@ class InfoThread(PluginThread):
         self.add = add  #: add packages instead of return result
 
         self.cache = []  #: accumulated data
+        self.lock = Lock()
 
         self.start()
 
@@ -31,43 +33,26 @@ class InfoThread(PluginThread):
         """
         run method.
         """
-        plugins = {}
-        container = []
-
-        for url, plugin in self.data:
-            if plugin in plugins:
-                plugins[plugin].append(url)
-            else:
-                plugins[plugin] = [url]
-
         # filter out container plugins
-        for name in self.pyload.plugin_manager.container_plugins:
-            if name in plugins:
-                container.extend((name, url) for url in plugins[name])
-
-                del plugins[name]
+        names = set(self.pyload.plugin_manager.container_plugins)
+        container = [(name, url) for url, name in self.data if name in names]
+        data = [(url, name) for url, name in self.data if name not in names]
 
         # directly write to database
         if self.pid > -1:
-            for pluginname, urls in plugins.items():
-                plugin = self.pyload.plugin_manager.get_plugin(pluginname, True)
-                if hasattr(plugin, "get_info"):
-                    self.fetch_for_plugin(pluginname, plugin, urls, self.update_db)
-                    self.pyload.files.save()
+            self.wait(self.m.info_pool.check(data, self.update_db)[0])
+            self.pyload.files.save()
 
         elif self.add:
-            for pluginname, urls in plugins.items():
-                plugin = self.pyload.plugin_manager.get_plugin(pluginname, True)
-                if hasattr(plugin, "get_info"):
-                    self.fetch_for_plugin(
-                        pluginname, plugin, urls, self.update_cache, True
-                    )
+            jobs, unsupported = self.m.info_pool.check(data, self.update_cache, True)
+
+            for pluginname, urls in unsupported.items():
+                # generate default result
+                result = [(url, 0, 3, url) for url in urls]
 
-                else:
-                    # generate default result
-                    result = [(url, 0, 3, url) for url in urls]
+                self.update_cache(pluginname, result)
 
-                    self.update_cache(pluginname, result)
+            self.wait(jobs)
 
             packs = parse_names((name, url) for name, x, y, url in self.cache)
 
@@ -84,116 +69,74 @@ class InfoThread(PluginThread):
             for name, url in container:
                 # attach container content
                 try:
-                    data = self.decrypt_container(name, url)
+                    data.extend(self.decrypt_container(name, url))
                 except Exception:
                     self.pyload.log.warning(
                         "Could not decrypt container.",
                         exc_info=self.pyload.debug > 1,
                         stack_info=self.pyload.debug > 2,
                     )
-                    data = []
-
-                for url, plugin in data:
-                    if plugin in plugins:
-                        plugins[plugin].append(url)
-                    else:
-                        plugins[plugin] = [url]
 
             self.m.info_results[self.rid] = {}
 
-            for pluginname, urls in plugins.items():
-                plugin = self.pyload.plugin_manager.get_plugin(pluginname, True)
-                if hasattr(plugin, "get_info"):
-                    self.fetch_for_plugin(
-                        pluginname, plugin, urls, self.update_result, True
-                    )
+            jobs, unsupported = self.m.info_pool.check(data, self.update_result, True)
 
-                    # force to process cache
-                    if self.cache:
-                        self.update_result(pluginname, [], True)
+            for pluginname, urls in unsupported.items():
+                # generate default result
+                result = [(url, 0, 3, url) for url in urls]
 
-                else:
-                    # generate default result
-                    result = [(url, 0, 3, url) for url in urls]
+                self.update_result(pluginname, result, True)
 
-                    self.update_result(pluginname, result, True)
+            self.wait(jobs)
+
+            # force to process cache
+            if self.cache:
+                self.update_result(None, [], True)
 
             self.m.info_results[self.rid]["ALL_INFO_FETCHED"] = {}
 
         self.m.timestamp = time.time() + timedelta(minutes=5).seconds
 
+    def wait(self, jobs):
+        """
+        waits until the pool checked all links.
+        """
+        for job in jobs:
+            job.wait()
+
     def update_db(self, plugin, result):
         self.pyload.files.update_file_info(result, self.pid)
 
     def update_result(self, plugin, result, force=False):
         # parse package name and generate result
-        # accumulate results
+        # accumulate results, called by the workers of the info pool
 
-        self.cache.extend(result)
+        with self.lock:
+            self.cache.extend((plugin,) + tuple(x) for x in result)
 
-        if len(self.cache) >= 20 or force:
-            # used for package generating
-            tmp = [
-                (name, (url, OnlineStatus(name, plugin, "unknown", status, int(size))))
-                for name, size, status, url in self.cache
-            ]
+            if len(self.cache) < 20 and not force:
+                return
 
-            data = parse_names(tmp)
-            result = {}
-            for k, v in data.items():
-                for url, status in v:
-                    status.packagename = k
-                    result[url] = status
+            cache, self.cache = self.cache, []
 
-            self.m.set_info_results(self.rid, result)
+        # used for package generating
+        tmp = [
+            (name, (url, OnlineStatus(name, plugin, "unknown", status, int(size))))
+            for plugin, name, size, status, url in cache
+        ]
 
-            self.cache = []
+        data = parse_names(tmp)
+        result = {}
+        for k, v in data.items():
+            for url, status in v:
+                status.packagename = k
+                result[url] = status
 
-    def update_cache(self, plugin, result):
-        self.cache.extend(result)
+        self.m.set_info_results(self.rid, result)
 
-    def fetch_for_plugin(self, pluginname, plugin, urls, cb, err=None):
-        try:
-            result = []  #: result loaded from cache
-            process = []  #: urls to process
-            for url in urls:
-                if url in self.m.info_cache:
-                    result.append(self.m.info_cache[url])
-                else:
-                    process.append(url)
-
-            if result:
-                self.pyload.log.debug(
-                    f"Fetched {len(result)} values from cache for {pluginname}"
-                )
-                cb(pluginname, result)
-
-            if process:
-                self.pyload.log.debug(f"Run Info Fetching for {pluginname}")
-                for result in plugin.get_info(process):
-                    # result = [ .. (name, size, status, url) .. ]
-                    if not isinstance(result, list):
-                        result = [result]
-
-                    for res in result:
-                        self.m.info_cache[res[3]] = res
-
-                    cb(pluginname, result)
-
-            self.pyload.log.debug(f"Finished Info Fetching for {pluginname}")
-        except Exception as exc:
-            self.pyload.log.warning(
-                self._("Info Fetching for {name} failed | {err}").format(
-                    name=pluginname, err=exc
-                ),
-                exc_info=self.pyload.debug > 1,
-                stack_info=self.pyload.debug > 2,
-            )
-
-            # generate default results
-            if err:
-                result = [(url, 0, 3, url) for url in urls]
-                cb(pluginname, result)
+    def update_cache(self, plugin, result):
+        with self.lock:
+            self.cache.extend(result)
 
     def decrypt_container(self, plugin, url):
         data = []
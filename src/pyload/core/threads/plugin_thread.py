@@ -113,7 +113,7 @@ class PluginThread(Thread):
         dump += "\n_PYFILE OBJECT DUMP: \n\n"
 
         for name in dir(pyfile):
-            attr = getattr(pyfile, name)
+            attr = getattr(pyfile, name, None)  #: unset slots
             if not name.endswith("__") and not isinstance(attr, MethodType):
                 dump += f"\t{name:20} = "
                 try:
@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import os
+import zlib
+from threading import Lock
+
+#: checksums of zlib, they can be computed per segment and combined
+CHECKSUMS = {"adler32": 1, "crc32": 0}  #: name -> value of no data
+
+#: bytes read at once when hashing from disk, a multiple of every block size
+READ_SIZE = 4 << 20
+
+_ADLER_BASE = 65521
+
+
+def _gf2_times(mat, vec):
+    res = 0
+    i = 0
+    while vec:
+        if vec & 1:
+            res ^= mat[i]
+        vec >>= 1
+        i += 1
+    return res
+
+
+def _gf2_square(mat):
+    return [_gf2_times(mat, row) for row in mat]
+
+
+def crc32_combine(crc1, crc2, len2):
+    """
+    returns the crc32 of two blocks of data given the crc32 of each, len2 is the
+    size of the second one (port of zlib's `crc32_combine`).
+    """
+    if len2 <= 0:
+        return crc1
+
+    odd = [0xEDB88320] + [1 << i for i in range(31)]  #: one zero bit
+    even = _gf2_square(odd)  #: two zero bits
+    odd = _gf2_square(even)  #: four zero bits
+
+    #: apply len2 zero bytes to crc1
+    while True:
+        even = _gf2_square(odd)
+        if len2 & 1:
+            crc1 = _gf2_times(even, crc1)
+        len2 >>= 1
+        if not len2:
+            break
+
+        odd = _gf2_square(even)
+        if len2 & 1:
+            crc1 = _gf2_times(odd, crc1)
+        len2 >>= 1
+        if not len2:
+            break
+
+    return crc1 ^ crc2
+
+
+def adler32_combine(adler1, adler2, len2):
+    """
+    returns the adler32 of two blocks of data given the adler32 of each, len2 is
+    the size of the second one (port of zlib's `adler32_combine`).
+    """
+    rem = len2 % _ADLER_BASE
+    sum1 = adler1 & 0xFFFF
+    sum2 = (rem * sum1) % _ADLER_BASE
+    sum1 += (adler2 & 0xFFFF) + _ADLER_BASE - 1
+    sum2 += ((adler1 >> 16) & 0xFFFF) + ((adler2 >> 16) & 0xFFFF) + _ADLER_BASE - rem
+
+    if sum1 >= _ADLER_BASE:
+        sum1 -= _ADLER_BASE
+    if sum1 >= _ADLER_BASE:
+        sum1 -= _ADLER_BASE
+    if sum2 >= _ADLER_BASE << 1:
+        sum2 -= _ADLER_BASE << 1
+    if sum2 >= _ADLER_BASE:
+        sum2 -= _ADLER_BASE
+
+    return sum1 | (sum2 << 16)
+
+
+_COMBINE = {"adler32": adler32_combine, "crc32": crc32_combine}
+
+
+def is_supported(algorithm):
+    return algorithm in CHECKSUMS or algorithm in hashlib.algorithms_available
+
+
+class StreamHasher:
+    """
+    Hashes a file while it is written, in any order.
+
+    Checksums of zlib are kept per contiguous segment of written data and are
+    combined at the end, so chunks loaded in parallel are hashed as they arrive.
+    Digests of hashlib can't be combined, they follow the data written from the
+    start of the file and whatever they missed is read from disk in a single
+    sequential pass once the file is complete. A hasher without any writes
+    simply hashes the whole file.
+    """
+
+    def __init__(self, algorithms):
+        self.lock = Lock()
+        self.algorithms = [x for x in dict.fromkeys(algorithms) if is_supported(x)]
+        self.reset()
+
+    def reset(self):
+        """
+        forgets everything written, e.g. once the file was truncated.
+        """
+        with self.lock:
+            self.sums = [x for x in self.algorithms if x in CHECKSUMS]
+            self.hashes = {
+                x: hashlib.new(x) for x in self.algorithms if x not in CHECKSUMS
+            }
+            self.position = 0  #: bytes from the start fed to the hashes
+            self.segments = {}  #: start -> [end, {checksum: value}]
+            self.ends = {}  #: end -> start of the segment
+            self.overlap = False  #: data was written twice, segments are useless
+            self.result = None
+
+    def update(self, offset, data):
+        """
+        hashes data written at offset of the file.
+        """
+        size = len(data)
+        if not size:
+            return
+
+        with self.lock:
+            self.result = None
+
+            if self.sums:
+                start = self.ends.pop(offset, None)
+                if start is None:
+                    if offset in self.segments:
+                        self.overlap = True
+                    start = offset
+                    self.segments[start] = [offset, {x: CHECKSUMS[x] for x in self.sums}]
+
+                segment = self.segments[start]
+                values = segment[1]
+                for name in self.sums:
+                    values[name] = getattr(zlib, name)(data, values[name])
+                segment[0] = offset + size
+                self.ends[offset + size] = start
+
+            if self.hashes and offset < self.position:
+                #: rewritten data, what was hashed is read from disk again
+                self.hashes = {x: hashlib.new(x) for x in self.hashes}
+                self.position = 0
+
+            if self.hashes and offset == self.position:
+                for h in self.hashes.values():
+                    h.update(data)
+                self.position += size
+
+    def _gaps(self, size):
+        """
+        returns the [start, end, values] pieces of [0, size) the checksums have,
+        values is None where the data has to be read from disk.
+        """
+        if not self.sums:
+            return []
+
+        if self.overlap:
+            return [[0, size, None]]
+
+        pieces = []
+        pos = 0
+        for start in sorted(self.segments):
+            end, values = self.segments[start]
+            if start < pos or end > size:  #: overwritten or truncated
+                return [[0, size, None]]
+            if start > pos:
+                pieces.append([pos, start, None])
+            pieces.append([start, end, dict(values)])
+            pos = end
+
+        if pos < size:
+            pieces.append([pos, size, None])
+
+        return pieces
+
+    def hexdigest(self, filename, progress_notify=None, abort=None):
+        """
+        returns {algorithm: hexdigest} of the complete file, or False if aborted.
+        only the data which wasn't hashed while writing is read.
+        """
+        with self.lock:
+            if self.result is not None:
+                return self.result
+
+            size = os.path.getsize(filename)
+            pieces = self._gaps(size)
+            gaps = [x for x in pieces if x[2] is None]
+
+            hashes = self.hashes
+            position = self.position
+            if position > size:  #: truncated
+                hashes = {x: hashlib.new(x) for x in hashes}
+                position = 0
+
+            ranges = [(start, end) for start, end, values in gaps]
+            if hashes and position < size:
+                ranges.append((position, size))
+            ranges = self._merge(ranges)
+
+            hashes = {x: h.copy() for x, h in hashes.items()}
+            for gap in gaps:
+                gap[2] = {x: CHECKSUMS[x] for x in self.sums}
+
+            total = sum(end - start for start, end in ranges)
+            done = 0
+            if progress_notify:
+                progress_notify(0)
+
+            buf = bytearray(READ_SIZE)
+            view = memoryview(buf)
+            with open(filename, mode="rb", buffering=0) as fp:
+                if total and hasattr(os, "posix_fadvise"):
+                    os.posix_fadvise(fp.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+                index = 0  #: first gap not read completely
+                for start, end in ranges:
+                    fp.seek(start)
+                    pos = start
+                    while pos < end:
+                        if abort and abort():
+                            return False
+
+                        count = fp.readinto(view[: min(READ_SIZE, end - pos)])
+                        if not count:
+                            break
+                        data = view[:count]
+
+                        if hashes and pos + count > position:
+                            skip = max(0, position - pos)
+                            for h in hashes.values():
+                                h.update(data[skip:])
+
+                        while index < len(gaps) and gaps[index][1] <= pos:
+                            index += 1
+                        for gap in gaps[index:]:
+                            if gap[0] >= pos + count:
+                                break
+                            values = gap[2]
+                            part = data[max(0, gap[0] - pos) : gap[1] - pos]
+                            for name in self.sums:
+                                values[name] = getattr(zlib, name)(part, values[name])
+
+                        pos += count
+                        done += count
+                        if progress_notify:
+                            progress_notify(done * 100 // total)
+
+            result = {x: h.hexdigest() for x, h in hashes.items()}
+            for name in self.sums:
+                value = CHECKSUMS[name]
+                for start, end, values in pieces:
+                    value = _COMBINE[name](value, values[name], end - start)
+                result[name] = f"{value & 0xFFFFFFFF:08x}"
+
+            if progress_notify:
+                progress_notify(100)
+
+            self.result = result
+            return result
+
+    @staticmethod
+    def _merge(ranges):
+        merged = []
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            elif start < end:
+                merged.append([start, end])
+        return merged
@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 
+from functools import wraps
+
 
 class style:
     db = None
@@ -11,6 +13,7 @@ class style:
     @classmethod
     def inner(cls, fn):
         @staticmethod
+        @wraps(fn)
         def x(*args, **kwargs):
             return fn(cls.db, *args, **kwargs)
 
@@ -19,14 +22,25 @@ class style:
     @classmethod
     def queue(cls, fn):
         @staticmethod
+        @wraps(fn)
         def x(*args, **kwargs):
             return cls.db.queue(fn, *args, **kwargs)
 
         return x
 
+    @classmethod
+    def read(cls, fn):
+        @staticmethod
+        @wraps(fn)
+        def x(*args, **kwargs):
+            return cls.db.read(fn, *args, **kwargs)
+
+        return x
+
     @classmethod
     def async_(cls, fn):
         @staticmethod
+        @wraps(fn)
         def x(*args, **kwargs):
             return cls.db.async_(fn, *args, **kwargs)
 
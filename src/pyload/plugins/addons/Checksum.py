@@ -3,71 +3,36 @@ import hashlib
 import os
 import re
 import time
-import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from threading import Event
 
 from pyload.core.utils import format
+from pyload.core.utils.hashing import StreamHasher, is_supported
 
 from ..base.addon import BaseAddon, threaded
 
 
-def compute_checksum(local_file, algorithm, progress_notify=None, abort=None):
-    file_size = os.stat(local_file).st_size
-    processed = 0
-    if progress_notify:
-        progress_notify(0)
+def compute_checksum(local_file, algorithm, progress_notify=None, abort=None, hasher=None):
+    """
+    returns the hexdigest of local_file, None if the algorithm is unsupported or
+    False if aborted. hasher is the `StreamHasher` the file was hashed with while
+    it was downloaded, only the data it missed is read then.
+    """
+    if not is_supported(algorithm):
+        return None
 
-    try:
-        if algorithm in getattr(
-            hashlib,
-            "algorithms",
-            ("md5", "sha1", "sha224", "sha256", "sha384", "sha512"),
-        ):
-            h = getattr(hashlib, algorithm)()
-
-            with open(local_file, mode="rb") as fp:
-                for chunk in iter(lambda: fp.read(128 * h.block_size), ""):
-                    if abort and abort():
-                        return False
-
-                    h.update(chunk)
-                    processed += len(chunk)
-
-                    if progress_notify:
-                        progress_notify(processed * 100 // file_size)
-
-            return h.hexdigest()
-
-        elif algorithm in ("adler32", "crc32"):
-            hf = getattr(zlib, algorithm)
-            last = 0
-
-            with open(local_file, mode="rb") as fp:
-                for chunk in iter(lambda: fp.read(8192), ""):
-                    if abort and abort():
-                        return False
+    if hasher is None or algorithm not in hasher.algorithms:
+        hasher = StreamHasher([algorithm])
 
-                    last = hf(chunk, last)
-                    processed += len(chunk)
-
-                    if progress_notify:
-                        progress_notify(processed * 100 // file_size)
-
-            #: zlib sometimes return negative value
-            return "{:x}".format((2 ** 32 + last) & 0xFFFFFFFF)
-
-        else:
-            return None
-
-    finally:
-        if progress_notify:
-            progress_notify(100)
+    result = hasher.hexdigest(local_file, progress_notify, abort)
+    return result and result[algorithm]
 
 
 class Checksum(BaseAddon):
     __name__ = "Checksum"
     __type__ = "addon"
-    __version__ = "0.34"
+    __version__ = "0.36"
     __status__ = "testing"
 
     __config__ = [
@@ -82,6 +47,13 @@ class Checksum(BaseAddon):
         ("max_tries", "int", "Number of retries", 2),
         ("retry_action", "fail;nothing", "What to do if all retries fail?", "fail"),
         ("wait_time", "int", "Time to wait before each retry (seconds)", 1),
+        (
+            "stream_hash",
+            "str",
+            "Algorithms hashed while downloading besides the ones the hoster reports (comma separated)",
+            "",
+        ),
+        ("verify_threads", "int", "Files verified at once", 2),
     ]
 
     __description__ = """Verify downloaded file size and checksum"""
@@ -93,6 +65,9 @@ class Checksum(BaseAddon):
         ("GammaC0de", "nitzo2001[AT]yahoo[DOT]com"),
     ]
 
+    #: most files whose download hashes are kept for package verification
+    MAX_HASHERS = 1000
+
     _methodmap = {"sfv": "crc32", "crc": "crc32", "hash": "md5"}
 
     _regexmap = {
@@ -124,6 +99,48 @@ class Checksum(BaseAddon):
 
         self.retries = {}
 
+        #: file id -> `StreamHasher` of its last download
+        self.hashers = OrderedDict()
+
+    def download_start(self, pyfile, url, filename):
+        """
+        Lets the download hash the file while it is written, with the algorithms
+        the hoster already told and the configured ones.
+        """
+        if not self.config.get("check_checksum"):
+            return
+
+        data = {}
+        for attr in ("check_data", "api_data", "info"):
+            value = getattr(pyfile.plugin, attr, None)
+            if isinstance(value, dict):
+                data = value
+                break
+
+        hashes = data.get("hash")
+        if not isinstance(hashes, dict):
+            hashes = {}
+
+        algorithms = [
+            key.replace("-", "").lower()
+            for key in self.algorithms
+            if key in data or key in hashes
+        ]
+        algorithms.extend(
+            x.strip().lower() for x in self.config.get("stream_hash").split(",")
+        )
+
+        hasher = StreamHasher(x for x in algorithms if x)
+        if not hasher.algorithms:
+            return
+
+        pyfile.plugin.hasher = hasher
+        with self.lock:
+            self.hashers[pyfile.id] = hasher
+            self.hashers.move_to_end(pyfile.id)
+            while len(self.hashers) > self.MAX_HASHERS:
+                self.hashers.popitem(last=False)
+
     def download_finished(self, pyfile):
         """
         Compute checksum for the downloaded file and compare it with the hash provided
@@ -199,6 +216,7 @@ class Checksum(BaseAddon):
                                 key.replace("-", "").lower(),
                                 progress_notify=pyfile.set_progress,
                                 abort=lambda: pyfile.abort,
+                                hasher=self.hashers.get(pyfile.id),
                             )
                         finally:
                             pyfile.set_status("processing")
@@ -269,8 +287,33 @@ class Checksum(BaseAddon):
         self.verify_package(pypack, event_finished)
         event_finished.wait()  #: Postpone `all_downloads_processed` event until we actually finish
 
+    def verify_file(self, local_file, algorithm, fid, thread):
+        """
+        returns the checksum of a file listed in a hash file and its pyfile, if
+        it belongs to the package.
+        """
+        if fid is None:
+            return compute_checksum(local_file, algorithm), None
+
+        pyfile = self.pyload.files.get_file(fid)
+        pyfile.set_custom_status(self._("checksum verifying"))
+        thread.add_active(pyfile)
+        try:
+            checksum = compute_checksum(
+                local_file,
+                algorithm,
+                progress_notify=pyfile.set_progress,
+                abort=lambda: pyfile.abort,
+                hasher=self.hashers.get(fid),
+            )
+        finally:
+            thread.finish_file(pyfile)
+
+        return checksum, pyfile
+
     @threaded
     def verify_package(self, pypack, event_finished, thread=None):
+        files_ids = {}
         try:
             dl_folder = os.path.join(
                 self.pyload.config.get("general", "storage_folder"), pypack.folder, ""
@@ -279,48 +322,50 @@ class Checksum(BaseAddon):
             pdata = list(pypack.get_children().items())
             files_ids = {fdata["name"]: fdata["id"] for fid, fdata in pdata}
             failed_queue = []
-            for fid, fdata in pdata:
-                file_type = os.path.splitext(fdata["name"])[1][1:].lower()
 
-                if file_type not in self.formats:
-                    continue
+            #: the files listed by every hash file, verified concurrently
+            hash_files = []
+            with ThreadPoolExecutor(
+                max(1, self.config.get("verify_threads"))
+            ) as pool:
+                for fid, fdata in pdata:
+                    file_type = os.path.splitext(fdata["name"])[1][1:].lower()
 
-                hash_file = os.fsdecode(os.path.join(dl_folder, fdata["name"]))
-                if not os.path.isfile(hash_file):
-                    self.log_warning(self._("File not found"), fdata["name"])
-                    continue
+                    if file_type not in self.formats:
+                        continue
 
-                with open(hash_file) as fp:
-                    text = fp.read()
+                    hash_file = os.fsdecode(os.path.join(dl_folder, fdata["name"]))
+                    if not os.path.isfile(hash_file):
+                        self.log_warning(self._("File not found"), fdata["name"])
+                        continue
 
-                failed = []
-                for m in re.finditer(
-                    self._regexmap.get(file_type, self._regexmap["default"]), text, re.M
-                ):
-                    data = m.groupdict()
-                    self.log_debug(fdata["name"], data)
-
-                    local_file = os.fsdecode(os.path.join(dl_folder, data["NAME"]))
-                    algorithm = self._methodmap.get(file_type, file_type)
-
-                    pyfile = None
-                    fid = files_ids.get(data["NAME"], None)
-                    if fid is not None:
-                        pyfile = self.pyload.files.get_file(fid)
-                        pyfile.set_custom_status(self._("checksum verifying"))
-                        thread.add_active(pyfile)
-                        try:
-                            checksum = compute_checksum(
-                                local_file,
-                                algorithm,
-                                progress_notify=pyfile.set_progress,
-                                abort=lambda: pyfile.abort,
-                            )
-                        finally:
-                            thread.finish_file(pyfile)
+                    with open(hash_file) as fp:
+                        text = fp.read()
 
-                    else:
-                        checksum = compute_checksum(local_file, algorithm)
+                    entries = []
+                    for m in re.finditer(
+                        self._regexmap.get(file_type, self._regexmap["default"]),
+                        text,
+                        re.M,
+                    ):
+                        data = m.groupdict()
+                        self.log_debug(fdata["name"], data)
+
+                        local_file = os.fsdecode(os.path.join(dl_folder, data["NAME"]))
+                        algorithm = self._methodmap.get(file_type, file_type)
+                        fid = files_ids.get(data["NAME"], None)
+
+                        future = pool.submit(
+                            self.verify_file, local_file, algorithm, fid, thread
+                        )
+                        entries.append((data, local_file, algorithm, fid, future))
+
+                    hash_files.append((fdata["name"], entries))
+
+            for name, entries in hash_files:
+                failed = []
+                for data, local_file, algorithm, fid, future in entries:
+                    checksum, pyfile = future.result()
 
                     if checksum is False:
                         continue
@@ -365,7 +410,7 @@ class Checksum(BaseAddon):
                     self.log_info(
                         self._(
                             'All files specified by "{}" verified successfully'
-                        ).format(fdata["name"])
+                        ).format(name)
                     )
 
             if failed_queue:
@@ -374,6 +419,10 @@ class Checksum(BaseAddon):
                 )
 
         finally:
+            with self.lock:
+                for fid in files_ids.values():
+                    self.hashers.pop(fid, None)
+
             event_finished.set()
 
     @threaded
@@ -54,7 +54,7 @@ class ArchiveQueue:
 class ExtractArchive(BaseAddon):
     __name__ = "ExtractArchive"
     __type__ = "addon"
-    __version__ = "1.69"
+    __version__ = "1.70"
     __status__ = "testing"
 
     __config__ = [
@@ -104,39 +104,56 @@ class ExtractArchive(BaseAddon):
 
         self.extracting = False
         self.last_package = False
-        self.extractors = []
+        self.extractors = None  #: looked for when the first archive is extracted
         self.passwords = []
         self.repair = False
 
     def activate(self):
-        for p in ("HjSplit", "UnRar", "SevenZip", "UnZip", "UnTar"):
-            try:
-                module = self.pyload.plugin_manager.load_module("extractor", p)
-                klass = getattr(module, p)
-                if klass.find():
-                    self.extractors.append(klass)
-                if klass.REPAIR:
-                    self.repair = self.config.get("repair")
-
-            except OSError as exc:
-                if exc.errno == 2:
-                    self.log_warning(self._("No {} installed").format(p))
-                else:
+        if self.queue.get():
+            self.extract_queued()  #: Resume unfinished extractions
+
+    def find_extractors(self):
+        """
+        Probe the extractors once, results of external programs are cached
+        """
+        with self.lock:
+            if self.extractors is not None:
+                return self.extractors
+
+            extractors = []
+            cache = self.db.retrieve("extractors", default={})
+            for p in ("HjSplit", "UnRar", "SevenZip", "UnZip", "UnTar"):
+                try:
+                    module = self.pyload.plugin_manager.load_module("extractor", p)
+                    klass = getattr(module, p)
+                    if klass.find_cached(cache):
+                        extractors.append(klass)
+                    if klass.REPAIR:
+                        self.repair = self.config.get("repair")
+
+                except OSError as exc:
+                    if exc.errno == 2:
+                        self.log_warning(self._("No {} installed").format(p))
+                    else:
+                        self.log_warning(self._("Could not activate: {}").format(p), exc)
+
+                except Exception as exc:
                     self.log_warning(self._("Could not activate: {}").format(p), exc)
 
-            except Exception as exc:
-                self.log_warning(self._("Could not activate: {}").format(p), exc)
+            self.db.store("extractors", cache)
 
-        if self.extractors:
-            self.log_debug(
-                *[
-                    "Found {} {}".format(Extractor.__name__, Extractor.VERSION)
-                    for Extractor in self.extractors
-                ]
-            )
-            self.extract_queued()  #: Resume unfinished extractions
-        else:
-            self.log_info(self._("No Extract plugins activated"))
+            if extractors:
+                self.log_debug(
+                    *[
+                        "Found {} {}".format(Extractor.__name__, Extractor.VERSION)
+                        for Extractor in extractors
+                    ]
+                )
+            else:
+                self.log_info(self._("No Extract plugins activated"))
+
+            self.extractors = extractors
+            return extractors
 
     @threaded
     def extract_queued(self, thread):
@@ -204,6 +221,8 @@ class ExtractArchive(BaseAddon):
         if not ids:
             return False
 
+        extractors = self.find_extractors()
+
         extracted = []
         failed = []
 
@@ -286,7 +305,7 @@ class ExtractArchive(BaseAddon):
                         if any(
                             [
                                 Extractor.archivetype(file_id[1]) in extensions
-                                for Extractor in self.extractors
+                                for Extractor in extractors
                             ]
                         )
                     ]
@@ -295,7 +314,7 @@ class ExtractArchive(BaseAddon):
                 #: This is important because, for example, UnRar ignores preceding parts in listing mode
                 files_ids.sort(key=lambda file_id: file_id[1])
 
-                for Extractor in self.extractors:
+                for Extractor in extractors:
                     targets = Extractor.get_targets(files_ids)
                     if targets:
                         self.log_debug(
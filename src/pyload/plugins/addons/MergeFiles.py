@@ -1,73 +1,286 @@
 # -*- coding: utf-8 -*-
+import errno
 import os
 import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event, Lock
 
 from ..base.addon import BaseAddon, threaded
 
+#: bytes copied by one call, progress and abort are checked in between
+COPY_SIZE = 64 << 20
+
+#: buffer of the copy in userspace, if the kernel can't copy between the files
+BUFFER_SIZE = 1 << 20
+
+#: errors telling the kernel can't copy between these files
+_UNSUPPORTED = {
+    errno.EBADF,
+    errno.EINVAL,
+    errno.ENOSYS,
+    errno.ENOTSOCK,
+    errno.EOPNOTSUPP,
+    errno.EXDEV,
+    getattr(errno, "ENOTSUP", errno.EOPNOTSUPP),
+}
+
+
+def _copy_file_range(infd, outfd, offset, count):
+    return os.copy_file_range(infd, outfd, count, offset)
+
+
+def _sendfile(infd, outfd, offset, count):
+    return os.sendfile(outfd, infd, offset, count)
+
+
+def _kernel_copies():
+    copies = []
+    if hasattr(os, "copy_file_range"):
+        copies.append(_copy_file_range)
+    #: elsewhere sendfile only writes to sockets
+    if hasattr(os, "sendfile") and sys.platform.startswith("linux"):
+        copies.append(_sendfile)
+    return copies
+
+
+def copy_file(src, dst, progress=None, abort=None):
+    """
+    appends the content of src to dst at its position, both unbuffered files.
+    the data is copied by the kernel if possible. progress is called with the
+    bytes copied so far, returns their total or False if aborted.
+    """
+    infd, outfd = src.fileno(), dst.fileno()
+    size = os.fstat(infd).st_size
+    copies = _kernel_copies()
+    buf = None
+    copied = 0
+
+    while copied < size:
+        if abort and abort():
+            return False
+
+        count = min(COPY_SIZE, size - copied)
+        if copies:
+            try:
+                sent = copies[0](infd, outfd, copied, count)
+            except OSError as exc:
+                if exc.errno not in _UNSUPPORTED:
+                    raise
+                copies.pop(0)  #: try the next way
+                continue
+        else:
+            if buf is None:
+                buf = memoryview(bytearray(BUFFER_SIZE))
+            src.seek(copied)
+            sent = 0
+            while sent < count:
+                read = src.readinto(buf[: min(BUFFER_SIZE, count - sent)])
+                if not read:
+                    break
+                written = 0
+                while written < read:
+                    written += dst.write(buf[written:read])
+                sent += read
+
+        if not sent:  #: shrunk in the meantime
+            break
+
+        copied += sent
+        if progress:
+            progress(copied)
+
+    return copied
+
 
 class MergeFiles(BaseAddon):
     __name__ = "MergeFiles"
     __type__ = "addon"
-    __version__ = "0.22"
+    __version__ = "0.24"
     __status__ = "testing"
 
-    __config__ = [("enabled", "bool", "Activated", False)]
+    __config__ = [
+        ("enabled", "bool", "Activated", False),
+        ("merge_early", "bool", "Merge parts as soon as they are downloaded", False),
+        ("max_merges", "int", "Files merged at once", 2),
+    ]
 
     __description__ = """Merges parts splitted with hjsplit"""
     __license__ = "GPLv3"
     __authors__ = [("and9000", "me@has-no-mail.com")]
 
-    BUFFER_SIZE = 4096
+    #: least seconds between two progress updates of a part
+    PROGRESS_INTERVAL = 1
 
-    @threaded
-    def package_finished(self, pack):
-        files = {}
-        fid_dict = {}
-        for fid, data in pack.get_children().items():
-            if re.search(r"\.\d{3}$", data["name"]):
-                if data["name"][:-4] not in files:
-                    files[data["name"][:-4]] = []
-                files[data["name"][:-4]].append(data["name"])
-                files[data["name"][:-4]].sort()
-                fid_dict[data["name"]] = fid
+    _PART_RE = re.compile(r"\.(\d{3})$")
+
+    def init(self):
+        #: path of a merged file -> (package id, [(part name, size, mtime)]) of the
+        #: parts it contains
+        self.merged = {}
+        self.locks = {}  #: path of a merged file -> lock of its merge
+        self.stopping = Event()
+
+    def activate(self):
+        self.stopping.clear()
+
+    def deactivate(self):
+        self.stopping.set()
 
+    def exit(self):
+        self.stopping.set()
+
+    def _folder(self, pack):
         dl_folder = self.pyload.config.get("general", "storage_folder")
 
         if self.pyload.config.get("general", "folder_per_package"):
             dl_folder = os.path.join(dl_folder, pack.folder)
 
-        for name, file_list in files.items():
-            self.log_info(self._("Starting merging of"), name)
+        return dl_folder
+
+    def _split_sets(self, pack):
+        """
+        returns {merged name: sorted part names} and {part name: (id, status)} of
+        the parts in pack.
+        """
+        files = {}
+        parts = {}
+        for fid, data in pack.get_children().items():
+            if self._PART_RE.search(data["name"]):
+                files.setdefault(data["name"][:-4], []).append(data["name"])
+                parts[data["name"]] = (fid, data["status"])
+
+        for names in files.values():
+            names.sort()
+
+        return files, parts
+
+    def download_finished(self, pyfile):
+        if self.config.get("merge_early") and self._PART_RE.search(pyfile.name):
+            self.merge_early(pyfile.package(), pyfile.name)
 
-            with open(os.path.join(dl_folder, name), mode="wb") as final_file:
-                for splitted_file in file_list:
+    @threaded
+    def merge_early(self, pack, part):
+        """
+        merges the parts of the set of part which are downloaded from the first
+        one on.
+        """
+        files, parts = self._split_sets(pack)
+        ready = []
+        for i, name in enumerate(files.get(part[:-4], []), 1):
+            number = int(self._PART_RE.search(name).group(1))
+            if number != i or (name != part and parts[name][1] not in (0, 4)):
+                break  #: missing or not finished yet
+            ready.append(name)
+
+        if ready:
+            self.merge(pack, part[:-4], ready, parts, final=False)
+
+    def package_deleted(self, pid):
+        with self.lock:
+            for filename, (pack_id, merged) in list(self.merged.items()):
+                if pack_id == pid:
+                    del self.merged[filename]
+                    self.locks.pop(filename, None)
+
+    @threaded
+    def package_finished(self, pack):
+        files, parts = self._split_sets(pack)
+
+        with ThreadPoolExecutor(max(1, self.config.get("max_merges"))) as pool:
+            futures = [
+                pool.submit(self.merge, pack, name, file_list, parts)
+                for name, file_list in files.items()
+            ]
+
+        for future in futures:
+            try:
+                future.result()
+
+            except Exception as exc:
+                self.log_error(
+                    exc,
+                    exc_info=self.pyload.debug > 1,
+                    stack_info=self.pyload.debug > 2,
+                )
+
+    def _merged_parts(self, filename, pack, file_list):
+        """
+        returns the parts at the start of file_list already merged into filename
+        and unchanged since, with their size.
+        """
+        pack_id, merged = self.merged.get(filename, (pack.id, []))
+        if pack_id != pack.id or not os.path.isfile(filename):
+            return [], 0
+
+        valid = []
+        offset = 0
+        for (name, size, mtime), part in zip(merged, file_list):
+            try:
+                st = os.stat(os.path.join(os.path.dirname(filename), name))
+            except OSError:
+                break
+            if name != part or (st.st_size, st.st_mtime_ns) != (size, mtime):
+                break
+            valid.append((name, size, mtime))
+            offset += size
+
+        if os.path.getsize(filename) < offset:
+            return [], 0
+
+        return valid, offset
+
+    def merge(self, pack, name, file_list, parts, final=True):
+        """
+        appends the parts of file_list not merged yet to the file name, in order.
+        returns False if aborted or failed.
+        """
+        dl_folder = self._folder(pack)
+        filename = os.path.join(dl_folder, name)
+
+        with self.lock:
+            lock = self.locks.setdefault(filename, Lock())
+
+        with lock:
+            merged, offset = self._merged_parts(filename, pack, file_list)
+            todo = file_list[len(merged) :]
+            if not todo and (merged or not final):
+                return True
+
+            if not merged:
+                self.log_info(self._("Starting merging of"), name)
+
+            with open(filename, mode="rb+" if merged else "wb", buffering=0) as final_file:
+                final_file.seek(offset)
+                final_file.truncate()
+
+                copied = None
+                failed = False
+                for splitted_file in todo:
                     self.log_debug("Merging part", splitted_file)
 
-                    pyfile = self.pyload.files.get_file(fid_dict[splitted_file])
+                    pyfile = self.pyload.files.get_file(parts[splitted_file][0])
 
                     pyfile.set_status("processing")
-
+                    copied = None
                     try:
-                        with open(
-                            os.path.join(dl_folder, splitted_file), "rb"
-                        ) as s_file:
-                            size_written = 0
-                            s_file_size = int(
-                                os.path.getsize(os.path.join(dl_folder, splitted_file))
+                        path = os.path.join(dl_folder, splitted_file)
+                        st = os.stat(path)
+                        with open(path, mode="rb", buffering=0) as s_file:
+                            copied = copy_file(
+                                s_file,
+                                final_file,
+                                self._progress(pyfile, st.st_size),
+                                lambda: pyfile.abort or self.stopping.is_set(),
                             )
-                            while True:
-                                f_buffer = s_file.read(self.BUFFER_SIZE)
-                                if f_buffer:
-                                    final_file.write(f_buffer)
-                                    size_written += self.BUFFER_SIZE
-                                    pyfile.set_progress(
-                                        (size_written * 100) // s_file_size
-                                    )
-                                else:
-                                    break
-                        self.log_debug("Finished merging part", splitted_file)
+
+                        if copied is not False:
+                            merged.append((splitted_file, st.st_size, st.st_mtime_ns))
+                            self.log_debug("Finished merging part", splitted_file)
 
                     except Exception as exc:
+                        failed = True
                         self.log_error(
                             exc,
                             exc_info=self.pyload.debug > 1,
@@ -76,7 +289,45 @@ class MergeFiles(BaseAddon):
 
                     finally:
                         pyfile.set_progress(100)
-                        pyfile.set_status("finished")
+                        if failed:
+                            pyfile.set_status("failed")
+                        else:
+                            pyfile.set_status(
+                                "aborted" if copied is False else "finished"
+                            )
                         pyfile.release()
 
-            self.log_info(self._("Finished merging of"), name)
+                    if copied is False or failed:
+                        break
+
+            #: the output ends with a partial part, appending more would corrupt it
+            if copied is False or failed:
+                if failed:
+                    self.log_error(self._("Merging of {} failed").format(name))
+                else:
+                    self.log_warning(self._("Merging of {} aborted").format(name))
+                self.merged.pop(filename, None)
+                os.remove(filename)
+                return False
+
+            self.merged[filename] = (pack.id, merged)
+
+            if final:
+                self.log_info(self._("Finished merging of"), name)
+
+        return True
+
+    def _progress(self, pyfile, size):
+        """
+        returns a callback updating the progress of pyfile at most every
+        `PROGRESS_INTERVAL` seconds.
+        """
+        last = [time.time()]
+
+        def notify(copied):
+            now = time.time()
+            if now - last[0] >= self.PROGRESS_INTERVAL:
+                last[0] = now
+                pyfile.set_progress(copied * 100 // size if size else 100)
+
+        return notify
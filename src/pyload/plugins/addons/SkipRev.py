@@ -1,15 +1,13 @@
 # -*- coding: utf-8 -*-
 import re
 
-from pyload.core.datatypes.pyfile import PyFile
-
 from ..base.addon import BaseAddon
 
 
 class SkipRev(BaseAddon):
     __name__ = "SkipRev"
     __type__ = "addon"
-    __version__ = "0.38"
+    __version__ = "0.39"
     __status__ = "testing"
 
     __config__ = [
@@ -26,19 +24,8 @@ class SkipRev(BaseAddon):
         return pyfile.pluginclass.get_info(pyfile.url)["name"]
 
     def _create_pyfile(self, data):
-        pylink = self.pyload.api._convert_py_file(data)
-        return PyFile(
-            self.pyload.files,
-            pylink.fid,
-            pylink.url,
-            pylink.name,
-            pylink.size,
-            pylink.status,
-            pylink.error,
-            pylink.plugin,
-            pylink.package_id,
-            pylink.order,
-        )
+        #: the manager's instance, the order of the api data is only a position
+        return self.pyload.files.get_file(data["id"])
 
     def download_preparing(self, pyfile):
         name = self._name(pyfile)
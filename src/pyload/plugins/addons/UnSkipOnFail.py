@@ -1,15 +1,12 @@
 # -*- coding: utf-8 -*-
 
-
-from pyload.core.datatypes.pyfile import PyFile
-
 from ..base.addon import BaseAddon
 
 
 class UnSkipOnFail(BaseAddon):
     __name__ = "UnSkipOnFail"
     __type__ = "addon"
-    __version__ = "0.14"
+    __version__ = "0.15"
     __status__ = "testing"
 
     __config__ = [("enabled", "bool", "Activated", True)]
@@ -34,8 +31,8 @@ class UnSkipOnFail(BaseAddon):
             #: "link" has to be a valid FileData object,
             #: "new_status" has to be a valid status name
             #: (i.e. "queued" for this Plugin)
-            #: It creates a temporary PyFile object using
-            #: "link" data, changes its status, and tells
+            #: It gets the PyFile object of "link"
+            #: from the manager, changes its status, and tells
             #: The pyload.files-manager to save its data.
             pyfile_new = self._create_pyfile(link)
 
@@ -75,15 +72,5 @@ class UnSkipOnFail(BaseAddon):
                     return link
 
     def _create_pyfile(self, pylink):
-        return PyFile(
-            self.pyload.files,
-            pylink.fid,
-            pylink.url,
-            pylink.name,
-            pylink.size,
-            pylink.status,
-            pylink.error,
-            pylink.plugin,
-            pylink.package_id,
-            pylink.order,
-        )
+        #: the manager's instance, the order of the api data is only a position
+        return self.pyload.files.get_file(pylink.fid)
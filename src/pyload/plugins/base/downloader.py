@@ -16,7 +16,7 @@ from .hoster import BaseHoster
 class BaseDownloader(BaseHoster):
     __name__ = "BaseDownloader"
     __type__ = "downloader"
-    __version__ = "0.80"
+    __version__ = "0.83"
     __status__ = "stable"
 
     __pattern__ = r"^unmatchable$"
@@ -64,11 +64,20 @@ class BaseDownloader(BaseHoster):
         #: Download is possible with premium account only, don't fallback to free download
         self.no_fallback = False
 
+        #: `StreamHasher` hashing the next download while it is written, set by addons
+        self.hasher = None
+
+        #: callable(offset, data) returning what is written instead of the data
+        #: loaded at offset, of the same size (e.g. to decrypt while downloading)
+        self.transform = None
+
     def setup_base(self):
         self._last_download = ""
         self.last_check = None
         self.restart_free = False
         self.no_fallback = False
+        self.hasher = None
+        self.transform = None
 
         if self.account:
             self.chunk_limit = -1  #: -1 for unlimited
@@ -236,6 +245,14 @@ class BaseDownloader(BaseHoster):
         else:
             chunks = min(dl_chunks, chunk_limit)
 
+        #: respect the speed limits of the package and the file too
+        self.req.bucket = self.pyload.request_factory.get_bucket(
+            self.classname,
+            self.account.user if self.account else None,
+            self.pyfile.packageid,
+            self.pyfile.id,
+        )
+
         try:
             newname = self.req.http_download(
                 url,
@@ -249,6 +266,8 @@ class BaseDownloader(BaseHoster):
                 resume=resume,
                 status_notify=self._on_notification,
                 disposition=disposition,
+                hasher=self.hasher,
+                transform=self.transform,
             )
 
         except IOError as exc:
@@ -2,6 +2,7 @@
 
 import os
 import re
+import shutil
 
 from .plugin import BasePlugin
 
@@ -27,7 +28,7 @@ class PasswordError(Exception):
 class BaseExtractor(BasePlugin):
     __name__ = "BaseExtractor"
     __type__ = "base"
-    __version__ = "0.49"
+    __version__ = "0.50"
     __status__ = "stable"
 
     __description__ = """Base extractor plugin"""
@@ -42,6 +43,11 @@ class BaseExtractor(BasePlugin):
     REPAIR = False
     VERSION = None
 
+    #: external programs `find` runs, its result is cached while they don't change
+    TOOLS = ()
+    #: class attributes set by `find`
+    PROBED = ("CMD", "VERSION", "REPAIR")
+
     _RE_PART = re.compile(r"")
 
     @classmethod
@@ -88,6 +94,48 @@ class BaseExtractor(BasePlugin):
         """
         pass
 
+    @classmethod
+    def tools_stamp(cls):
+        """
+        returns path, mtime and size of the programs in TOOLS.
+        """
+        stamp = []
+        for tool in cls.TOOLS:
+            path = shutil.which(tool)
+            if path is None:
+                stamp.append(None)
+            else:
+                st = os.stat(path)
+                stamp.append([path, st.st_mtime_ns, st.st_size])
+        return stamp
+
+    @classmethod
+    def find_cached(cls, cache):
+        """
+        Same as `find`, but reuses the result stored in cache (a dict) as long as
+        the external programs didn't change
+
+        :param cache: dict of former results, updated in place
+        :return: result of `find`
+        """
+        if not cls.TOOLS:
+            return cls.find()
+
+        stamp = cls.tools_stamp()
+        entry = cache.get(cls.__name__)
+        if entry is not None and entry["stamp"] == stamp:
+            for attr, value in entry["probed"].items():
+                setattr(cls, attr, value)
+            return entry["found"]
+
+        found = bool(cls.find())
+        cache[cls.__name__] = {
+            "stamp": stamp,
+            "found": found,
+            "probed": {attr: getattr(cls, attr, None) for attr in cls.PROBED},
+        }
+        return found
+
     @classmethod
     def get_targets(cls, files_ids):
         """
@@ -28,7 +28,7 @@ def parse_file_info(klass, url="", html=""):
 class BaseHoster(BasePlugin):
     __name__ = "BaseHoster"
     __type__ = "base"
-    __version__ = "0.39"
+    __version__ = "0.40"
     __status__ = "stable"
 
     __pattern__ = r"^unmatchable$"
@@ -43,6 +43,9 @@ class BaseHoster(BasePlugin):
 
     URL_REPLACEMENTS = []
 
+    #: minutes online checks are cached, 0 to always check, None for the default
+    INFO_TTL = None
+
     @classmethod
     def get_info(cls, url="", html=""):
         url = fixurl(url, unquote=True)
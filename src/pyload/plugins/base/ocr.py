@@ -3,6 +3,7 @@
 import os
 import subprocess
 
+import numpy as np
 from PIL import Image
 
 from pyload import PKGDIR
@@ -15,13 +16,16 @@ from .plugin import BasePlugin
 class BaseOCR(BasePlugin):
     __name__ = "BaseOCR"
     __type__ = "base"
-    __version__ = "0.28"
+    __version__ = "0.29"
     __status__ = "stable"
 
     __description__ = """OCR base plugin"""
     __license__ = "GPLv3"
     __authors__ = [("pyLoad team", "admin@pyload.net")]
 
+    #: offsets of the neighbors of a pixel, in the order `clean` checks them
+    NEIGHBORS = ((-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1))
+
     def __init__(self, pyfile):
         self._init(pyfile.m.pyload)
         self.pyfile = pyfile
@@ -156,179 +160,100 @@ class BaseOCR(BasePlugin):
 
         self.pixels = self.img.load()
 
-    def eval_black_white(self, limit):
-        self.pixels = self.img.load()
-        w, h = self.img.size
-        for x in range(w):
-            for y in range(h):
-                if self.pixels[x, y] > limit:
-                    self.pixels[x, y] = 255
-                else:
-                    self.pixels[x, y] = 0
-
-    def clean(self, allowed):
-        pixels = self.pixels
-
-        w, h = self.img.size
-
-        for x in range(w):
-            for y in range(h):
-                if pixels[x, y] == 255:
-                    continue
-                #: No point in processing white pixels since we only want to remove black pixel
-                count = 0
-
-                try:
-                    if pixels[x - 1, y - 1] != 255:
-                        count += 1
-
-                    if pixels[x - 1, y] != 255:
-                        count += 1
-
-                    if pixels[x - 1, y + 1] != 255:
-                        count += 1
-
-                    if pixels[x, y + 1] != 255:
-                        count += 1
-
-                    if pixels[x + 1, y + 1] != 255:
-                        count += 1
-
-                    if pixels[x + 1, y] != 255:
-                        count += 1
-
-                    if pixels[x + 1, y - 1] != 255:
-                        count += 1
-
-                    if pixels[x, y - 1] != 255:
-                        count += 1
-
-                except Exception:
-                    pass
+    def _array(self):
+        """
+        returns a copy of the pixels of the greyscale image as array[y, x].
+        """
+        return np.array(self.img)
 
-                #: Not enough neighbors are dark pixels so mark this pixel
-                #: To be changed to white
-                if count < allowed:
-                    pixels[x, y] = 1
+    def _store(self, array):
+        """
+        writes array back into the image, in place.
+        """
+        self.img.frombytes(array.astype(np.asarray(self.img).dtype).tobytes())
+        self.pixels = self.img.load()
 
-        #: Second pass: this time set all 1's to 255 (white)
-        for x in range(w):
-            for y in range(h):
-                if pixels[x, y] == 1:
-                    pixels[x, y] = 255
+    def eval_black_white(self, limit):
+        self._store(np.where(self._array() > limit, 255, 0))
 
-        self.pixels = pixels
+    def clean(self, allowed):
+        """
+        whitens the dark pixels with less than allowed dark neighbors.
+        """
+        array = self._array()
+        h, w = array.shape
+        dark = array != 255
+
+        #: neighbors in the order they used to be checked, like then the pixels
+        #: before the left and top edges are the ones of the opposite edge and the
+        #: counting stops at the first one past the right or bottom edge
+        ys, xs = np.ogrid[:h, :w]
+        count = np.zeros((h, w), dtype=np.uint8)
+        inside = np.ones((h, w), dtype=bool)
+        for dx, dy in self.NEIGHBORS:
+            inside &= (xs + dx < w) & (ys + dy < h)
+            count += inside & np.roll(dark, (-dy, -dx), axis=(0, 1))
+
+        #: Not enough neighbors are dark pixels so change this pixel to white,
+        #: pixels of value 1 were used as mark and end up white as well
+        self._store(np.where(dark & (count < allowed) | (array == 1), 255, array))
 
     def derotate_by_average(self):
         """
         Rotate by checking each angle and guess most suitable.
         """
-        w, h = self.img.size
-        pixels = self.pixels
-
-        for x in range(w):
-            for y in range(h):
-                if pixels[x, y] == 0:
-                    pixels[x, y] = 155
-
-        highest = {}
-        counts = {}
-
-        for angle in range(-45, 45):
-
-            tmpimage = self.img.rotate(angle)
-
-            pixels = tmpimage.load()
-
-            w, h = self.img.size
-
-            for x in range(w):
-                for y in range(h):
-                    if pixels[x, y] == 0:
-                        pixels[x, y] = 255
-
-            count = {}
-
-            for x in range(w):
-                count[x] = 0
-                for y in range(h):
-                    if pixels[x, y] == 155:
-                        count[x] += 1
-
-            sum = 0
-            cnt = 0
-
-            for x in count.values():
-                if x != 0:
-                    sum += x
-                    cnt += 1
-
-            avg = sum // cnt
-            counts[angle] = cnt
-            highest[angle] = 0
-            for x in count.values():
-                if x > highest[angle]:
-                    highest[angle] = x
-
-            highest[angle] = highest[angle] - avg
+        array = self._array()
+        array[array == 0] = 155
+        self._store(array)
 
+        #: the angle where the densest column of dark pixels stands out the most
+        #: from the average of the columns with some
         hkey = 0
         hvalue = 0
+        for angle in range(-45, 45):
+            count = (np.asarray(self.img.rotate(angle)) == 155).sum(axis=0)
+            columns = count[count != 0]
+            if not columns.size:
+                continue
 
-        for key, value in highest.items():
+            value = int(count.max()) - int(columns.sum()) // columns.size
             if value > hvalue:
-                hkey = key
+                hkey = angle
                 hvalue = value
 
         self.img = self.img.rotate(hkey)
-        pixels = self.img.load()
-
-        for x in range(w):
-            for y in range(h):
-                if pixels[x, y] == 0:
-                    pixels[x, y] = 255
-
-                if pixels[x, y] == 155:
-                    pixels[x, y] = 0
-
-        self.pixels = pixels
+        array = self._array()
+        self._store(np.where(array == 0, 255, np.where(array == 155, 0, array)))
 
     def split_captcha_letters(self):
+        """
+        returns the images of the groups of columns with dark pixels, cropped to
+        these pixels, a group reaching the right edge is left out.
+        """
         captcha = self.img
-        started = False
         letters = []
-        width, height = captcha.size
-        bottomY, topY = 0, height
-        pixels = captcha.load()
-
-        for x in range(width):
-            black_pixel_in_col = False
-            for y in range(height):
-                if pixels[x, y] != 255:
-                    if not started:
-                        started = True
-                        firstX = x
-                        lastX = x
-
-                    if y > bottomY:
-                        bottomY = y
-                    if y < topY:
-                        topY = y
-                    if x > lastX:
-                        lastX = x
-
-                    black_pixel_in_col = True
-
-            if black_pixel_in_col is False and started is True:
-                rect = (firstX, topY, lastX, bottomY)
-                new_captcha = captcha.crop(rect)
-
-                w, h = new_captcha.size
-                if w > 5 and h > 5:
-                    letters.append(new_captcha)
-
-                started = False
-                bottomY, topY = 0, height
+        dark = np.asarray(captcha) != 255
+
+        columns = np.flatnonzero(dark.any(axis=0))
+        if not columns.size:
+            return letters
+
+        #: groups of adjacent columns as [first, last] pairs
+        gaps = np.flatnonzero(np.diff(columns) > 1)
+        firsts = np.concatenate(([columns[0]], columns[gaps + 1]))
+        lasts = np.concatenate((columns[gaps], [columns[-1]]))
+
+        for first_x, last_x in zip(firsts.tolist(), lasts.tolist()):
+            if last_x == dark.shape[1] - 1:
+                break
+
+            rows = np.flatnonzero(dark[:, first_x : last_x + 1].any(axis=1))
+            rect = (first_x, int(rows[0]), last_x, int(rows[-1]))
+            new_captcha = captcha.crop(rect)
+
+            w, h = new_captcha.size
+            if w > 5 and h > 5:
+                letters.append(new_captcha)
 
         return letters
 
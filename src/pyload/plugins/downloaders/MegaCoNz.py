@@ -6,9 +6,10 @@ import os
 import random
 import re
 import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 import Cryptodome.Cipher.AES
-import Cryptodome.Util.Counter
 
 from pyload.core.network.http.exceptions import BadHeader
 from pyload.core.utils.old import decode
@@ -64,7 +65,7 @@ class MegaCrypto:
     @staticmethod
     def str_to_a32(s):
         # Add padding, we need a string with a length multiple of 4
-        s += "\0" * (-len(s) % 4)
+        s += b"\0" * (-len(s) % 4)
         #: big-endian, unsigned int
         return struct.unpack(">{}I".format(len(s) // 4), s)
 
@@ -162,50 +163,207 @@ class MegaCrypto:
         if chunk_start < size:
             yield (chunk_start, size - chunk_start)
 
-    class Checksum:
+    #: MEGA chunks grow by 128 KiB up to 1 MiB, the CBC-MAC is computed per chunk
+    CHUNK_STEP = 0x20000
+    CHUNK_STEPS = 8
+
+    @staticmethod
+    def chunk_bounds(index):
+        """
+        returns (start, size) of the chunk index, the last chunk of a file is
+        shorter.
+        """
+        step, steps = MegaCrypto.CHUNK_STEP, MegaCrypto.CHUNK_STEPS
+        if index < steps:
+            return step * index * (index + 1) // 2, step * (index + 1)
+
+        first = step * steps * (steps + 1) // 2
+        return first + (index - steps) * step * steps, step * steps
+
+    @staticmethod
+    def chunk_index(offset):
         """
-        interface for checking CBC-MAC checksum.
+        returns the index of the chunk containing offset.
         """
+        step, steps = MegaCrypto.CHUNK_STEP, MegaCrypto.CHUNK_STEPS
+        first = step * steps * (steps + 1) // 2
+        if offset >= first:
+            return steps + (offset - first) // (step * steps)
 
-        def __init__(self, key):
+        index = 0
+        while MegaCrypto.chunk_bounds(index + 1)[0] <= offset:
+            index += 1
+        return index
+
+    class Decrypter:
+        """
+        Decrypts the data of a file at any offset while it is written, AES-CTR
+        being seekable, and computes the CBC-MAC of the plaintext on the way.
+
+        The MAC of every chunk written from its start in one go is computed from
+        the data passing by, the others are read back from disk at the end, in
+        parallel. The file MAC is the CBC of the chunk MACs.
+        """
+
+        def __init__(self, key, mac=True):
             k, iv, meta_mac = MegaCrypto.get_cipher_key(key)
-            self.hash = "\0" * 16
             self.key = MegaCrypto.a32_to_str(k)
-            self.iv = MegaCrypto.a32_to_str(iv[0:2] * 2)
-            self.AES = Cryptodome.Cipher.AES.new(
-                self.key, mode=Cryptodome.Cipher.AES.MODE_CBC, IV=self.hash
+            self.nonce = MegaCrypto.a32_to_str(iv[0:2])
+            self.mac_iv = MegaCrypto.a32_to_str(iv[0:2] * 2)
+            self.meta_mac = tuple(meta_mac)
+            self.mac = mac
+
+            self.lock = threading.Lock()
+            self.ciphers = {}  #: offset -> CTR cipher continuing there
+            self.streams = {}  #: offset -> [chunk index, CBC cipher, pending, last block]
+            self.macs = {}  #: chunk index -> MAC of the chunk
+
+        def _cipher(self, offset):
+            cipher = Cryptodome.Cipher.AES.new(
+                self.key,
+                Cryptodome.Cipher.AES.MODE_CTR,
+                nonce=self.nonce,
+                initial_value=offset // 16,
             )
+            if offset % 16:
+                cipher.decrypt(bytes(offset % 16))
+            return cipher
 
-        def update(self, chunk):
-            cbc = Cryptodome.Cipher.AES.new(
-                self.key, mode=Cryptodome.Cipher.AES.MODE_CBC, IV=self.iv
-            )
-            for j in range(0, len(chunk), 16):
-                block = chunk[j : j + 16].ljust(16, "\0")
-                hash = cbc.encrypt(block)
+        def __call__(self, offset, data):
+            """
+            returns the plaintext of the encrypted data at offset.
+            """
+            with self.lock:
+                cipher = self.ciphers.pop(offset, None) or self._cipher(offset)
+                data = cipher.decrypt(data)
+                self.ciphers[offset + len(data)] = cipher
 
-            self.hash = self.AES.encrypt(hash)
+                if self.mac:
+                    self._update(offset, data)
 
-        def digest(self):
+            return data
+
+        def _new_stream(self, index):
+            cbc = Cryptodome.Cipher.AES.new(
+                self.key, Cryptodome.Cipher.AES.MODE_CBC, iv=self.mac_iv
+            )
+            return [index, cbc, b"", None]
+
+        def _update(self, offset, data):
+            stream = self.streams.pop(offset, None)
+            if stream is None:
+                index = MegaCrypto.chunk_index(offset)
+                start = MegaCrypto.chunk_bounds(index)[0]
+                if start != offset:  #: the MAC of this chunk is computed later
+                    index += 1
+                    skip = MegaCrypto.chunk_bounds(index)[0] - offset
+                    if skip >= len(data):
+                        return
+                    offset += skip
+                    data = data[skip:]
+                stream = self._new_stream(index)
+
+            data = memoryview(data)
+            while data:
+                index, cbc, pending, last = stream
+                start, size = MegaCrypto.chunk_bounds(index)
+                take = min(len(data), start + size - offset)
+
+                block = pending + data[:take] if pending else data[:take]
+                full = len(block) - len(block) % 16
+                if full:
+                    last = cbc.encrypt(block[:full])[-16:]
+                stream[2:] = [bytes(block[full:]), last]
+
+                offset += take
+                data = data[take:]
+                if offset == start + size:
+                    self.macs[index] = self._finish(stream)
+                    stream = self._new_stream(index + 1)
+
+            if stream[2] or stream[3] is not None:
+                self.streams[offset] = stream
+
+        def _finish(self, stream):
             """
-            Return the **binary** (non-printable) CBC-MAC of the message that has been
-            authenticated so far.
+            returns the MAC of the chunk of stream ending here, leaving its CBC
+            as it is for the data which may follow.
             """
-            d = MegaCrypto.str_to_a32(self.hash)
-            return (d[0] ^ d[1], d[2] ^ d[3])
+            index, cbc, pending, last = stream
+            if pending:
+                block = pending.ljust(16, b"\0")
+                prev = self.mac_iv if last is None else last
+                ecb = Cryptodome.Cipher.AES.new(self.key, Cryptodome.Cipher.AES.MODE_ECB)
+                last = ecb.encrypt(bytes(x ^ y for x, y in zip(block, prev)))
+            return last
+
+        def _chunk_mac(self, read, index, size):
+            start, length = MegaCrypto.chunk_bounds(index)
+            data = read(min(length, size - start), start)
+            cbc = Cryptodome.Cipher.AES.new(
+                self.key, Cryptodome.Cipher.AES.MODE_CBC, iv=self.mac_iv
+            )
+            return cbc.encrypt(data.ljust(-(-len(data) // 16) * 16, b"\0"))[-16:]
 
-        def hexdigest(self):
+        def digest(self, filename, workers=None):
             """
-            Return the **printable** CBC-MAC of the message that has been authenticated
-            so far.
+            returns the CBC-MAC of the plaintext file as (int, int), like the meta
+            MAC of the key.
             """
-            return "".join(
-                "{:2x}".format(ord(x)) for x in MegaCrypto.a32_to_str(self.digest())
+            size = os.path.getsize(filename)
+            with self.lock:
+                count = MegaCrypto.chunk_index(size - 1) + 1 if size else 0
+                macs = dict(self.macs)
+
+                #: the last chunk ends with the file
+                stream = self.streams.get(size)
+                if stream is not None and stream[0] == count - 1:
+                    macs[stream[0]] = self._finish(stream)
+
+            missing = [i for i in range(count) if i not in macs]
+            if missing:
+                fd = None
+                files = []
+                if hasattr(os, "pread"):
+                    fd = os.open(filename, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+
+                    def read(length, offset):
+                        return os.pread(fd, length, offset)
+
+                else:
+                    #: no pread on windows, every worker seeks in its own file
+                    local = threading.local()
+
+                    def read(length, offset):
+                        fh = getattr(local, "fh", None)
+                        if fh is None:
+                            fh = local.fh = open(filename, mode="rb")
+                            files.append(fh)
+                        fh.seek(offset)
+                        return fh.read(length)
+
+                try:
+                    with ThreadPoolExecutor(workers or os.cpu_count()) as pool:
+                        for index, mac in zip(
+                            missing,
+                            pool.map(lambda i: self._chunk_mac(read, i, size), missing),
+                        ):
+                            macs[index] = mac
+                finally:
+                    if fd is not None:
+                        os.close(fd)
+                    for fh in files:
+                        fh.close()
+
+            cbc = Cryptodome.Cipher.AES.new(
+                self.key, Cryptodome.Cipher.AES.MODE_CBC, iv=bytes(16)
             )
+            file_mac = cbc.encrypt(b"".join(macs[i] for i in range(count)))[-16:]
+            d = struct.unpack(">4I", file_mac or bytes(16))
+            return (d[0] ^ d[1], d[2] ^ d[3])
 
-        @staticmethod
-        def new(key):
-            return MegaCrypto.Checksum(key)
+        def verify(self, filename):
+            return self.digest(filename) == self.meta_mac
 
 
 class MegaClient:
@@ -285,7 +443,7 @@ class MegaClient:
 class MegaCoNz(BaseDownloader):
     __name__ = "MegaCoNz"
     __type__ = "downloader"
-    __version__ = "0.52"
+    __version__ = "0.55"
     __status__ = "testing"
 
     __pattern__ = r"(https?://(?:www\.)?mega(\.co)?\.nz/|mega:|chrome:.+?)#(?P<TYPE>N|)!(?P<ID>[\w^_]+)!(?P<KEY>[\w\-,=]+)(?:###n=(?P<OWNER>[\w^_]+))?"
@@ -299,35 +457,10 @@ class MegaCoNz(BaseDownloader):
         ("GammaC0de", "nitzo2001[AT}yahoo[DOT]com"),
     ]
 
-    FILE_SUFFIX = ".crypted"
-
-    def decrypt_file(self, key):
+    def download_decrypted(self, url, key):
         """
-        Decrypts and verifies checksum to the file at 'last_download'.
+        Downloads url, the data is decrypted with key while it is written.
         """
-        k, iv, meta_mac = MegaCrypto.get_cipher_key(key)
-        ctr = Cryptodome.Util.Counter.new(
-            128, initial_value=((iv[0] << 32) + iv[1]) << 64
-        )
-        cipher = Cryptodome.Cipher.AES.new(
-            MegaCrypto.a32_to_str(k), Cryptodome.Cipher.AES.MODE_CTR, counter=ctr
-        )
-
-        self.pyfile.set_status("decrypting")
-        self.pyfile.set_progress(0)
-
-        file_crypted = os.fsdecode(self.last_download)
-        file_decrypted = file_crypted.rsplit(self.FILE_SUFFIX)[0]
-
-        try:
-            f = open(file_crypted, mode="rb")
-            df = open(file_decrypted, mode="wb")
-
-        except IOError as exc:
-            self.fail(exc)
-
-        encrypted_size = os.path.getsize(file_crypted)
-
         checksum_activated = self.config.get(
             "enabled", default=False, plugin="Checksum"
         )
@@ -335,52 +468,42 @@ class MegaCoNz(BaseDownloader):
             "check_checksum", default=True, plugin="Checksum"
         )
 
-        cbc_mac = (
-            MegaCrypto.Checksum(key) if checksum_activated and check_checksum else None
+        self.decrypter = MegaCrypto.Decrypter(
+            key, mac=checksum_activated and check_checksum
         )
+        self.transform = self.decrypter
 
-        progress = 0
-        for chunk_start, chunk_size in MegaCrypto.get_chunks(encrypted_size):
-            buf = f.read(chunk_size)
-            if not buf:
-                break
-
-            chunk = cipher.decrypt(buf)
-            df.write(chunk)
-
-            progress += chunk_size
-            self.pyfile.set_progress((100 // encrypted_size) * progress)
-
-            if checksum_activated and check_checksum:
-                cbc_mac.update(chunk)
-
-        self.pyfile.set_progress(100)
-
-        f.close()
-        df.close()
+        self.download(url)
 
-        self.log_info(self._("File decrypted"))
-        os.remove(file_crypted)
+        if self.decrypter.mac:
+            self.verify_file()
 
-        if checksum_activated and check_checksum:
-            file_mac = cbc_mac.digest()
-            if file_mac == meta_mac:
-                self.log_info(
-                    self._(
-                        'File integrity of "{}" verified by CBC-MAC checksum ({})'
-                    ).format(self.pyfile.name.rsplit(self.FILE_SUFFIX)[0], meta_mac)
-                )
-            else:
-                self.log_warning(
-                    self._(
-                        'CBC-MAC checksum for file "{}" does not match ({} != {})'
-                    ).format(
-                        self.pyfile.name.rsplit(self.FILE_SUFFIX)[0], file_mac, meta_mac
-                    )
-                )
-                self.checksum_failed(file_decrypted, self._("Checksums do not match"))
+    def verify_file(self):
+        """
+        Verifies the CBC-MAC of the file at 'last_download'.
+        """
+        local_file = os.fsdecode(self.last_download)
 
-        self.last_download = decode(file_decrypted)
+        self.pyfile.set_custom_status(self._("checksum verifying"))
+        try:
+            file_mac = self.decrypter.digest(local_file)
+        finally:
+            self.pyfile.set_status("processing")
+
+        meta_mac = self.decrypter.meta_mac
+        if file_mac == meta_mac:
+            self.log_info(
+                self._(
+                    'File integrity of "{}" verified by CBC-MAC checksum ({})'
+                ).format(self.pyfile.name, meta_mac)
+            )
+        else:
+            self.log_warning(
+                self._(
+                    'CBC-MAC checksum for file "{}" does not match ({} != {})'
+                ).format(self.pyfile.name, file_mac, meta_mac)
+            )
+            self.checksum_failed(local_file, self._("Checksums do not match"))
 
     def checksum_failed(self, local_file, msg):
         check_action = self.config.get(
@@ -409,9 +532,9 @@ class MegaCoNz(BaseDownloader):
 
     def check_exists(self, name):
         """
-        Because of Mega downloads a temporary encrypted file with the extension of
-        '.crypted', pyLoad cannot correctly detect if the file exists before
-        downloading. This function corrects this.
+        The name of the file is only known once its attributes were decrypted, so
+        pyLoad cannot correctly detect if the file exists before. This function
+        corrects this.
 
         Raises Skip() if file exists and 'skip_existing' configuration option is
         set to True.
@@ -477,7 +600,7 @@ class MegaCoNz(BaseDownloader):
 
         self.check_exists(name)
 
-        pyfile.name = name + self.FILE_SUFFIX
+        pyfile.name = name
         pyfile.size = res["s"]
 
         time_left = res.get("tl", 0)
@@ -488,7 +611,7 @@ class MegaCoNz(BaseDownloader):
         # self.req.http.c.setopt(pycurl.SSL_CIPHER_LIST, "RC4-MD5:DEFAULT")
 
         try:
-            self.download(res["g"])
+            self.download_decrypted(res["g"], key)
 
         except BadHeader as exc:
             if exc.code == 509:
@@ -496,8 +619,3 @@ class MegaCoNz(BaseDownloader):
 
             else:
                 raise
-
-        self.decrypt_file(key)
-
-        #: Everything is finished and final name can be set
-        pyfile.name = name
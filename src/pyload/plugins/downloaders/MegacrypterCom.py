@@ -9,7 +9,7 @@ from .MegaCoNz import MegaCoNz, MegaCrypto
 class MegacrypterCom(MegaCoNz):
     __name__ = "MegacrypterCom"
     __type__ = "downloader"
-    __version__ = "0.28"
+    __version__ = "0.29"
     __status__ = "testing"
 
     __pattern__ = r"https?://\w{0,10}\.?megacrypter\.com/[\w\-!]+"
@@ -20,7 +20,6 @@ class MegacrypterCom(MegaCoNz):
     __authors__ = [("GonzaloSR", "gonzalo@gonzalosr.com")]
 
     API_URL = "http://megacrypter.com/api"
-    FILE_SUFFIX = ".crypted"
 
     def api_response(self, **kwargs):
         """
@@ -45,13 +44,8 @@ class MegacrypterCom(MegaCoNz):
         # if info['pass'] is True:
         # crypted_file_key, md5_file_key = info['key'].split("#")
 
-        key = MegaCrypto.base64_decode(info["key"])
+        key = MegaCrypto.base64_to_a32(info["key"])
 
-        pyfile.name = info["name"] + self.FILE_SUFFIX
-
-        self.download(dl["url"])
-
-        self.decrypt_file(key)
-
-        #: Everything is finished and final name can be set
         pyfile.name = info["name"]
+
+        self.download_decrypted(dl["url"], key)
@@ -13,7 +13,7 @@ from pyload.plugins.helpers import renice
 class SevenZip(BaseExtractor):
     __name__ = "SevenZip"
     __type__ = "extractor"
-    __version__ = "0.32"
+    __version__ = "0.33"
     __status__ = "testing"
 
     __description__ = """7-Zip extractor plugin"""
@@ -25,6 +25,7 @@ class SevenZip(BaseExtractor):
     ]
 
     CMD = "7z"
+    TOOLS = (os.path.join(PKGDIR, "lib", "7z.exe"),) if os.name == "nt" else ("7z",)
     EXTENSIONS = [
         ("7z", r"7z(?:\.\d{3})?"),
         "xz",
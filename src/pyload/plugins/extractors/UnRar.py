@@ -13,7 +13,7 @@ from pyload.plugins.helpers import renice
 class UnRar(BaseExtractor):
     __name__ = "UnRar"
     __type__ = "extractor"
-    __version__ = "1.44"
+    __version__ = "1.45"
     __status__ = "testing"
 
     __config__ = [("ignore_warnings", "bool", "Ignore unrar warnings", False)]
@@ -28,6 +28,13 @@ class UnRar(BaseExtractor):
     ]
 
     CMD = "unrar"
+    if os.name == "nt":
+        TOOLS = (
+            os.path.join(PKGDIR, "lib", "RAR.exe"),
+            os.path.join(PKGDIR, "lib", "UnRAR.exe"),
+        )
+    else:
+        TOOLS = ("rar", "unrar")
     EXTENSIONS = [
         "rar",
         "cab",
@@ -99,6 +106,13 @@ class UnRar(BaseExtractor):
         else:
             return False
 
+    @classmethod
+    def find_cached(cls, cache):
+        found = super().find_cached(cache)
+        if found:
+            cls._RE_FILES = cls._RE_FILES_V4 if float(cls.VERSION) < 5 else cls._RE_FILES_V5
+        return found
+
     @classmethod
     def ismultipart(cls, filename):
         return cls._RE_PART.search(filename) is not None
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 
 import os
+import time
+from threading import Lock, Semaphore
 
 import flask
 from flask.json import jsonify
@@ -22,36 +24,136 @@ def status():
     return jsonify(data)
 
 
+def _links_data(api):
+    links = api.status_downloads()
+    ids = []
+    for link in links:
+        ids.append(link["fid"])
+
+        if link["status"] == 12:
+            formatted_eta = link["format_eta"]
+            formatted_speed = format.speed(link["speed"])
+            link["info"] = f"{formatted_eta} @ {formatted_speed}"
+
+        elif link["status"] == 5:
+            link["percent"] = 0
+            link["size"] = 0
+            link["bleft"] = 0
+            link["info"] = api._("waiting {}").format(link["format_wait"])
+        else:
+            link["info"] = ""
+
+    return {"links": links, "ids": ids}
+
+
 @bp.route("/json/links", methods=["GET", "POST"], endpoint="links")
 # @apiver_check
 @login_required("LIST")
 def links():
     api = flask.current_app.config["PYLOAD_API"]
     try:
-        links = api.status_downloads()
-        ids = []
-        for link in links:
-            ids.append(link["fid"])
-
-            if link["status"] == 12:
-                formatted_eta = link["format_eta"]
-                formatted_speed = format.speed(link["speed"])
-                link["info"] = f"{formatted_eta} @ {formatted_speed}"
-
-            elif link["status"] == 5:
-                link["percent"] = 0
-                link["size"] = 0
-                link["bleft"] = 0
-                link["info"] = api._("waiting {}").format(link["format_wait"])
-            else:
-                link["info"] = ""
-
-        return jsonify(links=links, ids=ids)
+        return jsonify(**_links_data(api))
 
     except Exception as exc:
         return jsonify(False), 500
 
 
+#: open event streams, each one occupies a webserver thread
+STREAM_LIMIT = 20
+#: seconds between two pushes of status and running downloads
+STREAM_INTERVAL = 1
+#: seconds after which a stream is closed, browsers reconnect by themselves
+STREAM_TIMEOUT = 300
+
+_streams = Semaphore(STREAM_LIMIT)
+_snapshots = {}  #: name -> (time, json)
+_snapshots_lock = Lock()
+
+
+def _snapshot(name, build):
+    """
+    returns build() as json, built once per interval for all streams.
+    """
+    with _snapshots_lock:
+        built, data = _snapshots.get(name, (0, None))
+        if built + STREAM_INTERVAL <= time.time():
+            data = flask.json.dumps(build())
+            _snapshots[name] = (time.time(), data)
+        return data
+
+
+@bp.route("/json/stream", endpoint="stream")
+# @apiver_check
+@login_required("LIST")
+def stream():
+    """
+    Server-sent events replacing the polling of status and links: `status` and
+    `links` (only with ?links=1) carry the same data, `queue` (only with
+    ?queue=1) the events of the queue and collector.
+    """
+    api = flask.current_app.config["PYLOAD_API"]
+    evm = api.pyload.event_manager
+    with_links = flask.request.args.get("links") == "1"
+    with_queue = flask.request.args.get("queue") == "1"
+
+    try:
+        cursor = int(flask.request.headers["Last-Event-ID"])
+    except (KeyError, ValueError):
+        cursor = evm.seq
+    if cursor > evm.seq:  #: pyLoad was restarted meanwhile
+        cursor = 0
+
+    if not _streams.acquire(blocking=False):
+        return "Too many event streams", 503  #: the client falls back to polling
+
+    def generate():
+        nonlocal cursor
+        last_status = last_links = None
+        last_push = 0
+        deadline = time.time() + STREAM_TIMEOUT
+
+        yield f"retry: {int(STREAM_INTERVAL * 2000)}\n\n"
+
+        while time.time() < deadline:
+            sent = False
+            status = _snapshot("status", api.status_server)
+            if status != last_status:
+                last_status = status
+                sent = True
+                yield f"event: status\ndata: {status}\n\n"
+
+            if with_links:
+                links = _snapshot("links", lambda: _links_data(api))
+                if links != last_links:
+                    last_links = links
+                    sent = True
+                    yield f"event: links\ndata: {links}\n\n"
+
+            if with_queue:
+                # coalesce bursts of queue events, they are pushed at most four times
+                # per interval
+                time.sleep(max(0, last_push + STREAM_INTERVAL / 4 - time.time()))
+                if evm.wait(cursor, STREAM_INTERVAL):
+                    cursor, events = evm.read(cursor)
+                    last_push = time.time()
+                    sent = True
+                    yield f"id: {cursor}\nevent: queue\ndata: {flask.json.dumps(events)}\n\n"
+            else:
+                time.sleep(STREAM_INTERVAL)
+
+            if not sent:
+                #: a closed tab is only noticed when writing, don't hold its thread
+                yield ": keepalive\n\n"
+
+    response = flask.Response(
+        flask.stream_with_context(generate()), mimetype="text/event-stream"
+    )
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"  #: don't let proxies buffer the stream
+    response.call_on_close(_streams.release)
+    return response
+
+
 @bp.route("/json/packages", endpoint="packages")
 # @apiver_check
 @login_required("LIST")
@@ -298,6 +298,57 @@ $(function() {
     $("#cap_box #cap_positional").click(submit_positional_captcha);
 
     if (thisScript.getAttribute('nopoll') !== "1") {
+        startStatusStream();
+    }
+});
+
+var statusStream = null;
+
+// status (and running downloads on the dashboard, queue events on the package
+// pages) are pushed by the server, polling is only used by browsers without
+// EventSource or if the server refuses
+function startStatusStream() {
+    if (!window.EventSource) {
+        startStatusPolling();
+        return;
+    }
+
+    var url = "{{url_for('json.stream')}}";
+    if (typeof EntryManager === "function") {
+        url += "?links=1";
+    } else if (typeof PackageUI === "function") {
+        url += "?queue=1";
+    }
+
+    statusStream = new EventSource(url);
+    statusStream.addEventListener("status", function (e) {
+        LoadJsonToContent(JSON.parse(e.data));
+    });
+    statusStream.addEventListener("links", function (e) {
+        $(document).trigger("pyload:links", [JSON.parse(e.data)]);
+    });
+    statusStream.addEventListener("queue", function (e) {
+        $(document).trigger("pyload:queue", [JSON.parse(e.data)]);
+    });
+    statusStream.onerror = function () {
+        if (statusStream.readyState === EventSource.CLOSED) {
+            statusStream = null;
+            startStatusPolling();
+            $(document).trigger("pyload:nostream");
+        }
+    };
+}
+
+function startStatusPolling() {
+    $.ajax({
+        method: "post",
+        url: "{{url_for('json.status')}}",
+        async: true,
+        timeout: 3000,
+        success: LoadJsonToContent
+    });
+
+    setInterval(function () {
         $.ajax({
             method: "post",
             url: "{{url_for('json.status')}}",
@@ -305,18 +356,8 @@ $(function() {
             timeout: 3000,
             success: LoadJsonToContent
         });
-
-        setInterval(function () {
-            $.ajax({
-                method: "post",
-                url: "{{url_for('json.status')}}",
-                async: true,
-                timeout: 3000,
-                success: LoadJsonToContent
-            });
-        }, 4000);
-    }
-});
+    }, 4000);
+}
 
 function LoadJsonToContent(a) {
     var notification;
@@ -28,22 +28,14 @@ function EntryManager(){
     var container;
     this.initialize = function() {
         thisObject=this;
-        $.ajax({
-            method:"post",
-            url: "{{url_for('json.links')}}",
-            async: true,
-            timeout: 30000,
-            success: thisObject.update
+        $(document).on("pyload:links", function(e, data) {
+            thisObject.update(data);
         });
-        setInterval(function() {
-        $.ajax({
-            method:"post",
-            url: "{{url_for('json.links')}}",
-            async: true,
-            timeout: 30000,
-            success: thisObject.update
-        });
-    }, 2500);
+        if (statusStream) {
+            $(document).on("pyload:nostream", thisObject.startPolling);
+        } else {
+            thisObject.startPolling();
+        }
 
         ids = [{% for link in content %}
         {% if forloop.last %}
@@ -59,6 +51,24 @@ function EntryManager(){
 
         // this.json.startTimer();
     };
+    this.startPolling = function (){
+        $.ajax({
+            method:"post",
+            url: "{{url_for('json.links')}}",
+            async: true,
+            timeout: 30000,
+            success: thisObject.update
+        });
+        setInterval(function() {
+            $.ajax({
+                method:"post",
+                url: "{{url_for('json.links')}}",
+                async: true,
+                timeout: 30000,
+                success: thisObject.update
+            });
+        }, 2500);
+    };
     this.parseFromContent = function (){
         $.each(ids,function(id,index){
             var entry = new LinkEntry(id);
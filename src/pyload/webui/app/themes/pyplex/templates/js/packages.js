@@ -9,10 +9,50 @@ function PackageUI (type){
 
         $("#del_finished").click(this.deleteFinished);
         $("#restart_failed").click(this.restartFailed);
+        $(document).on("pyload:queue", function(e, events) {
+            thisObject.update(events);
+        });
         this.parsePackages();
 
     };
 
+    // applies the queue events pushed by the server, new packages need the page
+    // to be rendered again
+    this.update = function (events) {
+        var destination = thisObject.type ? "queue" : "collector";
+        var reload = false;
+        var refresh = {};
+        $.each(events, function(i, event) {
+            if (event[1] !== destination) {
+                return;
+            }
+            if (event[0] === "reload" || (event[0] === "insert" && event[2] === "pack")) {
+                reload = true;
+            } else if (event[2] === "pack") {
+                if (event[0] === "remove") {
+                    $("#package_" + event[3]).remove();
+                } else {
+                    refresh[event[3]] = true;
+                }
+            } else {
+                var pack = $("#file_" + event[3]).closest("#package-list > li");
+                if (pack.length) {
+                    refresh[pack[0].id.match(/[0-9]+/)[0]] = true;
+                }
+            }
+        });
+
+        if (reload) {
+            window.location.reload();
+            return;
+        }
+        $.each(packages, function() {
+            if (refresh[this.id[0]]) {
+                this.refreshLinks();
+            }
+        });
+    };
+
     this.parsePackages = function () {
        var $packageList = $("#package-list");
        $packageList.children("li").each(function(ele) {
@@ -93,6 +133,8 @@ function Package (ui, id, ele){
     var password;
     var folder;
 
+    this.id = id;
+
     this.initialize = function () {
         thisObject = this;
         if (!ele) {
@@ -151,7 +193,22 @@ function Package (ui, id, ele){
         });
     };
 
-    this.createLinks = function(data) {
+    // loads the links again if they are shown, without toggling them
+    this.refreshLinks = function () {
+        if (!linksLoaded) {
+            return;
+        }
+        $.get({
+            url: "{{url_for('json.package')}}",
+            data: {id: id},
+            traditional: true,
+            success: function(data) {
+                thisObject.createLinks(data, true);
+            }
+        });
+    };
+
+    this.createLinks = function(data, refresh) {
         var ul = $("#sort_children_" + id[0]);
         ul.html("");
         $.each(data.links, function(key, link) {      // data.links.each(
@@ -201,7 +258,9 @@ function Package (ui, id, ele){
         thisObject.registerLinkEvents();
         linksLoaded = true;
         indicateFinish();
-        thisObject.toggle();
+        if (!refresh) {
+            thisObject.toggle();
+        }
     };
 
     this.registerLinkEvents = function () {
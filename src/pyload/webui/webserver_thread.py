@@ -7,6 +7,7 @@ from cheroot import wsgi
 from cheroot.ssl.builtin import BuiltinSSLAdapter
 
 from .app import App
+from .app.blueprints.json_blueprint import STREAM_LIMIT
 
 
 # TODO: make configurable to serve API
@@ -43,7 +44,8 @@ class WebServerThread(threading.Thread):
         bind_path = "/"
         bind_addr = (self.host, self.port)
         wsgi_app = wsgi.PathInfoDispatcher({bind_path: self.app})
-        self.server = wsgi.Server(bind_addr, wsgi_app)
+        #: event streams hold a thread each, keep the default ten for everything else
+        self.server = wsgi.Server(bind_addr, wsgi_app, numthreads=10 + STREAM_LIMIT)
 
         if self.use_ssl:
             self.server.ssl_adapter = BuiltinSSLAdapter(
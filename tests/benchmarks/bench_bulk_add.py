@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Measures the job selection done by `ThreadManager.assign_job` every second.
+
+Run with `python -m tests.benchmarks.bench_job_scheduler`.
+"""
+
+import time
+import threading
+import time
+
+from ..support import PLUGINS, DatabaseCore
+from .helpers import measure
+
+SIZES = (1000, 10000, 100000)
+
+
+class Stub:
+    """
+    stands in for the addon, plugin and thread managers add_links calls.
+    """
+
+    def dispatch_event(self, *args):
+        pass
+
+    def parse_urls(self, urls):
+        return [(url, PLUGINS[len(url) % len(PLUGINS)]) for url in urls]
+
+    def create_info_thread(self, data, pid):
+        pass
+
+
+def bench(size):
+    core = DatabaseCore()
+    core.addon_manager = core.plugin_manager = core.thread_manager = Stub()
+    try:
+        core.populate(10000)
+        core.files.get_job(())  #: loads the job index, which is kept up to date
+        pid = core.files.add_package("Bulk", "")
+
+        done = threading.Event()
+        waits = []
+
+        def poll():
+            #: how long other users of the file manager wait for the lock
+            while not done.is_set():
+                waits.append(measure(lambda: core.files.get_info_data(), repeat=1)[0])
+                time.sleep(0.005)
+
+        poller = threading.Thread(target=poll)
+        poller.start()
+
+        batches = []
+        start = time.perf_counter()
+        count = core.files.add_links(
+            (f"http://example.com/bulk/{i}" for i in range(size)), pid, batches.append
+        )
+        elapsed = time.perf_counter() - start
+
+        done.set()
+        poller.join()
+
+        assert count == size and batches[-1] == size
+        print(
+            f"{size:>7} links | {size / elapsed:10.0f} links/s | "
+            f"{len(batches):4d} batches | job index {len(core.files.job_index):7d} | "
+            f"lock wait max {max(waits, default=0):6.1f} ms"
+        )
+    finally:
+        core.close()
+
+
+def main():
+    for size in SIZES:
+        bench(size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Measures how long the checksums of a finished download take, when hashed while
+downloading by a `StreamHasher` compared to reading the file afterwards, and
+the verification of several files one by one or concurrently.
+
+Run with `python -m tests.benchmarks.bench_checksum`.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from pyload.core.network.http.http_download import HTTPDownload
+from pyload.core.utils.hashing import StreamHasher
+
+from .helpers import RangeServer
+
+OPTIONS = {"interface": None, "proxies": None, "ipv6": False}
+
+ALGORITHMS = ("crc32", "md5")
+
+SIZE = 64 << 20
+
+#: files verified at once
+FILES = 8
+
+
+def expected(data):
+    return {"crc32": f"{zlib.crc32(data):08x}", "md5": hashlib.md5(data).hexdigest()}
+
+
+def bench_download(server, folder, connections):
+    filename = os.path.join(folder, f"stream{connections}")
+    hasher = StreamHasher(ALGORITHMS)
+
+    start = time.perf_counter()
+    HTTPDownload(server.url, filename, options=OPTIONS, hasher=hasher).download(
+        connections
+    )
+    download = time.perf_counter() - start
+
+    start = time.perf_counter()
+    streamed = hasher.hexdigest(filename)
+    streamed_time = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    full = StreamHasher(ALGORITHMS).hexdigest(filename)
+    full_time = (time.perf_counter() - start) * 1000
+
+    assert streamed == full == expected(server.data), "checksums differ"
+    print(
+        f"{connections} connections | download {download:5.2f} s | "
+        f"verify afterwards {full_time:7.1f} ms | streamed {streamed_time:7.1f} ms"
+    )
+
+
+def bench_verify(folder, data):
+    files = []
+    for i in range(FILES):
+        filename = os.path.join(folder, f"file{i}")
+        with open(filename, "wb") as fh:
+            fh.write(data)
+        files.append(filename)
+
+    def verify(filename):
+        return StreamHasher(["md5"]).hexdigest(filename)["md5"]
+
+    start = time.perf_counter()
+    serial = [verify(x) for x in files]
+    serial_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(4) as pool:
+        parallel = list(pool.map(verify, files))
+    parallel_time = time.perf_counter() - start
+
+    assert serial == parallel
+    print(
+        f"{FILES} files of {len(data) >> 20} MiB | one by one {serial_time:5.2f} s | "
+        f"4 threads {parallel_time:5.2f} s"
+    )
+
+
+def main():
+    folder = tempfile.mkdtemp(prefix="pyload-bench-")
+    server = RangeServer(SIZE)
+    try:
+        for connections in (1, 4):
+            bench_download(server, folder, connections)
+        bench_verify(folder, server.data)
+    finally:
+        server.close()
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
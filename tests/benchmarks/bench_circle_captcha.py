@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Measures how long `CircleCaptcha` takes to find the opened circle of generated
+captchas and checks it finds the right one in every image of the set.
+
+Run with `python -m tests.benchmarks.bench_circle_captcha`.
+"""
+
+import io
+import math
+import random
+import time
+
+from PIL import Image, ImageDraw
+
+from pyload.plugins.anticaptchas.CircleCaptcha import CircleCaptcha
+
+SIZE = (250, 150)
+CAPTCHAS = 50
+
+#: pixels the center found may be off
+TOLERANCE = 2
+
+
+def captcha(seed):
+    """
+    returns a gif of circles and noise with one circle opened and the center of
+    that circle, the same for the same seed.
+    """
+    rnd = random.Random(seed)
+    width, height = SIZE
+    img = Image.new("L", SIZE, 255)
+    draw = ImageDraw.Draw(img)
+
+    circles = []
+    for _ in range(1000):
+        r = rnd.randint(16, 29)
+        x, y = rnd.randint(r + 2, width - r - 3), rnd.randint(r + 2, height - r - 3)
+        if all(math.hypot(x - a, y - b) > r + c + 6 for a, b, c in circles):
+            circles.append((x, y, r))
+        if len(circles) == 6:
+            break
+
+    pixels = img.load()
+    for _ in range(width * height // 60):  #: noise
+        pixels[rnd.randrange(width), rnd.randrange(height)] = rnd.randint(40, 200)
+
+    for _ in range(2):  #: lines across
+        draw.line(
+            [(0, rnd.randrange(height)), (width, rnd.randrange(height))],
+            fill=rnd.randint(40, 200),
+        )
+
+    opened = rnd.randrange(len(circles))
+    for i, (x, y, r) in enumerate(circles):
+        box = (x - r, y - r, x + r, y + r)
+        color = rnd.randint(40, 200)
+        line = rnd.choice((1, 2))
+        draw.ellipse(box, outline=color, width=line)
+        if i == opened:  #: the gap stays clear of the noise
+            start = rnd.randrange(360)
+            gap = (x - r - 2, y - r - 2, x + r + 2, y + r + 2)
+            draw.arc(gap, start, start + rnd.randint(40, 70), 255, line + 4)
+
+    fh = io.BytesIO()
+    img.save(fh, "GIF")
+    return Image.open(fh), circles[opened][:2]
+
+
+def main():
+    ocr = object.__new__(CircleCaptcha)
+    ocr.log_debug = lambda *args: None
+
+    images = [captcha(seed) for seed in range(CAPTCHAS)]
+
+    took = []
+    found = 0
+    for img, (x, y) in images:
+        start = time.perf_counter()
+        coords = ocr.decrypt(img)
+        took.append(time.perf_counter() - start)
+        if coords and math.hypot(coords[0] - x, coords[1] - y) <= TOLERANCE:
+            found += 1
+
+    took.sort()
+    print(
+        f"{CAPTCHAS} captchas of {SIZE[0]}x{SIZE[1]} | found {found} | "
+        f"median {took[len(took) // 2] * 1000:5.1f} ms | max {took[-1] * 1000:5.1f} ms"
+    )
+    assert found == CAPTCHAS, "opened circles missed"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Measures wall and cpu time of concurrent `HTTPDownload`s from a local server
+limiting the speed of every connection.
+
+Run with `python -m tests.benchmarks.bench_http_download`.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from threading import Thread
+
+from pyload.core.network.http.http_download import HTTPDownload
+
+from .helpers import RangeServer
+
+OPTIONS = {"interface": None, "proxies": None, "ipv6": False}
+
+#: (downloads, connections per download)
+RUNS = ((1, 4), (10, 1), (50, 1), (50, 4))
+
+SIZE = 2 << 20
+RATE = 512 << 10
+
+
+def bench(server, downloads, connections):
+    folder = tempfile.mkdtemp(prefix="pyload-bench-")
+    errors = []
+
+    def download(i):
+        filename = os.path.join(folder, f"file{i}")
+        try:
+            HTTPDownload(server.url, filename, options=OPTIONS).download(connections)
+            with open(filename, "rb") as fh:
+                if fh.read() != server.data:
+                    errors.append(f"file{i} corrupted")
+        except Exception as exc:
+            errors.append(f"file{i}: {exc}")
+
+    threads = [Thread(target=download, args=(i,)) for i in range(downloads)]
+    start, cpu = time.perf_counter(), time.process_time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall, cpu = time.perf_counter() - start, time.process_time() - cpu
+
+    shutil.rmtree(folder, ignore_errors=True)
+    print(
+        f"{downloads:>3} downloads x {connections} connections | "
+        f"wall {wall:6.2f} s | cpu {cpu:6.2f} s | errors {len(errors)}"
+    )
+
+
+def main():
+    server = RangeServer(SIZE, RATE)
+    try:
+        for downloads, connections in RUNS:
+            bench(server, downloads, connections)
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
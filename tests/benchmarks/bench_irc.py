@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Measures how long XDCC downloads take until their bots offer the packs, when
+every download has its own IRC connection compared to all of them sharing one
+connection, from a local server answering after a delay like a remote one.
+
+Run with `python -m tests.benchmarks.bench_irc`.
+"""
+
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Thread
+
+from pyload.core.network.xdcc import irc
+
+#: seconds the server takes to register a connection and to answer a join
+DELAY = 0.25
+
+BOTS = 4
+PACKS = 16
+
+
+class IRCServer:
+    """
+    local IRC server where every nick starting with `bot` offers the packs it is
+    asked for.
+    """
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.connections = 0
+        self.joins = 0
+        self.sock = socket.socket()
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(64)
+        self.port = self.sock.getsockname()[1]
+        Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            conn, addr = self.sock.accept()
+            self.connections += 1
+            Thread(target=self._client, args=(conn,), daemon=True).start()
+
+    def _client(self, conn):
+        nick = None
+
+        def send(line):
+            conn.sendall((line + "\r\n").encode())
+
+        with conn, conn.makefile("rb") as fh:
+            for line in fh:
+                command, _, args = line.decode().rstrip("\r\n").partition(" ")
+                if command == "NICK":
+                    nick = args
+
+                elif command == "USER":
+                    time.sleep(self.delay)
+                    send(f":server 001 {nick} :Welcome")
+
+                elif command == "JOIN":
+                    time.sleep(self.delay)
+                    self.joins += 1
+                    send(f":{nick}!user@host JOIN {args}")
+
+                elif command == "WHOIS":
+                    send(f":server 311 {nick} {args} user host.{args} * :bot")
+
+                elif command == "PRIVMSG":
+                    bot, _, text = args.partition(" :")
+                    if text.startswith("xdcc send #"):
+                        send(
+                            f":{bot}!user@host.{bot} PRIVMSG {nick} :"
+                            f"\x01DCC SEND {bot}-{text[11:]}.bin 2130706433 1 1\x01"
+                        )
+
+                elif command == "QUIT":
+                    break
+
+
+def download(server, nick, bot, pack):
+    """
+    the IRC part of an XDCC download: join, check the bot and wait for its offer.
+    """
+    session = irc.get_session("127.0.0.1", server.port, nick, "ident", "real")
+    try:
+        session.join_channel("chan")
+        session.is_bot_online(bot)
+        request = session.request_pack(bot, pack)
+        try:
+            while True:
+                sender, text = request.get(10)
+                if text.startswith("\x01DCC SEND "):
+                    return text
+        finally:
+            request.close()
+    finally:
+        session.release()
+
+
+def main():
+    #: the flood limit of a real server is left out, it would only slow down the
+    #: shared connection, while a real server limits the connections per ip
+    irc.IRCSession.FLOOD_DELAY = 0
+    irc.IRCSession.LINGER = 1
+
+    jobs = [(f"bot{i % BOTS}", i) for i in range(PACKS)]
+    for workers in (1, PACKS):
+        for label, nick in (("own connection", lambda i: f"nick{i}"), ("shared", None)):
+            server = IRCServer(DELAY)
+            start = time.perf_counter()
+            with ThreadPoolExecutor(workers) as pool:
+                offers = list(
+                    pool.map(
+                        lambda job: download(
+                            server, nick(job[1]) if nick else "nick", *job
+                        ),
+                        jobs,
+                    )
+                )
+            took = time.perf_counter() - start
+
+            assert all(f"{b}-{p}.bin" in x for (b, p), x in zip(jobs, offers))
+            print(
+                f"{workers:2} at once | {label:>14} | {PACKS} packs from {BOTS} bots "
+                f"in {took:5.2f} s | {server.connections:2} connections | "
+                f"{server.joins:2} joins"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Measures the job selection done by `ThreadManager.assign_job` every second.
+
+Run with `python -m tests.benchmarks.bench_job_scheduler`.
+"""
+
+import time
+
+from ..support import PLUGINS, DatabaseCore
+from .helpers import measure
+
+SIZES = (1000, 10000, 100000)
+
+#: plugins occupied by running downloads, as built by assign_job
+OCC = tuple(sorted(PLUGINS[1:6]))
+
+
+def bench(size):
+    core = DatabaseCore()
+    try:
+        core.populate(size)
+
+        # legacy path: the job cache was dropped by a change, query the database
+        sql, sql_max = measure(lambda: core.db.get_job(OCC), repeat=20)
+
+        start = time.perf_counter()
+        core.files.get_job(OCC)
+        load = (time.perf_counter() - start) * 1000
+
+        pick, pick_max = measure(lambda: core.files.get_job(OCC), repeat=1000)
+
+        def assign():
+            pyfile = core.files.get_job(OCC)
+            pyfile.set_status("starting")
+            pyfile.release()
+
+        cycle, cycle_max = measure(assign, repeat=200)
+
+        print(
+            f"{size:>7} links | sql get_job {sql:8.3f} ms (max {sql_max:8.3f}) | "
+            f"index load {load:8.1f} ms | pick {pick:6.3f} ms (max {pick_max:6.3f}) | "
+            f"pick+start {cycle:6.3f} ms (max {cycle_max:6.3f})"
+        )
+    finally:
+        core.close()
+
+
+def main():
+    for size in SIZES:
+        bench(size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Compares status-, url-, name- and order-based link queries on a 100k-link database
+with and without the indexes of database version 6.
+
+Run with `python -m tests.benchmarks.bench_link_queries`.
+"""
+
+import os
+import sqlite3
+
+from ..support import DatabaseCore
+from .helpers import measure
+
+LINKS = 100000
+
+QUERIES = [
+    (
+        "queuecount",
+        "SELECT COUNT(*) FROM links as l INNER JOIN packages as p ON l.package=p.id WHERE p.queue=? AND l.status NOT IN (0,4)",
+        (1,),
+    ),
+    (
+        "processcount",
+        "SELECT COUNT(*) FROM links as l INNER JOIN packages as p ON l.package=p.id WHERE p.queue=? AND l.status IN (2,3,5,7,12) AND l.id != ?",
+        (1, 1),
+    ),
+    (
+        "get_job",
+        "SELECT l.id FROM links as l INNER JOIN packages as p ON l.package=p.id WHERE ((p.queue=1 AND l.plugin NOT IN ('Hoster01')) OR l.plugin IN ('DLC', 'LinkList', 'SerienjunkiesOrg', 'CCF', 'RSDF')) AND l.status IN (2,3,14) ORDER BY p.packageorder ASC, l.linkorder ASC LIMIT 5",
+        (),
+    ),
+    (
+        "get_plugin_job",
+        "SELECT l.id FROM links as l INNER JOIN packages as p ON l.package=p.id WHERE l.plugin IN ('DLC', 'CCF') AND l.status IN (2,3,14) ORDER BY p.packageorder ASC, l.linkorder ASC LIMIT 5",
+        (),
+    ),
+    (
+        "restart_failed",
+        "UPDATE links SET status=3,error='' WHERE status IN (6, 8, 9)",
+        (),
+    ),
+    ("delete_finished", "DELETE FROM links WHERE status IN (0,4)", ()),
+    (
+        "update_link_info",
+        "UPDATE links SET name=?, size=?, status=? WHERE url=? AND status IN (1,2,3,14)",
+        ("name", 0, 2, "http://example.com/54321"),
+    ),
+    (
+        "find_duplicates",
+        "SELECT l.plugin FROM links as l INNER JOIN packages as p ON l.package=p.id AND p.folder=? WHERE l.id!=? AND l.status=0 AND l.name=?",
+        ("", 1, "http://example.com/54321"),
+    ),
+    (
+        "get_package_data",
+        "SELECT id,url,name,size,status,error,plugin,package,linkorder FROM links WHERE package=? ORDER BY linkorder",
+        (500,),
+    ),
+]
+
+#: indexes of database version 5
+LEGACY_INDEXES = ['CREATE INDEX "p_id_index" ON links(package)']
+
+
+def run(conn):
+    c = conn.cursor()
+    timings = {}
+    for name, statement, params in QUERIES:
+
+        def query():
+            c.execute("SAVEPOINT bench")
+            c.execute(statement, params).fetchall()
+            c.execute("ROLLBACK TO bench")
+            c.execute("RELEASE bench")
+
+        timings[name] = measure(query, repeat=20)[0]
+    return timings
+
+
+def main():
+    core = DatabaseCore()
+    try:
+        core.populate(LINKS)
+        core.db.shutdown()
+        core.db.join()
+
+        conn = sqlite3.connect(
+            os.path.join(core.userdir, "data", "pyload.db"), isolation_level=None
+        )
+        # a long-running queue: mostly finished, some queued, failed and offline
+        conn.execute(
+            "UPDATE links SET status = CASE id % 10 WHEN 6 THEN 3 WHEN 7 THEN 3 WHEN 8 THEN 8 WHEN 9 THEN 1 ELSE 0 END"
+        )
+        conn.execute("ANALYZE")
+        after = run(conn)
+
+        for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='index' AND sql IS NOT NULL"
+        ).fetchall():
+            conn.execute(f'DROP INDEX "{name}"')
+        for statement in LEGACY_INDEXES:
+            conn.execute(statement)
+        conn.execute("ANALYZE")
+        before = run(conn)
+        conn.close()
+
+        print(f"{LINKS} links      before (ms)   after (ms)")
+        for name, statement, params in QUERIES:
+            print(f"{name:<18} {before[name]:>11.3f} {after[name]:>12.3f}")
+    finally:
+        core.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Measures a MEGA download decrypted while it is written compared to the former
+second pass over a `.crypted` copy, from a local server.
+
+Run with `python -m tests.benchmarks.bench_mega`.
+"""
+
+import os
+import random
+import shutil
+import struct
+import tempfile
+import time
+
+import Cryptodome.Cipher.AES
+
+from pyload.core.network.http.http_download import HTTPDownload
+from pyload.plugins.downloaders.MegaCoNz import MegaCrypto
+
+from .helpers import RangeServer
+
+OPTIONS = {"interface": None, "proxies": None, "ipv6": False}
+
+SIZE = 64 << 20
+
+
+def second_pass(filename, key):
+    """
+    the former decryption, the MAC of every chunk computed in turn.
+    """
+    k, iv, meta_mac = MegaCrypto.get_cipher_key(key)
+    key = MegaCrypto.a32_to_str(k)
+    cipher = Cryptodome.Cipher.AES.new(
+        key,
+        Cryptodome.Cipher.AES.MODE_CTR,
+        nonce=MegaCrypto.a32_to_str(iv[0:2]),
+        initial_value=0,
+    )
+    mac = Cryptodome.Cipher.AES.new(
+        key, Cryptodome.Cipher.AES.MODE_CBC, iv=bytes(16)
+    )
+    file_mac = bytes(16)
+
+    with open(filename, mode="rb") as f, open(filename[:-8], mode="wb") as df:
+        for chunk_start, chunk_size in MegaCrypto.get_chunks(os.path.getsize(filename)):
+            chunk = cipher.decrypt(f.read(chunk_size))
+            df.write(chunk)
+
+            cbc = Cryptodome.Cipher.AES.new(
+                key, Cryptodome.Cipher.AES.MODE_CBC, iv=MegaCrypto.a32_to_str(iv[0:2] * 2)
+            )
+            chunk_mac = cbc.encrypt(chunk.ljust(-(-len(chunk) // 16) * 16, b"\0"))[-16:]
+            file_mac = mac.encrypt(chunk_mac)
+
+    os.remove(filename)
+    d = struct.unpack(">4I", file_mac)
+    return (d[0] ^ d[1], d[2] ^ d[3])
+
+
+def main():
+    folder = tempfile.mkdtemp(prefix="pyload-bench-")
+    server = RangeServer(SIZE)
+    key = tuple(random.Random(0).getrandbits(32) for _ in range(8))
+    try:
+        for connections in (1, 4):
+            filename = os.path.join(folder, f"former{connections}")
+            start = time.perf_counter()
+            HTTPDownload(server.url, filename + ".crypted", options=OPTIONS).download(
+                connections
+            )
+            loaded = time.perf_counter() - start
+            expected = second_pass(filename + ".crypted", key)
+            former = time.perf_counter() - start
+
+            filename = os.path.join(folder, f"stream{connections}")
+            decrypter = MegaCrypto.Decrypter(key)
+            start = time.perf_counter()
+            HTTPDownload(
+                server.url, filename, options=OPTIONS, transform=decrypter
+            ).download(connections)
+            mac = decrypter.digest(filename)
+            streamed = time.perf_counter() - start
+
+            with open(filename, "rb") as f1, open(
+                os.path.join(folder, f"former{connections}"), "rb"
+            ) as f2:
+                assert f1.read() == f2.read(), "plaintexts differ"
+            assert mac == expected, "MACs differ"
+
+            print(
+                f"{connections} connections | former {former:5.2f} s "
+                f"(download {loaded:5.2f} s, 2x disk space) | "
+                f"streamed {streamed:5.2f} s"
+            )
+    finally:
+        server.close()
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Measures the merge of split files done by the `MergeFiles` addon, copying in
+the kernel compared to the former read/write loop of 4 KiB blocks.
+
+Run with `python -m tests.benchmarks.bench_merge`.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+
+from pyload.plugins.addons import MergeFiles
+
+from ..support import random_bytes
+
+PARTS = 4
+PART_SIZE = 64 << 20
+
+
+def loop(parts, filename):
+    """
+    the former merge, progress was updated after every block.
+    """
+    with open(filename, mode="wb") as final_file:
+        for part in parts:
+            with open(part, "rb") as s_file:
+                while True:
+                    f_buffer = s_file.read(4096)
+                    if not f_buffer:
+                        break
+                    final_file.write(f_buffer)
+
+
+def kernel(parts, filename, copies=None):
+    if copies is not None:
+        MergeFiles._kernel_copies = lambda: list(copies)
+    with open(filename, mode="wb", buffering=0) as final_file:
+        for part in parts:
+            with open(part, mode="rb", buffering=0) as s_file:
+                MergeFiles.copy_file(s_file, final_file)
+
+
+def main():
+    folder = tempfile.mkdtemp(prefix="pyload-bench-")
+    try:
+        parts = []
+        for i in range(PARTS):
+            part = os.path.join(folder, f"file.{i + 1:03}")
+            with open(part, "wb") as fh:
+                fh.write(random_bytes(PART_SIZE, i))
+            parts.append(part)
+
+        total = PARTS * PART_SIZE >> 20
+        kernel_copies = MergeFiles._kernel_copies()
+        runs = [("4 KiB loop", lambda f: loop(parts, f))]
+        for copy in kernel_copies:
+            runs.append((copy.__name__.strip("_"), lambda f, c=copy: kernel(parts, f, [c])))
+        runs.append(("userspace 1 MiB", lambda f: kernel(parts, f, [])))
+
+        expected = None
+        for name, func in runs:
+            filename = os.path.join(folder, "file")
+            start = time.perf_counter()
+            func(filename)
+            took = time.perf_counter() - start
+
+            with open(filename, "rb") as fh:
+                data = fh.read()
+            expected = expected or data
+            assert data == expected, f"{name} merged different data"
+            os.remove(filename)
+
+            print(f"{name:>16} | {total} MiB in {took:5.2f} s | {total / took:7.0f} MiB/s")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
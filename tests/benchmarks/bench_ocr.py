@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Measures the preprocessing steps of `BaseOCR` on generated captchas, working
+on arrays compared to the former loops over every pixel, and checks that both
+give the same images.
+
+Run with `python -m tests.benchmarks.bench_ocr`.
+"""
+
+import random
+import time
+
+from PIL import Image, ImageDraw, ImageFont
+
+from pyload.plugins.base.ocr import BaseOCR
+
+SIZE = (200, 60)
+CAPTCHAS = 4
+
+STEPS = (
+    ("eval_black_white", (140,)),
+    ("clean", (3,)),
+    ("derotate_by_average", ()),
+    ("split_captcha_letters", ()),
+)
+
+
+def captcha(seed):
+    """
+    returns a greyscale captcha of 5 rotated letters with noise, the same for the
+    same seed.
+    """
+    rnd = random.Random(seed)
+    img = Image.new("L", SIZE, 255)
+    font = ImageFont.load_default(size=32)
+    for i in range(5):
+        letter = Image.new("L", (40, 44), 0)
+        ImageDraw.Draw(letter).text(
+            (6, 2), rnd.choice("ABCDEFGHJKLMNPQRSTUVWXYZ23456789"), 255, font=font
+        )
+        letter = letter.rotate(rnd.randint(-25, 25), expand=False)
+        img.paste(rnd.randint(0, 90), (8 + i * 37, rnd.randint(2, 14)), letter)
+
+    pixels = img.load()
+    for _ in range(SIZE[0] * SIZE[1] // 25):  #: noise
+        pixels[rnd.randrange(SIZE[0]), rnd.randrange(SIZE[1])] = rnd.randrange(256)
+
+    for _ in range(3):  #: lines across
+        ImageDraw.Draw(img).line(
+            [(0, rnd.randrange(SIZE[1])), (SIZE[0], rnd.randrange(SIZE[1]))],
+            fill=rnd.randrange(120),
+        )
+
+    return img
+
+
+class Former(BaseOCR):
+    """
+    the former preprocessing, one pixel after the other.
+    """
+
+    def eval_black_white(self, limit):
+        self.pixels = self.img.load()
+        w, h = self.img.size
+        for x in range(w):
+            for y in range(h):
+                if self.pixels[x, y] > limit:
+                    self.pixels[x, y] = 255
+                else:
+                    self.pixels[x, y] = 0
+
+    def clean(self, allowed):
+        pixels = self.pixels
+
+        w, h = self.img.size
+
+        for x in range(w):
+            for y in range(h):
+                if pixels[x, y] == 255:
+                    continue
+                #: No point in processing white pixels since we only want to remove black pixel
+                count = 0
+
+                try:
+                    if pixels[x - 1, y - 1] != 255:
+                        count += 1
+
+                    if pixels[x - 1, y] != 255:
+                        count += 1
+
+                    if pixels[x - 1, y + 1] != 255:
+                        count += 1
+
+                    if pixels[x, y + 1] != 255:
+                        count += 1
+
+                    if pixels[x + 1, y + 1] != 255:
+                        count += 1
+
+                    if pixels[x + 1, y] != 255:
+                        count += 1
+
+                    if pixels[x + 1, y - 1] != 255:
+                        count += 1
+
+                    if pixels[x, y - 1] != 255:
+                        count += 1
+
+                except Exception:
+                    pass
+
+                #: Not enough neighbors are dark pixels so mark this pixel
+                #: To be changed to white
+                if count < allowed:
+                    pixels[x, y] = 1
+
+        #: Second pass: this time set all 1's to 255 (white)
+        for x in range(w):
+            for y in range(h):
+                if pixels[x, y] == 1:
+                    pixels[x, y] = 255
+
+        self.pixels = pixels
+
+    def derotate_by_average(self):
+        """
+        Rotate by checking each angle and guess most suitable.
+        """
+        w, h = self.img.size
+        pixels = self.pixels
+
+        for x in range(w):
+            for y in range(h):
+                if pixels[x, y] == 0:
+                    pixels[x, y] = 155
+
+        highest = {}
+        counts = {}
+
+        for angle in range(-45, 45):
+
+            tmpimage = self.img.rotate(angle)
+
+            pixels = tmpimage.load()
+
+            w, h = self.img.size
+
+            for x in range(w):
+                for y in range(h):
+                    if pixels[x, y] == 0:
+                        pixels[x, y] = 255
+
+            count = {}
+
+            for x in range(w):
+                count[x] = 0
+                for y in range(h):
+                    if pixels[x, y] == 155:
+                        count[x] += 1
+
+            sum = 0
+            cnt = 0
+
+            for x in count.values():
+                if x != 0:
+                    sum += x
+                    cnt += 1
+
+            avg = sum // cnt
+            counts[angle] = cnt
+            highest[angle] = 0
+            for x in count.values():
+                if x > highest[angle]:
+                    highest[angle] = x
+
+            highest[angle] = highest[angle] - avg
+
+        hkey = 0
+        hvalue = 0
+
+        for key, value in highest.items():
+            if value > hvalue:
+                hkey = key
+                hvalue = value
+
+        self.img = self.img.rotate(hkey)
+        pixels = self.img.load()
+
+        for x in range(w):
+            for y in range(h):
+                if pixels[x, y] == 0:
+                    pixels[x, y] = 255
+
+                if pixels[x, y] == 155:
+                    pixels[x, y] = 0
+
+        self.pixels = pixels
+
+    def split_captcha_letters(self):
+        captcha = self.img
+        started = False
+        letters = []
+        width, height = captcha.size
+        bottomY, topY = 0, height
+        pixels = captcha.load()
+
+        for x in range(width):
+            black_pixel_in_col = False
+            for y in range(height):
+                if pixels[x, y] != 255:
+                    if not started:
+                        started = True
+                        firstX = x
+                        lastX = x
+
+                    if y > bottomY:
+                        bottomY = y
+                    if y < topY:
+                        topY = y
+                    if x > lastX:
+                        lastX = x
+
+                    black_pixel_in_col = True
+
+            if black_pixel_in_col is False and started is True:
+                rect = (firstX, topY, lastX, bottomY)
+                new_captcha = captcha.crop(rect)
+
+                w, h = new_captcha.size
+                if w > 5 and h > 5:
+                    letters.append(new_captcha)
+
+                started = False
+                bottomY, topY = 0, height
+
+        return letters
+
+
+def ocr(cls, img):
+    ocr = object.__new__(cls)
+    ocr.img = img.copy()
+    ocr.pixels = ocr.img.load()
+    return ocr
+
+
+def main():
+    images = [captcha(seed) for seed in range(CAPTCHAS)]
+    for name, args in STEPS:
+        took = {}
+        results = {}
+        for cls in (Former, BaseOCR):
+            ocrs = [ocr(cls, img) for img in images]
+            for x in ocrs:  #: the steps before this one
+                for step, step_args in STEPS[: [s[0] for s in STEPS].index(name)]:
+                    if step != "split_captcha_letters":
+                        BaseOCR.__dict__[step](x, *step_args)
+
+            start = time.perf_counter()
+            letters = [getattr(x, name)(*args) for x in ocrs]
+            took[cls] = (time.perf_counter() - start) / CAPTCHAS
+            results[cls] = [x.img.tobytes() for x in ocrs], [
+                [(y.size, y.tobytes()) for y in z] for z in letters if z
+            ]
+
+        assert results[Former] == results[BaseOCR], f"{name} gives other images"
+        print(
+            f"{name:>21} | former {took[Former] * 1000:8.1f} ms | "
+            f"arrays {took[BaseOCR] * 1000:6.1f} ms | "
+            f"{took[Former] / took[BaseOCR]:6.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
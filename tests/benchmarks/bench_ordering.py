@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Measures the job selection done by `ThreadManager.assign_job` every second.
+
+Run with `python -m tests.benchmarks.bench_job_scheduler`.
+"""
+
+import time
+import random
+import time
+
+from ..support import DatabaseCore
+from .helpers import measure
+
+SIZES = (1000, 10000, 50000)
+
+
+class Stub:
+    """
+    stands in for the thread and addon managers.
+    """
+
+    def processing_ids(self):
+        return []
+
+    def dispatch_event(self, *args):
+        pass
+
+
+def bench(size):
+    core = DatabaseCore()
+    core.thread_manager = core.addon_manager = Stub()
+    try:
+        core.populate(size, per_package=size)
+        rnd = random.Random(size)
+        ids = list(range(1, size + 1))
+
+        move, move_max = measure(
+            lambda: core.files.reorder_file(rnd.choice(ids), rnd.randrange(size)),
+            repeat=200,
+        )
+
+        #: a tenth of the links, one by one and in one pass
+        victims = rnd.sample(ids, size // 10)
+        single = victims[: len(victims) // 2]
+        start = time.perf_counter()
+        for id in single:
+            core.files.delete_link(id)
+        single_ms = (time.perf_counter() - start) * 1000 / len(single)
+
+        bulk = victims[len(victims) // 2 :]
+        start = time.perf_counter()
+        core.files.delete_links(bulk)
+        bulk_ms = (time.perf_counter() - start) * 1000 / len(bulk)
+
+        print(
+            f"{size:>7} links | move {move:6.3f} ms (max {move_max:7.3f}) | "
+            f"delete {single_ms:6.3f} ms/link | bulk delete {bulk_ms:6.3f} ms/link"
+        )
+    finally:
+        core.close()
+
+
+def main():
+    for size in SIZES:
+        bench(size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Measures the routing of urls to the bundled plugins done by
+`PluginManager.parse_urls`, compared to matching every pattern in turn.
+
+Run with `python -m tests.benchmarks.bench_url_router`.
+"""
+
+import time
+
+from pyload.core.datatypes.url_router import URLRouter
+from pyload.core.managers.plugin_manager import PluginManager
+
+from ..support import PluginCore, linear, sample_urls
+
+SIZES = (1000, 10000, 100000)
+
+#: share of urls no plugin handles
+UNKNOWN = 0.2
+
+
+def main():
+    core = PluginCore()
+    try:
+        start = time.perf_counter()
+        PluginManager(core)
+        cold = (time.perf_counter() - start) * 1000
+
+        #: unchanged plugins are taken from the index file now
+        start = time.perf_counter()
+        manager = PluginManager(core)
+        warm = (time.perf_counter() - start) * 1000
+
+        plugins = list(manager.pattern_plugins())
+        start = time.perf_counter()
+        router = URLRouter(plugins)  #: without cached literals
+        build = (time.perf_counter() - start) * 1000
+
+        print(
+            f"{len(router)} patterns, {len(router.fallback)} without literal | "
+            f"plugin index cold {cold:.1f} ms, warm {warm:.1f} ms | "
+            f"router build {build:.1f} ms"
+        )
+
+        for size in SIZES:
+            urls = sample_urls(plugins, size, unknown=UNKNOWN)
+
+            start = time.perf_counter()
+            expected = linear(plugins, urls)
+            old = time.perf_counter() - start
+
+            start = time.perf_counter()
+            result = manager.parse_urls(urls)
+            new = time.perf_counter() - start
+
+            assert result == expected, "router and linear scan disagree"
+            print(
+                f"{size:>7} urls | linear {size / old:10.0f} urls/s | "
+                f"router {size / new:10.0f} urls/s | {old / new:5.1f}x"
+            )
+    finally:
+        core.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Measures the throughput of `XDCCRequest` receiving from a loopback DCC bot,
+compared to the former receive loop, for a bot sending ahead and for one
+waiting for the acknowledge of every packet.
+
+Run with `python -m tests.benchmarks.bench_xdcc`.
+"""
+
+import os
+import select
+import shutil
+import socket
+import struct
+import tempfile
+import time
+from multiprocessing import Process
+
+from pyload.core.network.xdcc.request import XDCCRequest
+
+from ..support import random_bytes
+
+SIZE = 128 << 20
+
+#: (name, bytes per packet, wait for the ack of every packet)
+MODES = (("send ahead", 64 << 10, False), ("ack per packet", 16 << 10, True))
+
+
+def _bot(sock, data, packet, wait):
+    ack = struct.Struct("!I")
+    while True:
+        conn, addr = sock.accept()
+        with conn:
+            acked = 0
+            received = b""
+            for pos in range(0, len(data), packet):
+                conn.sendall(data[pos : pos + packet])
+                while wait and acked < min(pos + packet, len(data)) & 0xFFFFFFFF:
+                    received += conn.recv(4096)
+                    while len(received) >= 4:
+                        acked = ack.unpack(received[:4])[0]
+                        received = received[4:]
+
+            #: the file is sent, wait for the receiver to acknowledge all of it
+            while acked != len(data) & 0xFFFFFFFF:
+                chunk = conn.recv(4096)
+                if not chunk:
+                    break
+                received += chunk
+                while len(received) >= 4:
+                    acked = ack.unpack(received[:4])[0]
+                    received = received[4:]
+
+
+class DCCBot:
+    """
+    Loopback bot sending the same random data to every connection, in its own
+    process.
+    """
+
+    def __init__(self, size, packet, wait):
+        self.data = random_bytes(size, size)
+        self.sock = socket.socket()
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(8)
+        self.port = self.sock.getsockname()[1]
+
+        self.process = Process(
+            target=_bot, args=(self.sock, self.data, packet, wait), daemon=True
+        )
+        self.process.start()
+
+    def close(self):
+        self.process.terminate()
+        self.process.join()
+        self.sock.close()
+
+
+def former(ip, port, filename, filesize):
+    """
+    the former receive loop: select every 0.1 s, a new bytes object per recv, an
+    ack after every recv and sleeps guessed from the size of the reads.
+    """
+    received = 0
+    sleep = 0.0
+    last_recv_size = 0
+    with open(filename, "wb") as fh:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.connect((ip, port))
+        sock.setblocking(0)
+        while True:
+            fdset = select.select([sock], [], [], 0.1)
+            if sock in fdset[0]:
+                try:
+                    data = sock.recv(16384)
+                except BlockingIOError:
+                    continue
+                if not data or received + len(data) > filesize:
+                    break
+                received += len(data)
+                fh.write(data)
+                if len(data) < last_recv_size:
+                    sleep += 0.002
+                else:
+                    sleep *= 0.7
+                last_recv_size = len(data)
+                time.sleep(sleep)
+                try:
+                    sock.send(struct.pack("!I", received))
+                except OSError:
+                    pass
+        sock.close()
+
+
+def current(ip, port, filename, filesize):
+    req = XDCCRequest(options={"recv_buffer": 1 << 20})
+    req.filesize = filesize
+    req.download(ip, port, filename)
+
+
+def main():
+    folder = tempfile.mkdtemp(prefix="pyload-bench-")
+    try:
+        for name, packet, wait in MODES:
+            bot = DCCBot(SIZE, packet, wait)
+            try:
+                for label, func in (("former", former), ("current", current)):
+                    filename = os.path.join(folder, label)
+                    start, cpu = time.perf_counter(), time.process_time()
+                    func("127.0.0.1", bot.port, filename, SIZE)
+                    wall, cpu = time.perf_counter() - start, time.process_time() - cpu
+
+                    with open(filename, "rb") as fh:
+                        assert fh.read() == bot.data, f"{label} received wrong data"
+                    os.remove(filename)
+
+                    print(
+                        f"{name:>14} | {label:>7} | {(SIZE >> 20) / wall:7.0f} MiB/s | "
+                        f"cpu {cpu:5.2f} s"
+                    )
+            finally:
+                bot.close()
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+import re
+import socket
+import socketserver
+import statistics
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from multiprocessing import Process
+
+from ..support import random_bytes
+
+
+def measure(func, repeat=100):
+    """
+    returns median and max latency of func in milliseconds.
+    """
+    timings = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return statistics.median(timings), max(timings)
+
+
+def _serve(data, rate, port):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            start, end = 0, len(data) - 1
+            m = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+            if m:
+                start = int(m.group(1))
+                end = min(int(m.group(2) or end), end)
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+            else:
+                self.send_response(200)
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.end_headers()
+
+            try:
+                for pos in range(start, end + 1, 16 << 10):
+                    self.wfile.write(data[pos : min(pos + (16 << 10), end + 1)])
+                    if rate:
+                        time.sleep((16 << 10) / rate)
+            except OSError:
+                pass
+
+    #: http.server.ThreadingHTTPServer needs python 3.7
+    class ThreadingHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+        daemon_threads = True
+        request_queue_size = 256  #: listen backlog, set before the server binds
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    httpd.handle_error = lambda request, client_address: None  #: aborted connections
+    httpd.serve_forever()
+
+
+class RangeServer:
+    """
+    Local HTTP server with range support serving random data, rate is the speed
+    limit of each connection in bytes per second. It runs in its own process to
+    not compete with the benchmarked code.
+    """
+
+    def __init__(self, size, rate=0):
+        self.data = random_bytes(size, size)
+
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+
+        self.process = Process(target=_serve, args=(self.data, rate, port), daemon=True)
+        self.process.start()
+        self.url = f"http://127.0.0.1:{port}/file"
+
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port)).close()
+                break
+            except OSError:
+                time.sleep(0.05)
+
+    def close(self):
+        self.process.terminate()
+        self.process.join()
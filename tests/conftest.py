@@ -7,4 +7,16 @@ If you don't know what this is for, just leave it empty. Read more about
 conftest.py under: https://pytest.org/latest/plugins.html
 """
 
-# import pytest
+import pytest
+
+
+@pytest.fixture
+def core():
+    """
+    database thread, file and event manager on a throw-away user directory.
+    """
+    from tests.support import DatabaseCore
+
+    core = DatabaseCore()
+    yield core
+    core.close()
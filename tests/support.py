@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+Stand-ins for `pyload.core.Core` and data shared by the tests and benchmarks.
+"""
+
+import logging
+import random
+import shutil
+import string
+import tempfile
+
+from pyload.core.config.parser import ConfigParser
+from pyload.core.datatypes.url_router import sre_parse
+from pyload.core.managers.event_manager import EventManager
+from pyload.core.managers.file_manager import FileManager
+from pyload.core.threads.database_thread import DatabaseThread
+
+PLUGINS = ["BasePlugin"] + [f"Hoster{i:02}" for i in range(20)]
+
+
+def random_bytes(size, seed=0):
+    """
+    returns size reproducible random bytes, like `random.Random.randbytes` of
+    python 3.9.
+    """
+    return random.Random(seed).getrandbits(size * 8).to_bytes(size, "little")
+
+
+class DatabaseCore:
+    """
+    Minimal stand-in for `pyload.core.Core` running the real database thread and
+    file manager on a throw-away user directory.
+    """
+
+    def __init__(self):
+        self.userdir = tempfile.mkdtemp(prefix="pyload-test-")
+        self._ = lambda x: x
+        self.debug = 0
+        self.log = logging.getLogger("pyload-test")
+        self.config = ConfigParser(self.userdir)
+
+        self.db = DatabaseThread(self)
+        self.db.setup()
+
+        self.files = self.file_manager = FileManager(self)
+        self.evm = self.event_manager = EventManager(self)
+
+    def populate(self, links, per_package=100, queue=1):
+        """
+        fills the database with links spread over packages and plugins.
+        """
+        for first in range(0, links, per_package):
+            pid = self.db.add_package(f"Package {first}", "", queue)
+            self.db.add_links(
+                [
+                    (f"http://example.com/{first + i}", PLUGINS[(first + i) % len(PLUGINS)])
+                    for i in range(min(per_package, links - first))
+                ],
+                pid,
+            )
+        self.db.sync_save()
+
+    def query(self, statement, *params):
+        """
+        runs statement on the database thread, returns the rows.
+        """
+        return self.db.queue(lambda db: db.c.execute(statement, params).fetchall())
+
+    def close(self):
+        if self.db.is_alive():
+            self.db.shutdown()
+            self.db.join()
+        shutil.rmtree(self.userdir, ignore_errors=True)
+
+
+class PluginCore:
+    """
+    Minimal stand-in for `pyload.core.Core` as needed by the plugin manager.
+    """
+
+    def __init__(self):
+        self.userdir = self.tempdir = tempfile.mkdtemp(prefix="pyload-test-")
+        self._ = lambda x: x
+        self.debug = 0
+        self.log = logging.getLogger("pyload-test")
+        self.config = ConfigParser(self.userdir)
+
+    def close(self):
+        shutil.rmtree(self.userdir, ignore_errors=True)
+
+
+CATEGORIES = {
+    "CATEGORY_DIGIT": string.digits,
+    "CATEGORY_WORD": string.ascii_letters + string.digits + "_",
+    "CATEGORY_SPACE": " ",
+    "CATEGORY_NOT_SPACE": string.ascii_letters,
+    "CATEGORY_NOT_DIGIT": string.ascii_letters,
+    "CATEGORY_NOT_WORD": "-",
+}
+
+
+def _sample(items, rnd):
+    """
+    returns a random string the parsed pattern most likely matches.
+    """
+    out = []
+    for op, av in items:
+        op = str(op)
+        if op == "LITERAL":
+            out.append(chr(av))
+        elif op == "NOT_LITERAL":
+            out.append("x" if chr(av) != "x" else "y")
+        elif op == "ANY":
+            out.append(rnd.choice(string.ascii_lowercase))
+        elif op == "IN":
+            chars = []
+            for kind, value in av:
+                kind = str(kind)
+                if kind == "LITERAL":
+                    chars.append(chr(value))
+                elif kind == "RANGE":
+                    chars.extend(map(chr, range(value[0], min(value[1], value[0] + 26) + 1)))
+                elif kind == "CATEGORY":
+                    chars.extend(CATEGORIES.get(str(value), ""))
+                elif kind == "NEGATE":
+                    chars = list(string.ascii_lowercase)
+                    break
+            out.append(rnd.choice(chars or "a"))
+        elif op == "SUBPATTERN":
+            out.append(_sample(av[-1], rnd))
+        elif op in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT"):
+            low, high, sub = av
+            count = max(low, min(high, rnd.randint(low, low + 12)))
+            out.extend(_sample(sub, rnd) for _ in range(count))
+        elif op == "BRANCH":
+            out.append(_sample(rnd.choice(av[1]), rnd))
+    return "".join(out)
+
+
+def sample_urls(plugins, size, seed=0, unknown=0.2):
+    """
+    returns urls generated from the plugin patterns, the share unknown of them
+    handled by no plugin.
+    """
+    rnd = random.Random(seed)
+    urls = []
+    for name, value in plugins:
+        parsed = sre_parse.parse(value["pattern"])
+        for _ in range(20):
+            url = _sample(parsed, rnd)
+            if value["re"].match(url):
+                urls.append(url)
+                break
+
+    result = []
+    for i in range(size):
+        if rnd.random() < unknown:
+            host = "".join(rnd.choices(string.ascii_lowercase, k=8))
+            result.append(f"https://{host}.example/file/{i}")
+        else:
+            result.append(rnd.choice(urls))
+    return result
+
+
+def linear(plugins, urls):
+    """
+    the former parse_urls: every pattern is tried in turn.
+    """
+    res = []
+    for url in urls:
+        for name, value in plugins:
+            if value["re"].match(url):
+                res.append((url, name))
+                break
+        else:
+            res.append((url, "DefaultPlugin"))
+    return res
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+import types
+
+
+def stub_managers(core):
+    """
+    the managers add_links reports to, routing every url to the plugin named in
+    its host.
+    """
+    core.checked = []
+    core.addon_manager = types.SimpleNamespace(dispatch_event=lambda *args: None)
+    core.plugin_manager = types.SimpleNamespace(
+        parse_urls=lambda urls: [(url, url.split("/")[2]) for url in urls]
+    )
+    core.thread_manager = types.SimpleNamespace(
+        create_info_thread=lambda data, pid: core.checked.append((data, pid))
+    )
+
+
+def test_rows_map_to_their_urls(core):
+    pid = core.db.add_package("Package", "", 1)
+    first = core.db.add_links([("http://a/0", "A")], pid)
+    links = [(f"http://{p}/{i}", p) for i, p in enumerate("ABCABCAB", 1)]
+
+    rows = core.db.add_links(links, pid)
+
+    assert [plugin for id, plugin, order in rows] == [p for url, p in links]
+    gap = core.db.ORDER_GAP
+    assert [order for id, plugin, order in rows] == [
+        first[0][2] + gap * i for i in range(1, len(links) + 1)
+    ]
+    for (id, plugin, order), (url, p) in zip(rows, links):
+        assert core.query("SELECT url, plugin, linkorder FROM links WHERE id=?", id) == [
+            (url, p, order)
+        ]
+
+
+def test_batches_are_announced_and_indexed(core):
+    stub_managers(core)
+    core.files.BULK_BATCH = 40
+    core.files.INSERT_EVENTS = 10
+    pid = core.files.add_package("Package", "")
+    core.files.job_index.load(lambda: ([], [(pid, 1, 0)]))
+
+    urls = [f"http://host{i % 3}/{i}" for i in range(85)]
+    progress = []
+    seq = core.evm.seq
+    assert core.files.add_links(iter(urls), pid, progress.append) == len(urls)
+
+    assert progress == [40, 80, 85]
+    stored = core.query(
+        "SELECT id, url, plugin FROM links WHERE package=? ORDER BY linkorder", pid
+    )
+    assert [url for id, url, plugin in stored] == urls
+    assert [plugin for id, url, plugin in stored] == [x.split("/")[2] for x in urls]
+
+    #: large batches update the package, small ones announce every link
+    cursor, events = core.evm.read(seq)
+    updates = [e for e in events if e[0] == "update"]
+    inserts = [e for e in events if e[0] == "insert"]
+    assert updates == [["update", "queue", "pack", pid]]
+    assert [e[3] for e in inserts] == [id for id, url, plugin in stored[80:]]
+    assert [e[4] for e in inserts] == list(range(80, 85))  #: positions
+
+    assert len(core.files.job_index) == len(urls)
+    assert core.checked == [([(url, url.split("/")[2]) for url in urls], pid)]
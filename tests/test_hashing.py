@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import random
+import zlib
+
+import pytest
+
+from pyload.core.utils import hashing
+from pyload.core.utils.hashing import StreamHasher, adler32_combine, crc32_combine
+from tests.support import random_bytes
+
+ALGORITHMS = ["crc32", "adler32", "md5", "sha1"]
+
+
+def expected(data):
+    result = {x: hashlib.new(x, data).hexdigest() for x in ("md5", "sha1")}
+    for name in ("crc32", "adler32"):
+        result[name] = f"{getattr(zlib, name)(data) & 0xFFFFFFFF:08x}"
+    return result
+
+
+def chunks(rnd, size, count):
+    """
+    ranges of count chunks of a file of size, their pieces as interleaved as
+    if they were loaded in parallel.
+    """
+    bounds = sorted({0, size, *rnd.sample(range(1, size), count - 1)})
+    pieces = []
+    for start, end in zip(bounds, bounds[1:]):
+        pos = start
+        chunk = []
+        while pos < end:
+            step = min(end - pos, rnd.randrange(1, 4096))
+            chunk.append((pos, pos + step))
+            pos += step
+        pieces.append(chunk)
+
+    while any(pieces):
+        chunk = rnd.choice([x for x in pieces if x])
+        yield chunk.pop(0)
+
+
+@pytest.fixture(autouse=True)
+def small_reads(monkeypatch):
+    monkeypatch.setattr(hashing, "READ_SIZE", 1000)
+
+
+@pytest.mark.parametrize("name, combine", [("crc32", crc32_combine), ("adler32", adler32_combine)])
+def test_combine(name, combine):
+    func = getattr(zlib, name)
+    rnd = random.Random(0)
+    data = random_bytes(100000)
+
+    for _ in range(50):
+        cut = rnd.choice((0, len(data), rnd.randrange(len(data))))
+        a, b = data[:cut], data[cut:]
+        assert combine(func(a), func(b), len(b)) == func(data)
+
+    assert combine(func(data), func(b""), 0) == func(data)
+
+
+def test_parallel_writes(tmp_path):
+    rnd = random.Random(1)
+    data = random_bytes(200000, seed=1)
+    path = tmp_path / "file"
+    path.write_bytes(data)
+
+    for count in (1, 2, 5, 16):
+        hasher = StreamHasher(ALGORITHMS)
+        for start, end in chunks(rnd, len(data), count):
+            hasher.update(start, data[start:end])
+        assert hasher.hexdigest(str(path)) == expected(data)
+
+
+def test_streamed_data_is_not_read_again(tmp_path):
+    data = random_bytes(50000, seed=2)
+    path = tmp_path / "file"
+
+    #: what is on disk differs, so it shows whether the file was read
+    path.write_bytes(bytes(len(data)))
+    hasher = StreamHasher(ALGORITHMS)
+    for pos in range(0, len(data), 3000):
+        hasher.update(pos, data[pos : pos + 3000])
+
+    progress = []
+    assert hasher.hexdigest(str(path), progress.append) == expected(data)
+    assert progress == [0, 100]
+
+
+def test_missing_data_is_read(tmp_path):
+    data = random_bytes(50000, seed=3)
+    path = tmp_path / "file"
+    path.write_bytes(data)
+
+    #: the start and a piece in the middle were never written
+    hasher = StreamHasher(ALGORITHMS)
+    hasher.update(10000, data[10000:20000])
+    hasher.update(30000, data[30000:])
+    assert hasher.hexdigest(str(path)) == expected(data)
+
+    #: a hasher without any writes hashes the whole file
+    assert StreamHasher(ALGORITHMS).hexdigest(str(path)) == expected(data)
+
+
+def test_rewritten_or_truncated_data(tmp_path):
+    data = random_bytes(50000, seed=4)
+    path = tmp_path / "file"
+    path.write_bytes(data)
+
+    #: a chunk loaded twice
+    hasher = StreamHasher(ALGORITHMS)
+    hasher.update(0, b"x" * 20000)
+    hasher.update(0, data[:20000])
+    hasher.update(20000, data[20000:])
+    assert hasher.hexdigest(str(path)) == expected(data)
+
+    #: the file was cut after writing
+    hasher = StreamHasher(ALGORITHMS)
+    hasher.update(0, data + b"tail")
+    assert hasher.hexdigest(str(path)) == expected(data)
+
+    hasher = StreamHasher(ALGORITHMS)
+    hasher.update(0, b"x" * 30000)
+    hasher.reset()
+    hasher.update(40000, data[40000:])
+    assert hasher.hexdigest(str(path)) == expected(data)
+
+
+def test_result_is_cached_until_updated(tmp_path):
+    data = random_bytes(10000, seed=5)
+    path = tmp_path / "file"
+    path.write_bytes(data)
+
+    hasher = StreamHasher(["crc32", "md5", "unknown"])
+    assert hasher.algorithms == ["crc32", "md5"]
+    first = hasher.hexdigest(str(path))
+    path.write_bytes(data[::-1])
+    assert hasher.hexdigest(str(path)) is first
+
+    hasher.update(0, data[::-1])
+    result = hasher.hexdigest(str(path))
+    assert result["md5"] == hashlib.md5(data[::-1]).hexdigest()
+
+
+def test_abort(tmp_path):
+    path = tmp_path / "file"
+    path.write_bytes(random_bytes(10000, seed=6))
+
+    hasher = StreamHasher(ALGORITHMS)
+    assert hasher.hexdigest(str(path), abort=lambda: True) is False
+    assert hasher.hexdigest(str(path)) == expected(path.read_bytes())
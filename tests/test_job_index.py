@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+import random
+
+from pyload.core.datatypes.job_index import JobIndex
+
+PLUGINS = ["A", "B", "C"]
+
+
+class Model:
+    """
+    the links and packages of a job index, picking jobs by a full scan like the
+    former database query.
+    """
+
+    def __init__(self, rnd, packages=8, links=60):
+        self.rnd = rnd
+        orders = rnd.sample(range(1000), packages)
+        self.packages = {pid: [rnd.choice((0, 1)), orders[pid]] for pid in range(packages)}
+        self.links = {
+            id: [rnd.choice(PLUGINS), rnd.randrange(packages), rnd.randrange(1000), 3]
+            for id in range(links)
+        }
+
+    def loader(self):
+        return (
+            [
+                (id, plugin, pid, order)
+                for id, (plugin, pid, order, status) in self.links.items()
+                if status in JobIndex.READY_STATUS
+            ],
+            [(pid, queue, order) for pid, (queue, order) in self.packages.items()],
+        )
+
+    def ready_links(self, pid):
+        return [x for x in self.loader()[0] if x[2] == pid]
+
+    def get_job(self, occ, pre=()):
+        jobs = [
+            (self.packages[pid][1], order, id)
+            for id, plugin, pid, order in self.loader()[0]
+            if pid in self.packages
+            and ((self.packages[pid][0] == 1 and plugin not in occ) or plugin in pre)
+        ]
+        return min(jobs)[2] if jobs else None
+
+
+def loaded(model):
+    index = JobIndex()
+    index.load(model.loader)
+    return index
+
+
+def test_jobs_follow_package_and_link_order():
+    index = JobIndex()
+    index.load(
+        lambda: (
+            [(1, "A", 10, 2), (2, "A", 10, 1), (3, "B", 20, 0), (4, "A", 30, 0)],
+            [(10, 1, 2), (20, 1, 1), (30, 0, 0)],
+        )
+    )
+
+    assert index.get_job(()) == 3
+    assert index.get_job({"B"}) == 2
+    assert index.get_job({"A", "B"}) is None
+
+    #: collector links only for the plugins in pre
+    assert index.get_job({"B"}, pre=("A",)) == 4
+
+    index.update(3, "B", 20, 0, 12)  #: downloading
+    assert index.get_job(()) == 2
+    index.update(2, "A", 10, 1, 0)  #: finished
+    assert index.get_job(()) == 1
+
+
+def test_deferred_jobs_come_first():
+    index = JobIndex()
+    index.load(lambda: ([(1, "A", 10, 0), (2, "B", 10, 1)], [(10, 1, 0)]))
+
+    index.defer(2, "B")
+    assert index.get_job(()) == 2
+    assert index.get_job(()) == 1
+
+    index.defer(2, "B")
+    assert index.get_job({"B"}) == 1  #: its plugin is occupied
+    index.remove(2)
+    assert index.get_job(()) == 1
+
+
+def test_invalidate_forces_reload():
+    model = Model(random.Random(0))
+    index = loaded(model)
+    occ = set()
+
+    index.invalidate()
+    assert not index.loaded
+
+    #: changes are ignored until the next load
+    first = model.get_job(occ)
+    model.links[first][3] = 0
+    index.update(first, *model.links[first][:3], 0)
+    index.remove(first)
+    assert len(index) == len(model.loader()[0]) + 1
+
+    index.load(model.loader)
+    assert index.loaded
+    assert index.get_job(occ) == model.get_job(occ)
+
+
+def test_random_changes_agree_with_full_scan():
+    for seed in range(20):
+        rnd = random.Random(seed)
+        model = Model(rnd)
+        index = loaded(model)
+
+        for step in range(300):
+            action = rnd.randrange(7)
+            id = rnd.randrange(len(model.links))
+            pid = rnd.randrange(len(model.packages))
+
+            if action == 0:  #: status change
+                link = model.links[id]
+                link[3] = rnd.choice((0, 2, 3, 8, 12, 14))
+                index.update(id, *link)
+
+            elif action == 1:  #: link moved
+                link = model.links[id]
+                link[2] = rnd.randrange(1000)
+                index.update(id, *link)
+
+            elif action == 2:  #: link deleted
+                if model.links[id][3] != -1:
+                    model.links[id][3] = -1
+                    index.remove(id)
+
+            elif action == 3:  #: package moved, orders stay unique
+                free = set(range(1000)) - {x[1] for x in model.packages.values()}
+                if pid in model.packages:
+                    model.packages[pid][1] = rnd.choice(sorted(free))
+                    index.set_package(pid, *model.packages[pid])
+
+            elif action == 4:  #: package moved to queue or collector
+                if pid in model.packages:
+                    model.packages[pid][0] ^= 1
+                    index.set_packages(
+                        (p, q, o) for p, (q, o) in model.packages.items()
+                    )
+
+            elif action == 5:  #: package restarted
+                for link in model.links.values():
+                    if link[1] == pid and link[3] != -1:
+                        link[3] = 3
+                index.set_package_links(pid, model.ready_links(pid))
+
+            elif action == 6 and rnd.random() < 0.1:  #: package deleted
+                if pid in model.packages:
+                    del model.packages[pid]
+                    for link in model.links.values():
+                        if link[1] == pid:
+                            link[3] = -1
+                    index.remove_package(pid)
+
+            occ = set(rnd.sample(PLUGINS, rnd.randrange(len(PLUGINS))))
+            pre = tuple(rnd.sample(PLUGINS, rnd.randrange(2)))
+            assert index.get_job(occ, pre) == model.get_job(occ, pre), (seed, step)
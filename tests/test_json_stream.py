@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+import json
+import threading
+import time
+import types
+
+import flask
+import pytest
+
+from pyload.core.api import Role
+from pyload.core.managers.event_manager import EventManager, UpdateEvent
+from pyload.webui.app.blueprints import json_blueprint
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(json_blueprint, "STREAM_INTERVAL", 0.05)
+    monkeypatch.setattr(json_blueprint, "STREAM_TIMEOUT", 0.5)
+    monkeypatch.setattr(json_blueprint, "_snapshots", {})
+
+    core = types.SimpleNamespace(_=lambda x: x)
+    core.event_manager = EventManager(core)
+    api = types.SimpleNamespace(
+        pyload=core,
+        status_server=lambda: {"speed": 0, "active": 0},
+        status_downloads=lambda: [],
+    )
+
+    app = flask.Flask(__name__)
+    app.secret_key = "test"
+    app.config["PYLOAD_API"] = api
+    app.register_blueprint(json_blueprint.bp)
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session.update(name="admin", authenticated=True, role=Role.ADMIN)
+    client.events = core.event_manager
+    return client
+
+
+def parse(data):
+    """
+    returns the messages of an event stream as dicts of their fields.
+    """
+    messages = []
+    for block in data.decode().split("\n\n"):
+        if not block:
+            continue
+        message = {}
+        for line in block.split("\n"):
+            field, _, value = line.partition(":")
+            message[field] = value.strip()
+        messages.append(message)
+    return messages
+
+
+def test_stream_pushes_status_once_and_keeps_alive(client):
+    response = client.get("/json/stream")
+    assert response.mimetype == "text/event-stream"
+
+    messages = parse(response.data)
+    assert messages[0] == {"retry": "100"}
+    status = [m for m in messages if m.get("event") == "status"]
+    assert len(status) == 1
+    assert json.loads(status[0]["data"]) == {"speed": 0, "active": 0}
+
+    #: an idle stream still writes every interval, so closed tabs are noticed
+    assert sum(m == {"": "keepalive"} for m in messages) >= 3
+    assert not any(m.get("event") == "queue" for m in messages)
+
+
+def test_stream_pushes_queue_events(client):
+    def add():
+        time.sleep(0.1)
+        client.events.add_event(UpdateEvent("file", 1, "queue"))
+        client.events.add_event(UpdateEvent("file", 1, "queue"))
+        client.events.add_event(UpdateEvent("pack", 2, "collector"))
+
+    thread = threading.Thread(target=add)
+    thread.start()
+    messages = parse(client.get("/json/stream?queue=1").data)
+    thread.join()
+
+    queue = [m for m in messages if m.get("event") == "queue"]
+    events = [e for m in queue for e in json.loads(m["data"])]
+    assert events.count(["update", "queue", "file", 1]) == 1
+    assert ["update", "collector", "pack", 2] in events
+    assert queue[-1]["id"] == "3"
+
+
+def test_stream_resumes_after_last_event_id(client):
+    client.events.add_event(UpdateEvent("file", 1, "queue"))
+    client.events.add_event(UpdateEvent("file", 2, "queue"))
+
+    messages = parse(
+        client.get("/json/stream?queue=1", headers={"Last-Event-ID": "1"}).data
+    )
+    queue = [m for m in messages if m.get("event") == "queue"]
+    assert json.loads(queue[0]["data"]) == [["update", "queue", "file", 2]]
+
+
+def test_stream_limit(client, monkeypatch):
+    streams = threading.Semaphore(1)
+    monkeypatch.setattr(json_blueprint, "_streams", streams)
+
+    response = client.get("/json/stream")
+    assert response.status_code == 200
+    response.close()
+
+    #: the slot is released once the stream is closed
+    assert streams.acquire(blocking=False)
+    assert client.get("/json/stream").status_code == 503
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+
+import os
+import random
+import struct
+
+import Cryptodome.Cipher.AES
+import pytest
+
+from pyload.plugins.downloaders.MegaCoNz import MegaCrypto
+from tests.support import random_bytes
+
+SIZES = [1, 15, 16, 1000, 0x20000, 0x20000 + 1, 0x300000 + 7, 0x600000 + 5]
+
+
+def ctr(k, iv):
+    return Cryptodome.Cipher.AES.new(
+        MegaCrypto.a32_to_str(k),
+        Cryptodome.Cipher.AES.MODE_CTR,
+        nonce=MegaCrypto.a32_to_str(iv[0:2]),
+        initial_value=0,
+    )
+
+
+def cbc_mac(data, k, iv):
+    mac = Cryptodome.Cipher.AES.new(
+        MegaCrypto.a32_to_str(k), Cryptodome.Cipher.AES.MODE_CBC, iv=bytes(16)
+    )
+    file_mac = bytes(16)
+
+    for chunk_start, chunk_size in MegaCrypto.get_chunks(len(data)):
+        chunk = data[chunk_start : chunk_start + chunk_size]
+        cbc = Cryptodome.Cipher.AES.new(
+            MegaCrypto.a32_to_str(k),
+            Cryptodome.Cipher.AES.MODE_CBC,
+            iv=MegaCrypto.a32_to_str(iv[0:2] * 2),
+        )
+        chunk_mac = cbc.encrypt(chunk.ljust(-(-len(chunk) // 16) * 16, b"\0"))[-16:]
+        file_mac = mac.encrypt(chunk_mac)
+
+    d = struct.unpack(">4I", file_mac)
+    return (d[0] ^ d[1], d[2] ^ d[3])
+
+
+def sequential(encrypted, key):
+    """
+    the former decryption, the whole file at once and the MAC of every chunk in
+    turn. returns the plaintext and its MAC.
+    """
+    k, iv, meta_mac = MegaCrypto.get_cipher_key(key)
+    data = ctr(k, iv).decrypt(encrypted)
+    return data, cbc_mac(data, k, iv)
+
+
+def encrypted_file(size, seed):
+    """
+    returns a random file encrypted like MEGA does and its key, carrying the
+    MAC of the plaintext.
+    """
+    rnd = random.Random(seed)
+    k = tuple(rnd.getrandbits(32) for _ in range(4))
+    iv = (rnd.getrandbits(32), rnd.getrandbits(32), 0, 0)
+    plain = random_bytes(size, seed)
+    encrypted = ctr(k, iv).encrypt(plain)
+
+    mac = cbc_mac(plain, k, iv)
+    key = (k[0] ^ iv[0], k[1] ^ iv[1], k[2] ^ mac[0], k[3] ^ mac[1]) + iv[:2] + mac
+    assert MegaCrypto.get_cipher_key(key) == (k, iv, mac)
+    return plain, encrypted, key
+
+
+def pieces(rnd, size, count):
+    """
+    (start, end) of the pieces of count ranges of the file, interleaved as if
+    they were loaded in parallel.
+    """
+    bounds = sorted({0, size, *rnd.sample(range(1, size), min(count, size) - 1)})
+    ranges = []
+    for start, end in zip(bounds, bounds[1:]):
+        parts = []
+        while start < end:
+            step = min(end - start, rnd.randrange(1, 1 << 16))
+            parts.append((start, start + step))
+            start += step
+        ranges.append(parts)
+
+    while any(ranges):
+        yield rnd.choice([x for x in ranges if x]).pop(0)
+
+
+def decrypt(decrypter, encrypted, filename, rnd, count):
+    with open(filename, "wb") as fp:
+        for start, end in pieces(rnd, len(encrypted), count):
+            fp.seek(start)
+            fp.write(decrypter(start, encrypted[start:end]))
+
+
+def test_chunk_bounds_follow_get_chunks():
+    size = 0x1000000 + 123
+    for index, (start, length) in enumerate(MegaCrypto.get_chunks(size)):
+        bounds = MegaCrypto.chunk_bounds(index)
+        assert bounds[0] == start
+        assert length == bounds[1] or start + length == size
+        for offset in (start, start + length // 2, start + length - 1):
+            assert MegaCrypto.chunk_index(offset) == index
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_decrypter_agrees_with_sequential_decrypt(size, tmp_path):
+    rnd = random.Random(size)
+    plain, encrypted, key = encrypted_file(size, size)
+    expected = sequential(encrypted, key)
+    assert expected[0] == plain
+
+    for count in (1, 3, 8):
+        filename = str(tmp_path / f"file{count}")
+        decrypter = MegaCrypto.Decrypter(key)
+        decrypt(decrypter, encrypted, filename, rnd, count)
+
+        with open(filename, "rb") as fp:
+            assert fp.read() == plain
+        assert decrypter.digest(filename, workers=2) == expected[1]
+        assert decrypter.verify(filename)  #: digests again, the same
+
+        #: written in order, only the last chunk is left for the digest
+        if count == 1:
+            chunks = len(list(MegaCrypto.get_chunks(size)))
+            assert len(decrypter.macs) >= chunks - 1
+
+
+def test_macs_read_back_from_disk(tmp_path, monkeypatch):
+    size = 0x300000 + 7
+    plain, encrypted, key = encrypted_file(size, 1)
+    mac = sequential(encrypted, key)[1]
+    filename = str(tmp_path / "file")
+
+    decrypter = MegaCrypto.Decrypter(key, mac=False)
+    decrypt(decrypter, encrypted, filename, random.Random(1), 4)
+    assert not decrypter.macs
+    assert decrypter.digest(filename) == mac
+
+    #: no pread on windows
+    monkeypatch.delattr(os, "pread")
+    assert decrypter.digest(filename, workers=3) == mac
+
+    with open(filename, "r+b") as fp:
+        fp.seek(size // 2)
+        fp.write(b"x")
+    assert not decrypter.verify(filename)
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+
+import random
+
+from pyload.core.database.file_database import FileDatabaseMethods
+from tests.support import DatabaseCore
+
+
+def links(core, pid):
+    """
+    ids of the links of a package by their order.
+    """
+    orders = core.db.get_link_orders(pid)
+    assert len(set(orders.values())) == len(orders)
+    return sorted(orders, key=orders.get)
+
+
+def packages(core, queue):
+    rows = core.query(
+        "SELECT id FROM packages WHERE queue=? ORDER BY packageorder", queue
+    )
+    return [r[0] for r in rows]
+
+
+def moved(model, id, position):
+    model.remove(id)
+    if position < 0:
+        model.append(id)
+    else:
+        model.insert(position, id)
+
+
+def test_random_link_moves_and_deletes_keep_the_order():
+    rnd = random.Random(0)
+    compactions = 0
+
+    for seed in range(5):
+        core = DatabaseCore()
+        try:
+            core.populate(40, per_package=40)
+            model = links(core, 1)
+
+            for step in range(300):
+                id = rnd.choice(model)
+                if rnd.random() < 0.05 and len(model) > 2:
+                    core.db.delete_links([id])
+                    model.remove(id)
+                else:
+                    #: the same few slots run out of room soonest
+                    position = rnd.choice((-1, 0, 1, 2, len(model) - 1, len(model) + 5))
+                    order, compacted = core.db.reorder_link(
+                        {"package": 1, "id": id}, position
+                    )
+                    compactions += compacted
+                    moved(model, id, position)
+                    assert core.db.get_link_orders(1)[id] == order
+
+                assert links(core, 1) == model, (seed, step)
+        finally:
+            core.close()
+
+    assert compactions
+
+
+def test_moves_into_one_slot_compact_the_package(core):
+    core.populate(3, per_package=3)
+
+    #: every move halves the room between the first link and the moved one
+    gap = FileDatabaseMethods.ORDER_GAP
+    for step in range(gap.bit_length() + 1):
+        model = links(core, 1)
+        order, compacted = core.db.reorder_link({"package": 1, "id": model[-1]}, 1)
+        moved(model, model[-1], 1)
+        assert links(core, 1) == model
+        if compacted:
+            break
+
+    assert compacted
+    assert step >= gap.bit_length() - 2
+
+    #: spread again, the moved link got the middle of the first gap
+    orders = sorted(core.db.get_link_orders(1).values())
+    assert orders == [gap, gap + gap // 2, 2 * gap]
+
+
+def test_package_moves(core):
+    core.populate(50, per_package=10, queue=1)
+    model = packages(core, 1)
+    rnd = random.Random(1)
+
+    for _ in range(100):
+        pid = rnd.choice(model)
+        position = rnd.choice((-1, 0, 1, len(model)))
+        p = type("Package", (), {"id": pid, "queue": 1})
+        core.db.reorder_package(p, position)
+        moved(model, pid, position)
+        assert packages(core, 1) == model
+
+
+def test_compact_orders(core):
+    core.populate(30, per_package=10)
+    expected = {pid: links(core, pid) for pid in (1, 2, 3)}
+
+    #: squeezed orders of one package and of the queue
+    for i, id in enumerate(expected[2]):
+        core.query("UPDATE links SET linkorder=? WHERE id=?", 100 + i, id)
+    core.query("UPDATE packages SET packageorder=id")
+
+    assert core.db.queue(lambda db: db.compact_orders()) == 2
+    assert core.db.queue(lambda db: db.compact_orders()) == 0
+
+    gap = FileDatabaseMethods.ORDER_GAP
+    orders = core.db.get_link_orders(2)
+    assert [orders[id] for id in expected[2]] == [(i + 1) * gap for i in range(10)]
+    assert {pid: links(core, pid) for pid in (1, 2, 3)} == expected
+    assert core.query("SELECT packageorder FROM packages ORDER BY id") == [
+        (gap,),
+        (2 * gap,),
+        (3 * gap,),
+    ]
+
+
+def test_batched_deletes(core, monkeypatch):
+    core.populate(2000, per_package=100)
+    ids = [r[0] for r in core.query("SELECT id FROM links ORDER BY id")]
+
+    #: all of the links of the first 12 packages and some of the next ones
+    gone = ids[:1200] + ids[1300:1350] + ids[1500:1600]
+    assert sorted(core.db.delete_links(gone)) == list(range(1, 13)) + [14, 16]
+    assert core.query("SELECT COUNT(*) FROM links")[0][0] == 2000 - len(gone)
+    assert core.db.get_empty_packages(range(1, 21)) == list(range(1, 13)) + [16]
+
+    #: several batches
+    monkeypatch.setattr(FileDatabaseMethods, "MAX_VARIABLES", 7)
+    empty = core.db.get_empty_packages(range(1, 21))
+    assert sorted(empty) == list(range(1, 13)) + [16]
+    assert sorted(core.db.delete_links(ids[1350:1360] + ids[1900:])) == [14, 20]
+    assert 20 in core.db.get_empty_packages(range(1, 21))
+
+
+def test_positions_leave_the_manager(core):
+    core.populate(15, per_package=5)
+    files = core.files
+    pid = 2
+    model = links(core, pid)
+
+    #: a cached instance has the gap spaced order
+    pyfile = files.get_file(model[3])
+    assert pyfile.order > 3
+
+    seq = core.evm.seq
+    files.reorder_file(model[3], 1)
+    moved(model, model[3], 1)
+    cursor, events = core.evm.read(seq)
+    assert ["insert", "queue", "file", model[1], 1] in events
+
+    data = files.get_package_data(pid)
+    assert data["order"] == 1
+    assert {id: x["order"] for id, x in data["links"].items()} == {
+        id: i for i, id in enumerate(model)
+    }
+    assert files.get_file_data(model[1])[model[1]]["order"] == 1
+    assert files.get_file_data(model[4])[model[4]]["order"] == 4
+
+    complete = files.get_complete_data()
+    assert [complete[p]["order"] for p in (1, 2, 3)] == [0, 1, 2]
+    assert [complete[pid]["links"][id]["order"] for id in model] == list(range(5))
+    assert [files.get_info_data()[p]["order"] for p in (1, 2, 3)] == [0, 1, 2]
+
+    #: fed back, the reported positions leave everything in place
+    for id, x in data["links"].items():
+        files.reorder_file(id, x["order"])
+    assert links(core, pid) == model
+
+    seq = core.evm.seq
+    files.reorder_package(3, 0)
+    files.reorder_package(1, -1)
+    cursor, events = core.evm.read(seq)
+    assert ["insert", "queue", "pack", 3, 0] in events
+    assert ["insert", "queue", "pack", 1, 2] in events
+    assert [files.get_package_data(p)["order"] for p in (3, 2, 1)] == [0, 1, 2]
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+import random
+
+RECOMPUTE = """
+SELECT p.id, IFNULL(SUM(l.size), 0),
+       IFNULL(SUM(CASE WHEN l.status IN (0,4,13) THEN l.size ELSE 0 END), 0),
+       COUNT(l.id), IFNULL(SUM(CASE WHEN l.status IN (0,4,13) THEN 1 ELSE 0 END), 0)
+FROM packages p LEFT JOIN links l ON l.package = p.id
+GROUP BY p.id ORDER BY p.id
+"""
+
+STATS = "SELECT id, sizetotal, sizedone, linkstotal, linksdone FROM pstats ORDER BY id"
+
+
+def test_triggers_agree_with_recomputation(core):
+    rnd = random.Random(0)
+    core.populate(300, 30)
+    assert core.query(STATS) == core.query(RECOMPUTE)
+
+    for step in range(500):
+        links = [x[0] for x in core.query("SELECT id FROM links")]
+        packages = [x[0] for x in core.query("SELECT id FROM packages")]
+        action = rnd.randrange(6) if len(links) > 3 else 2
+
+        if action == 0:  #: status or size change, buffered by the write-behind
+            pyfile = core.files.get_file(rnd.choice(links))
+            pyfile.status = rnd.choice((0, 2, 3, 4, 8, 12, 13))
+            pyfile.size = rnd.randrange(1 << 30)
+            core.db.update_link(pyfile)
+
+        elif action == 1:  #: link moved to another package
+            core.query(
+                "UPDATE links SET package=? WHERE id=?",
+                rnd.choice(packages),
+                rnd.choice(links),
+            )
+
+        elif action == 2:
+            core.db.add_links(
+                [(f"http://example.com/new{step}-{i}", "BasePlugin") for i in range(3)],
+                rnd.choice(packages),
+            )
+
+        elif action == 3:
+            core.db.delete_links(rnd.sample(links, 3))
+
+        elif action == 4:
+            pid = core.db.add_package(f"New {step}", "", rnd.randrange(2))
+            core.db.add_links([(f"http://example.com/p{step}", "BasePlugin")], pid)
+
+        elif action == 5 and len(packages) > 1 and rnd.random() < 0.2:
+            core.db.delete_packages([rnd.choice(packages)])
+
+        #: same or unchanged values never touch the stats
+        core.query("UPDATE links SET size=size, status=status")
+
+        assert core.query(STATS) == core.query(RECOMPUTE), step
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+
+import random
+import re
+
+import pytest
+
+from pyload.core.datatypes.url_router import URLRouter, required_literals
+from tests.support import PluginCore, linear, sample_urls
+
+PATTERNS = [
+    ("FileHostCom", r"https?://(?:www\.)?filehost\.com/(?:file|f)/(?P<ID>\w+)"),
+    ("FileHost", r"https?://(?:www\.)?file(?:host)?\.(?:com|net)/\w+"),
+    ("Mirror", r"(?i)https?://(?:mirror|backup)\.files?\.example/\w+"),
+    ("Folder", r"https?://[\w.]+/folder/(\d+)"),
+    ("Archive", r"https?://\S+\.(?:7z|zip)$"),
+    ("Short", r"https?://ab\.cd/\w+"),
+    ("Ftp", r"ftps?://\S+"),
+    ("Invalid", None),
+]
+
+URLS = [
+    "http://filehost.com/file/abc",
+    "https://www.filehost.com/f/abc",
+    "https://FILEHOST.com/file/abc",
+    "http://filehost.net/abc",
+    "http://file.com/abc",
+    "https://MIRROR.File.Example/x",
+    "https://backup.files.example/x",
+    "http://mirror.files.example.org/x",
+    "https://any.host/folder/12",
+    "https://filehost.com/folder/12",
+    "https://other.example/a.zip",
+    "https://filehost.com/a.7z",
+    "http://ab.cd/x",
+    "ftp://filehost.com/file/abc",
+    "ftps://host/a.zip",
+    "http://unknown.example/x",
+    "",
+]
+
+
+def plugins():
+    result = []
+    for name, pattern in PATTERNS:
+        value = {"pattern": pattern}
+        if pattern is not None:
+            value["re"] = re.compile(pattern)
+        result.append((name, value))
+    return result
+
+
+def route(router, urls):
+    res = []
+    for url in urls:
+        found = router.match(url)
+        res.append((url, found[0] if found else "DefaultPlugin"))
+    return res
+
+
+def test_literals_are_required_by_every_match():
+    assert set(required_literals(PATTERNS[0][1])) == {
+        "filehost.com/file/",
+        "filehost.com/f/",
+    }
+    assert set(required_literals(PATTERNS[2][1])) == {"://mirror.file", "://backup.file"}
+    assert set(required_literals(PATTERNS[4][1])) == {".7z", ".zip"}
+    #: too common to tell plugins apart
+    assert required_literals(PATTERNS[6][1]) == ()
+    assert required_literals("(") == ()
+
+
+def test_router_agrees_with_linear_match():
+    items = [x for x in plugins() if "re" in x[1]]
+    router = URLRouter(plugins())
+
+    assert len(router) == len(items)
+    assert [router.entries[x][0] for x in router.fallback] == ["Ftp"]
+    assert route(router, URLS) == linear(items, URLS)
+
+
+def test_router_agrees_on_sampled_urls():
+    items = [x for x in plugins() if "re" in x[1]]
+    router = URLRouter(items)
+    urls = sample_urls(items, 2000, seed=1)
+
+    rnd = random.Random(1)
+    urls += [url.upper() for url in rnd.sample(urls, 200)]
+    assert route(router, urls) == linear(items, urls)
+
+
+def test_router_is_stale_on_changes():
+    items = plugins()
+    router = URLRouter(items)
+    assert not router.is_stale(items)
+
+    changed = list(items)
+    changed[1] = ("FileHost", {"pattern": r"x", "re": re.compile(r"x")})
+    assert router.is_stale(changed)
+    assert router.is_stale(items[:-2])
+
+
+@pytest.fixture(scope="module")
+def manager():
+    from pyload.core.managers.plugin_manager import PluginManager
+
+    core = PluginCore()
+    yield PluginManager(core)
+    core.close()
+
+
+def test_bundled_plugins_agree_with_linear_match(manager):
+    items = list(manager.pattern_plugins())
+    urls = sample_urls(items, 5000)
+    assert manager.parse_urls(urls) == linear(items, urls)
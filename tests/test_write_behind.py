@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+import time
+
+
+def link(core, id):
+    return core.query("SELECT name, status, error FROM links WHERE id=?", id)[0]
+
+
+def test_updates_of_a_link_are_coalesced(core):
+    core.db.write_delay = 60  #: only flushed on demand
+    core.populate(10)
+    pyfile = core.files.get_file(1)
+
+    for status in (7, 12, 13, 0):
+        pyfile.status = status
+        core.db.update_link(pyfile)
+
+    stats = core.db.get_write_stats()
+    assert stats["pending"] == 1
+    assert stats["coalesced"] == 3
+
+    #: any other job sees them
+    assert link(core, 1)[1] == 0
+    assert core.db.get_write_stats()["pending"] == 0
+
+
+def test_flushed_after_delay_and_batch(core):
+    core.populate(200)
+    core.db.write_delay = 0.05
+    pyfile = core.files.get_file(1)
+    pyfile.name = "delayed"
+    core.db.update_link(pyfile)
+
+    deadline = time.time() + 5
+    while core.db.get_write_stats()["pending"] and time.time() < deadline:
+        time.sleep(0.01)
+    assert core.db.get_write_stats()["pending"] == 0
+
+    core.db.write_delay = 60
+    core.db.write_batch = 50
+    pyfiles = [core.files.get_file(id) for id in range(1, 51)]
+    flushes = core.db.get_write_stats()["flushes"]
+    for pyfile in pyfiles:
+        pyfile.name = f"batch {pyfile.id}"
+        core.db.update_link(pyfile)
+
+    deadline = time.time() + 5
+    while core.db.get_write_stats()["flushes"] == flushes and time.time() < deadline:
+        time.sleep(0.01)
+    stats = core.db.get_write_stats()
+    assert stats["flushes"] == flushes + 1
+    assert stats["pending"] == 0
+    assert link(core, 50)[0] == "batch 50"
+
+
+def test_failed_flush_rolls_back(core):
+    core.db.write_delay = 60
+    core.populate(10)
+    pyfile = core.files.get_file(1)
+    pyfile.error = "lost"
+    core.db.update_link(pyfile)
+    core.db.write_behind(("broken", 1), "UPDATE missing SET x=?", (1,))
+
+    core.db.sync_save()
+    assert link(core, 1)[2] == ""
+
+    #: the database works on after the rollback
+    pyfile.error = "kept"
+    core.db.update_link(pyfile)
+    core.db.sync_save()
+    assert link(core, 1)[2] == "kept"